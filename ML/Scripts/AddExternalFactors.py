@@ -1,19 +1,54 @@
 import pandas as pd
 import os
 
-def add_external_factors():
-    script_dir = os.path.dirname(__file__)
-    dataset_dir = os.path.join(script_dir, "../DataSet")
-    external_factors_dir = os.path.join(dataset_dir, "Maharashtra/External Factors")
-    main_csv_path = os.path.join(dataset_dir, "main.csv")
-    
-    if not os.path.exists(main_csv_path):
-        print(f"Error: {main_csv_path} not found.")
-        return
+from LookupTables import attach
+from ProcessTemperature import temperature_table
+from ProcessMSP import msp_table
+from Instrumentation import instrumented, record_rows
+from Storage import write_dataset
+
+def transform_external_factors(df_main, external_factors_dir):
+    """
+    Returns df_main (core columns only) with Rainfall, Diesel, Irrigation and
+    APY columns attached, or None if the external factor files are missing.
+    """
+    df_main = core_columns(df_main)
+    tables = external_factor_tables(external_factors_dir)
+    if tables is None:
+        return None
+    # Years after the latest one in a file are forward filled from it
+    print("Merging Rainfall, Diesel, Irrigation and APY data...")
+    return attach(df_main, tables)
+
+def transform_factors(df_main, external_factors_dir, state):
+    """
+    Returns df_main (core columns only) with every factor of state's External
+    Factors directory attached in one merge: Rainfall, Diesel, Irrigation,
+    APY, Temperature and msp. The factors are joined on State/Year/Month, so
+    rows of other states get NaN instead of state's values. Returns None if
+    a factor file is missing.
+    """
+    df_main = core_columns(df_main)
+    other_states = sorted(set(df_main['State']) - {state})
+    if other_states:
+        print(f"Warning: no external factors for {', '.join(other_states)} (only {state}'s are loaded)")
+
+    tables = external_factor_tables(external_factors_dir)
+    if tables is None:
+        return None
+    for table in [temperature_table(os.path.join(external_factors_dir, "Temprature.csv"), df_main['Year'].max()),
+                  msp_table(os.path.join(external_factors_dir, "msp.pdf"), df_main['Year'].unique())]:
+        if table is None:
+            return None
+        tables.append(table)
+
+    print("Merging Rainfall, Diesel, Irrigation, APY, Temperature and MSP data...")
+    return attach(df_main, tables, state=state)
+
+def core_columns(df_main):
+    """A copy of df_main with fixed month names, int Year and only the core columns."""
+    df_main = df_main.copy()
 
-    print("Loading main.csv...")
-    df_main = pd.read_csv(main_csv_path)
-    
     # Fix Typos in Month Column
     print("Fixing typos in Month column...")
     df_main['Month'] = df_main['Month'].str.strip()
@@ -28,16 +63,21 @@ def add_external_factors():
     df_main['Year'] = df_main['Year'].astype(int)
 
     # Clean existing external factor columns if re-running
-    core_columns = [
+    columns = [
         "State", "Commodity", "Year", "Month", "Market", 
         "Current_Month price", "Prev_Month price", 
         "Current_Month arrivals", "Prev_Month arrivals"
     ]
     
     # Filter to keep only core columns that exist
-    df_main = df_main[[c for c in core_columns if c in df_main.columns]]
-
+    return df_main[[c for c in columns if c in df_main.columns]]
 
+def external_factor_tables(external_factors_dir):
+    """
+    The Rainfall, Diesel, Irrigation ((Year, Month) -> value) and Wheat APY
+    (Year -> Area, Production, Yield) lookup tables, or None if a file is
+    missing.
+    """
     # Load External Factors
     print("Loading external factors...")
     try:
@@ -49,89 +89,74 @@ def add_external_factors():
         print(f"Error loading external factors: {e}")
         return
 
-    # --- Preprocess External Factors ---
-
-    for df in [df_rainfall, df_diesel, df_irrigation]:
+    # --- Build (Year, Month) -> value lookup tables ---
+    tables = []
+    for df, value_col in [(df_rainfall, 'Rainfall_mm'), (df_diesel, 'Diesel_Price_Rs_per_Litre'),
+                          (df_irrigation, 'Irrigation_Water_Usage_MCM')]:
         df['Year'] = df['Year'].astype(int)
         df['Month'] = df['Month'].str.strip()
-        
-    # --- Forward Fill 2022 to 2023 ---
-    # Helper to forward fill for 2023 based on 2022
-    def forward_fill_2023(df, value_col):
-        # Check if 2023 exists
-        if 2023 not in df['Year'].unique():
-            print(f"Forward filling {value_col} for 2023...")
-            df_2022 = df[df['Year'] == 2022].copy()
-            df_2022['Year'] = 2023
-            return pd.concat([df, df_2022], ignore_index=True)
-        return df
-
-    df_rainfall = forward_fill_2023(df_rainfall, 'Rainfall_mm')
-    df_diesel = forward_fill_2023(df_diesel, 'Diesel_Price_Rs_per_Litre')
-    df_irrigation = forward_fill_2023(df_irrigation, 'Irrigation_Water_Usage_MCM')
-
-    # --- Merge Rainfall, Diesel, Irrigation ---
-    
-    print("Merging Rainfall data...")
-    df_main = pd.merge(df_main, df_rainfall[['Year', 'Month', 'Rainfall_mm']], 
-                       on=['Year', 'Month'], how='left')
-
-    print("Merging Diesel data...")
-    df_main = pd.merge(df_main, df_diesel[['Year', 'Month', 'Diesel_Price_Rs_per_Litre']], 
-                       on=['Year', 'Month'], how='left')
+        tables.append(df[['Year', 'Month', value_col]])
 
-    print("Merging Irrigation data...")
-    df_main = pd.merge(df_main, df_irrigation[['Year', 'Month', 'Irrigation_Water_Usage_MCM']], 
-                       on=['Year', 'Month'], how='left')
+    # --- Process APY Data (one value per Year) ---
+    print("Processing APY data...")
+    wheat_apy = apy_table(df_apy, crop='Wheat')
+    if wheat_apy is not None:
+        tables.append(wheat_apy)
+    else:
+        print("Warning: Wheat data not found in APY.csv")
+    return tables
 
-    # --- Process and Merge APY Data ---
-    print("Processing and Merging APY data...")
-    
-    # Filter for Wheat and Total Season
-    # Adjust column names if necessary based on inspection (headers seemed to have quotes in previous view)
-    # The view_file output showed headers like "Crop", "Season", etc. Pandas handle quotes usually.
-    
+def apy_table(df_apy, crop):
+    """
+    Returns the Year -> Area, Production, Yield table of crop (Total season)
+    from APY.csv, whose columns are named like "Area-2021-22" (season 2021-22
+    is used for 2021). Returns None if the crop is not in the file.
+    """
     # Normalize headers just in case
+    df_apy = df_apy.copy()
     df_apy.columns = [c.strip().replace('"', '') for c in df_apy.columns]
+
+    crop_apy = df_apy[(df_apy['Crop'] == crop) & (df_apy['Season'] == 'Total')]
+    if crop_apy.empty:
+        return None
+
+    values = crop_apy.iloc[0]
+    columns = pd.Series(df_apy.columns).str.extract(r'^(Area|Production|Yield)-(\d{4})-\d{2}$').dropna()
+    table = pd.DataFrame({
+        'measure': columns[0].to_numpy(),
+        'Year': columns[1].astype(int).to_numpy(),
+        'value': pd.to_numeric(values[df_apy.columns[columns.index]], errors='coerce').to_numpy()
+    })
+    table = table.pivot(index='Year', columns='measure', values='value').reset_index()
+    table = table[['Year', 'Area', 'Production', 'Yield']].dropna(how='all', subset=['Area', 'Production', 'Yield'])
+    table.columns.name = None
+    return table
+
+@instrumented()
+def add_external_factors():
+    script_dir = os.path.dirname(__file__)
+    dataset_dir = os.path.join(script_dir, "../DataSet")
+    external_factors_dir = os.path.join(dataset_dir, "Maharashtra/External Factors")
+    main_csv_path = os.path.join(dataset_dir, "main.csv")
     
-    wheat_apy = df_apy[(df_apy['Crop'] == 'Wheat') & (df_apy['Season'] == 'Total')]
-    
-    if not wheat_apy.empty:
-        # Extract values for 2021-22 and 2022-23
-        # 2021 data <- 2021-22 columns
-        area_21 = wheat_apy.iloc[0]['Area-2021-22']
-        prod_21 = wheat_apy.iloc[0]['Production-2021-22']
-        yield_21 = wheat_apy.iloc[0]['Yield-2021-22']
-        
-        # 2022 data <- 2022-23 columns
-        area_22 = wheat_apy.iloc[0]['Area-2022-23']
-        prod_22 = wheat_apy.iloc[0]['Production-2022-23']
-        yield_22 = wheat_apy.iloc[0]['Yield-2022-23']
-        
-        # Map to main dataframe based on Year
-        def get_apy_value(year, val_21, val_22):
-            if year == 2021:
-                return val_21
-            elif year == 2022:
-                return val_22
-            elif year == 2023: # Forward fill 2022 to 2023
-                return val_22
-            else:
-                return None
-
-        # Apply mapping
-        df_main['Area'] = df_main['Year'].apply(lambda x: get_apy_value(x, area_21, area_22))
-        df_main['Production'] = df_main['Year'].apply(lambda x: get_apy_value(x, prod_21, prod_22))
-        df_main['Yield'] = df_main['Year'].apply(lambda x: get_apy_value(x, yield_21, yield_22))
-        
-    else:
-        print("Warning: Wheat data not found in APY.csv")
+    if not os.path.exists(main_csv_path):
+        print(f"Error: {main_csv_path} not found.")
+        return
+
+    print("Loading main.csv...")
+    df_main = pd.read_csv(main_csv_path)
+    record_rows(rows_in=len(df_main))
+
+    df_main = transform_external_factors(df_main, external_factors_dir)
+    if df_main is None:
+        return
 
     # --- Formatting Output ---
     
     # Save updated main.csv
     print(f"Saving updated main.csv to {main_csv_path}...")
-    df_main.to_csv(main_csv_path, index=False)
+    write_dataset(df_main, csv_path=main_csv_path)
+    record_rows(rows_out=len(df_main))
     
     print("\nSuccess! Added external factors and APY data.")
     print("First 5 rows:")
@@ -4,13 +4,13 @@ import os
 from sklearn.experimental import enable_iterative_imputer
 from sklearn.impute import IterativeImputer
 
-def add_lag_features():
-    script_dir = os.path.dirname(__file__)
-    dataset_dir = os.path.join(script_dir, "../DataSet")
-    main_csv_path = os.path.join(dataset_dir, "main.csv")
+from FeatureEngine import LAG_SPEC, compute_features
+from Instrumentation import instrumented, record_rows
+from Storage import write_dataset
 
-    print("Loading main.csv...")
-    df = pd.read_csv(main_csv_path)
+def transform_lag_features(df):
+    """Returns df sorted by Market/Year/Month with imputed 2-month price and arrival lags."""
+    df = df.copy()
 
     # Encode Month to ensure correct sorting and use in imputation
     month_map = {
@@ -20,17 +20,10 @@ def add_lag_features():
     # Handle potential typos just in case, though they should be fixed
     df['Month_Num'] = df['Month'].map(month_map)
     
-    # Sort to ensure shift works correctly: Market, Year, Month
-    df = df.sort_values(by=['Market', 'Year', 'Month_Num']).reset_index(drop=True)
-
     print("Creating 2-Month Lag Features...")
-    # Shift 'Prev_Month price' by 1 to get 'Prev_2_Month price'
-    # Prev_Month price at time T is Price at T-1.
-    # We want Price at T-2.
-    # So shrinking Prev_Month price (T-1) by 1 gives Price at (T-2).
-    # Group by Market to avoid shifting across different markets
-    df['Prev_2_Month price'] = df.groupby('Market')['Prev_Month price'].shift(1)
-    df['Prev_2_Month arrivals'] = df.groupby('Market')['Prev_Month arrivals'].shift(1)
+    # Prev_Month price at time T is Price at T-1, so its lag 1 within the
+    # market is Price at T-2 (LAG_SPEC). Sorted by Market, Year, Month.
+    df = compute_features(df, LAG_SPEC)
 
     print(f"Missing values before imputation:\n{df[['Prev_2_Month price', 'Prev_2_Month arrivals']].isnull().sum()}")
 
@@ -64,10 +57,23 @@ def add_lag_features():
     print(f"Missing values after imputation:\n{df[['Prev_2_Month price', 'Prev_2_Month arrivals']].isnull().sum()}")
 
     # Drop helper column
-    df = df.drop(columns=['Month_Num'])
+    return df.drop(columns=['Month_Num'])
+
+@instrumented()
+def add_lag_features():
+    script_dir = os.path.dirname(__file__)
+    dataset_dir = os.path.join(script_dir, "../DataSet")
+    main_csv_path = os.path.join(dataset_dir, "main.csv")
+
+    print("Loading main.csv...")
+    df = pd.read_csv(main_csv_path)
+    record_rows(rows_in=len(df))
+
+    df = transform_lag_features(df)
 
     print(f"Saving updated main.csv to {main_csv_path}...")
-    df.to_csv(main_csv_path, index=False)
+    write_dataset(df, csv_path=main_csv_path)
+    record_rows(rows_out=len(df))
     print("Success!")
 
     # Verification preview
@@ -1,17 +1,14 @@
 import pandas as pd
 import os
 
-def add_price_velocity():
-    script_dir = os.path.dirname(__file__)
-    dataset_dir = os.path.join(script_dir, "../DataSet")
-    main_csv_path = os.path.join(dataset_dir, "main.csv")
-
-    print("Loading main.csv...")
-    df = pd.read_csv(main_csv_path)
+from FeatureEngine import DERIVED, compute_features
+from Storage import write_dataset
 
+def transform_price_velocity(df):
+    """Returns df with Price_Velocity inserted after Prev_2_Month price."""
     print("Calculating Price Velocity...")
-    # Formula: Price_Velocity = Prev_Month price - Prev_2_Month price
-    df['Price_Velocity'] = df['Prev_Month price'] - df['Prev_2_Month price']
+    # Formula: Price_Velocity = Prev_Month price - Prev_2_Month price (DERIVED)
+    df = compute_features(df, derived=DERIVED)
 
     # Insert 'Price_Velocity' to the right of 'Prev_2_Month price'
     if 'Prev_2_Month price' in df.columns:
@@ -22,8 +19,20 @@ def add_price_velocity():
     else:
         print("Warning: 'Prev_2_Month price' column not found. Appending 'Price_Velocity' at the end.")
 
+    return df
+
+def add_price_velocity():
+    script_dir = os.path.dirname(__file__)
+    dataset_dir = os.path.join(script_dir, "../DataSet")
+    main_csv_path = os.path.join(dataset_dir, "main.csv")
+
+    print("Loading main.csv...")
+    df = pd.read_csv(main_csv_path)
+
+    df = transform_price_velocity(df)
+
     print(f"Saving updated main.csv to {main_csv_path}...")
-    df.to_csv(main_csv_path, index=False)
+    write_dataset(df, csv_path=main_csv_path)
     print("Success!")
 
     # Verification preview
@@ -1,13 +1,12 @@
 import pandas as pd
 import os
 
-def add_rainfall_lag():
-    script_dir = os.path.dirname(__file__)
-    dataset_dir = os.path.join(script_dir, "../DataSet")
-    main_csv_path = os.path.join(dataset_dir, "main.csv")
+from FeatureEngine import RAINFALL_LAG_SPEC, compute_features
+from Storage import write_dataset
 
-    print("Loading main.csv...")
-    df = pd.read_csv(main_csv_path)
+def transform_rainfall_lag(df):
+    """Returns df sorted by Market/Year/Month with the previous month's rainfall as Rainfall_Lag."""
+    df = df.copy()
 
     # Encode Month to ensure correct sorting
     month_map = {
@@ -16,12 +15,9 @@ def add_rainfall_lag():
     }
     df['Month_Num'] = df['Month'].map(month_map)
     
-    # Sort: Market, Year, Month
-    df = df.sort_values(by=['Market', 'Year', 'Month_Num']).reset_index(drop=True)
-
     print("Creating Rainfall Lag Feature...")
-    # Shift Rainfall_mm by 1 within each Market group
-    df['Rainfall_Lag'] = df.groupby('Market')['Rainfall_mm'].shift(1)
+    # Rainfall_mm of the previous month within each Market (sorted by Market, Year, Month)
+    df = compute_features(df, RAINFALL_LAG_SPEC)
 
     print(f"Missing values before filling: {df['Rainfall_Lag'].isnull().sum()}")
 
@@ -37,10 +33,20 @@ def add_rainfall_lag():
     print(f"Missing values after filling: {df['Rainfall_Lag'].isnull().sum()}")
 
     # Drop helper column
-    df = df.drop(columns=['Month_Num'])
+    return df.drop(columns=['Month_Num'])
+
+def add_rainfall_lag():
+    script_dir = os.path.dirname(__file__)
+    dataset_dir = os.path.join(script_dir, "../DataSet")
+    main_csv_path = os.path.join(dataset_dir, "main.csv")
+
+    print("Loading main.csv...")
+    df = pd.read_csv(main_csv_path)
+
+    df = transform_rainfall_lag(df)
 
     print(f"Saving updated main.csv to {main_csv_path}...")
-    df.to_csv(main_csv_path, index=False)
+    write_dataset(df, csv_path=main_csv_path)
     print("Success!")
 
     # Verification preview
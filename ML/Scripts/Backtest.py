@@ -0,0 +1,155 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from Storage import read_dataset
+from ImputeSeries import period_of
+from ForecastPrices import (
+    BACKENDS, FEATURES, TARGET, TRAINING_COLUMNS, MONTH_MAP,
+    prepare_data, resolve_params, build_model, fit_model, recursive_forecast
+)
+
+BACKTEST_DIR = os.path.join(os.path.dirname(__file__), "../Backtest")
+MONTH_NAMES = list(MONTH_MAP)
+
+
+def month_label(period):
+    return f"{MONTH_NAMES[period % 12]} {period // 12}"
+
+
+def origins(period, min_train_months=6):
+    """
+    Every base month with at least min_train_months of history (itself
+    included) and a later month to score the forecasts against.
+    """
+    months = np.unique(period)
+    return [int(m) for m in months[min_train_months - 1:-1]]
+
+
+# Backtest data, set once per worker process by _init_worker
+_DATA = {}
+
+
+def _init_worker(df, n_markets, backend, params):
+    _DATA.update(df=df, n_markets=n_markets, backend=backend, params=params)
+
+
+def _run_origin(task):
+    """
+    Worker: trains on every month up to the origin, forecasts the following
+    months recursively from each market's latest row and pairs the forecasts
+    with the actual prices.
+    """
+    origin, horizon = task
+    df = _DATA["df"]
+    start = time.perf_counter()
+    # df is sorted by period, so the training set is a prefix
+    train_end = int(np.searchsorted(df['period'].to_numpy(), origin, side='right'))
+    df_train = df.iloc[:train_end]
+
+    model = build_model(_DATA["backend"], n_markets=_DATA["n_markets"], params=_DATA["params"])
+    fit_model(model, df_train[FEATURES], df_train[TARGET])
+
+    df_base = df_train.groupby('Market', sort=False).tail(1)
+    target_periods = [origin + step for step in range(1, horizon + 1)]
+    future_months = [(MONTH_NAMES[p % 12], p % 12 + 1, p // 12) for p in target_periods]
+    predicted = recursive_forecast(model, df_base, future_months)
+
+    forecasts = pd.DataFrame({
+        "origin": origin,
+        "step": np.tile(np.arange(1, horizon + 1), len(df_base)),
+        "period": np.tile(target_periods, len(df_base)),
+        "Market": np.repeat(df_base['Market'].to_numpy(), horizon),
+        "predicted": predicted.ravel(),
+    })
+    actual = df.set_index(['Market', 'period'])[TARGET]
+    forecasts["actual"] = actual.reindex(pd.MultiIndex.from_frame(forecasts[["Market", "period"]])).to_numpy()
+    # Only months with a recorded (non-zero) price can be scored
+    forecasts = forecasts[forecasts["actual"] > 0]
+    return forecasts, {"origin": origin, "rows_train": train_end, "seconds": time.perf_counter() - start}
+
+
+def error_summary(forecasts, by):
+    """MAPE and RMSE of forecasts grouped by the columns in by."""
+    errors = forecasts.assign(
+        ape=(forecasts["actual"] - forecasts["predicted"]).abs() / forecasts["actual"].abs(),
+        se=(forecasts["actual"] - forecasts["predicted"]) ** 2
+    )
+    summary = errors.groupby(by, observed=True).agg(mape=("ape", "mean"), mse=("se", "mean"), n=("se", "size"))
+    summary["rmse"] = np.sqrt(summary.pop("mse"))
+    return summary[["mape", "rmse", "n"]].reset_index()
+
+
+def backtest(backend="gbr", horizon=3, min_train_months=6, max_year=None, workers=None,
+             state="Maharashtra", commodity="Wheat", output_dir=BACKTEST_DIR):
+    """
+    Rolling-origin backtest of the recursive forecaster: every base month
+    with enough history is an origin, forecast horizon months ahead by a
+    model trained only on data up to that month. Origins run across a
+    process pool.
+
+    Writes the forecasts paired with actual prices (one row per origin,
+    step and market) and their MAPE/RMSE by horizon step and market as
+    Parquet files to output_dir. Returns (forecasts, summary).
+    """
+    df = read_dataset(columns=TRAINING_COLUMNS, filters=[('State', '==', state), ('Commodity', '==', commodity)])
+    df, le_market = prepare_data(df)
+    if max_year is not None:
+        df = df[df['Year'] <= max_year]
+    df = df.dropna(subset=FEATURES + [TARGET])
+    df = df.assign(period=period_of(df['Year'], df['Month_Num']).astype(int))
+    # Period order makes every training set a prefix of the data
+    df = df.sort_values(['period', 'Market'], kind='stable').reset_index(drop=True)
+
+    base_months = origins(df['period'].to_numpy(), min_train_months)
+    if not base_months:
+        raise ValueError(f"Need more than {min_train_months} months of data")
+    print(f"{state}/{commodity} {backend}: {len(base_months)} origins "
+          f"({month_label(base_months[0])} - {month_label(base_months[-1])}), horizon {horizon}")
+    # Resolved once here rather than in every worker fit
+    params, params_source = resolve_params(backend, state=state, commodity=commodity)
+    print(f"Using {params_source} {backend} hyperparameters: {params}")
+
+    start = time.perf_counter()
+    # The data is sent once per worker, not with every origin
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(df, len(le_market.classes_), backend, params)) as pool:
+        results = list(pool.map(_run_origin, [(origin, horizon) for origin in base_months]))
+    print(f"Ran {len(base_months)} origins in {time.perf_counter() - start:.2f}s")
+
+    forecasts = pd.concat([f for f, _ in results], ignore_index=True)
+    forecasts = forecasts.sort_values(["origin", "step", "Market"], ignore_index=True)
+    forecasts["Market"] = forecasts["Market"].astype("category")
+    forecasts["origin"] = forecasts["origin"].astype(np.int32)
+    forecasts["period"] = forecasts["period"].astype(np.int32)
+    forecasts["step"] = forecasts["step"].astype(np.int8)
+    summary = error_summary(forecasts, ["step", "Market"])
+
+    print(f"\n{'Step':>4} {'MAPE':>8} {'RMSE':>9} {'Forecasts':>10}")
+    for _, row in error_summary(forecasts, ["step"]).iterrows():
+        print(f"{int(row['step']):4d} {row['mape']:8.4f} {row['rmse']:9.2f} {int(row['n']):10d}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    forecasts_path = os.path.join(output_dir, f"backtest_{backend}.parquet")
+    summary_path = os.path.join(output_dir, f"backtest_{backend}_summary.parquet")
+    for frame, path in [(forecasts, forecasts_path), (summary, summary_path)]:
+        tmp_path = path + ".tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    print(f"\nForecasts saved to: {forecasts_path}\nMAPE/RMSE by step and market saved to: {summary_path}")
+    return forecasts, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the recursive forecaster from every base month.")
+    parser.add_argument("--backend", choices=BACKENDS, default="gbr", help="Model backend (default: gbr)")
+    parser.add_argument("--horizon", type=int, default=3, help="Months forecast from each origin (default: 3, as in ForecastPrices)")
+    parser.add_argument("--min-train-months", type=int, default=6, help="Months of history before the first origin")
+    parser.add_argument("--max-year", type=int, default=None, help="Last year of data used (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+    backtest(backend=args.backend, horizon=args.horizon, min_train_months=args.min_train_months,
+             max_year=args.max_year, workers=args.workers)
@@ -0,0 +1,72 @@
+import argparse
+import time
+import numpy as np
+
+from Storage import read_dataset
+from ForecastPrices import (
+    BACKENDS, DEFAULT_PARAMS, FEATURES, TARGET, TRAINING_COLUMNS,
+    prepare_data, resolve_params, build_model, fit_model, validation_metrics
+)
+
+
+def benchmark_backends(backends=BACKENDS, repeats=3, state="Maharashtra", commodity="Wheat", tuned=False):
+    """
+    Fits every backend on the ForecastPrices split (train 2021, validate 2022)
+    and reports the median fit time over repeats with the validation metrics.
+    Every backend runs with its fixed DEFAULT_PARAMS baseline, or with its
+    parameters tuned for the segment in Model/tuned_params.json when
+    tuned=True (defaults if it was not tuned).
+    """
+    df = read_dataset(columns=TRAINING_COLUMNS, filters=[('State', '==', state), ('Commodity', '==', commodity)])
+    df, le_market = prepare_data(df)
+    df_clean = df[df['Year'] <= 2022].dropna(subset=FEATURES + [TARGET])
+
+    train_mask = df_clean['Year'] == 2021
+    val_mask = df_clean['Year'] == 2022
+    X_train, y_train = df_clean.loc[train_mask, FEATURES], df_clean.loc[train_mask, TARGET]
+    X_val, y_val = df_clean.loc[val_mask, FEATURES], df_clean.loc[val_mask, TARGET]
+    print(f"{state}/{commodity}: {len(X_train)} training rows, {len(X_val)} validation rows, {len(le_market.classes_)} markets\n")
+
+    results = []
+    for backend in backends:
+        if tuned:
+            params, source = resolve_params(backend, state=state, commodity=commodity)
+        else:
+            params, source = DEFAULT_PARAMS[backend], "default"
+        print(f"{backend}: {source} hyperparameters {params}")
+        fit_seconds = []
+        for _ in range(repeats):
+            model = build_model(backend, n_markets=len(le_market.classes_), params=params)
+            start = time.perf_counter()
+            fit_model(model, X_train, y_train, X_val, y_val)
+            fit_seconds.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        metrics = validation_metrics(model, X_val, y_val)
+        predict_seconds = time.perf_counter() - start
+
+        n_iter = getattr(model, "n_iter_", None) or model.n_estimators_
+        results.append({
+            "backend": backend,
+            "params_source": source,
+            "fit_seconds": float(np.median(fit_seconds)),
+            "predict_seconds": predict_seconds,
+            "iterations": int(n_iter),
+            **metrics
+        })
+
+    print(f"\n{'backend':<8} {'fit (s)':>8} {'predict (s)':>12} {'iters':>6} {'MAPE':>8} {'RMSE':>9} {'R^2':>8}")
+    for r in results:
+        print(f"{r['backend']:<8} {r['fit_seconds']:8.3f} {r['predict_seconds']:12.4f} {r['iterations']:6d} "
+              f"{r['mape']:8.4f} {r['rmse']:9.2f} {r['r2']:8.4f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare fit time and validation MAPE of the model backends.")
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="Backend(s) to benchmark (default: all)")
+    parser.add_argument("--repeats", type=int, default=3, help="Fits per backend; the median time is reported")
+    parser.add_argument("--tuned", action="store_true",
+                        help="Use the parameters from Model/tuned_params.json instead of the fixed defaults")
+    args = parser.parse_args()
+    benchmark_backends(backends=args.backend or BACKENDS, repeats=args.repeats, tuned=args.tuned)
@@ -0,0 +1,314 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+
+from Pipeline import STAGES, pipeline_context, resolve_stages
+from SyntheticData import write_raw_tree
+from ForecastPrices import (
+    BACKENDS, FEATURES, TARGET, TRAINING_COLUMNS, MONTH_MAP,
+    prepare_data, build_model, fit_model, recursive_forecast
+)
+from ModelRegistry import publish_model
+
+SCRIPT_DIR = os.path.dirname(__file__)
+BENCHMARK_DIR = os.path.join(SCRIPT_DIR, "../Benchmarks")
+APP_DIR = os.path.join(SCRIPT_DIR, "../../app")
+MONTH_NAMES = list(MONTH_MAP)
+
+# A metric is flagged when it is this much worse than the baseline
+DEFAULT_TOLERANCE = 0.25
+# Timings below this are too noisy to compare
+MIN_SECONDS = 0.005
+
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    """Silences the progress prints of the scripts being timed."""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def environment():
+    import pandas as pd
+    import sklearn
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def latency_summary(seconds):
+    seconds = np.asarray(seconds)
+    return {
+        "requests": len(seconds),
+        "per_second": float(len(seconds) / seconds.sum()),
+        "p50_ms": float(np.percentile(seconds, 50) * 1000),
+        "p95_ms": float(np.percentile(seconds, 95) * 1000),
+    }
+
+
+def bench_pipeline(dataset_dir, workers=None, verbose=False):
+    """Runs every stage up to save on the dataset under dataset_dir and times each one."""
+    ctx = pipeline_context(dataset_dir, workers, plots=False)
+    df = None
+    stages = []
+    for name in resolve_stages(["save"]):
+        rows_in = 0 if df is None else len(df)
+        start = time.perf_counter()
+        with quiet(not verbose):
+            df = STAGES[name][0](df, ctx)
+        stages.append({
+            "stage": name,
+            "seconds": time.perf_counter() - start,
+            "rows_in": rows_in,
+            "rows_out": 0 if df is None else len(df),
+        })
+    return df, stages
+
+
+def bench_training(df, backends=BACKENDS, repeats=3, horizon=3, verbose=False):
+    """
+    Fits every backend on the first State/Commodity segment (validated on its
+    latest year, like TrainSegments) and times the fit and a batched
+    recursive forecast of all markets. Returns (results, models), models
+    mapping each backend to (model, state, commodity, markets).
+    """
+    state, commodity = df['State'].astype(str).iloc[0], df['Commodity'].astype(str).iloc[0]
+    df = df[(df['State'] == state) & (df['Commodity'] == commodity)][TRAINING_COLUMNS]
+    df, le_market = prepare_data(df)
+    df = df.dropna(subset=FEATURES + [TARGET])
+    val_year = int(df['Year'].max())
+    train, val = df[df['Year'] < val_year], df[df['Year'] == val_year]
+
+    # Forecast from each market's latest training month, as ForecastPrices does
+    df_base = train.sort_values(['Year', 'Month_Num']).groupby('Market').tail(1)
+    future_months = [(MONTH_NAMES[(m - 1) % 12], (m - 1) % 12 + 1, val_year) for m in range(1, horizon + 1)]
+
+    results, models = [], {}
+    for backend in backends:
+        fit_seconds, forecast_seconds = [], []
+        for _ in range(repeats):
+            model = build_model(backend, n_markets=len(le_market.classes_))
+            start = time.perf_counter()
+            with quiet(not verbose):
+                fit_model(model, train[FEATURES], train[TARGET], val[FEATURES], val[TARGET])
+            fit_seconds.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            recursive_forecast(model, df_base, future_months)
+            forecast_seconds.append(time.perf_counter() - start)
+
+        models[backend] = (model, state, commodity, le_market.classes_.tolist())
+        results.append({
+            "backend": backend,
+            "commodity": commodity,
+            "rows_train": len(train),
+            "fit_seconds": float(np.median(fit_seconds)),
+            "forecast_markets": len(df_base),
+            "forecast_horizon": horizon,
+            "forecast_seconds": float(np.median(forecast_seconds)),
+        })
+    return results, models
+
+
+def bench_api(main_csv_path, model, state, commodity, markets, work_dir, n_requests=500, batch_size=50):
+    """
+    Serves model (of the state/commodity segment, trained on markets in
+    LabelEncoder order) through the FastAPI app in-process (TestClient) and
+    measures /predict latency on cache misses and hits and /predict/batch
+    throughput. Returns {"skipped": reason} when the API dependencies are
+    not installed.
+    """
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:
+        return {"skipped": str(e)}
+
+    # Without a registry the app serves the current published version, as
+    # the segment its manifest names
+    versions_dir = os.path.join(work_dir, "versions")
+    with quiet():
+        publish_model(model, {"state": state, "commodity": commodity, "markets": list(markets)}, versions_dir)
+
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    import main as api
+    from services.model_service import ModelService
+
+    api.model_service = ModelService(os.path.join(work_dir, "model.pkl"), main_csv_path,
+                                     os.path.join(work_dir, "registry.json"), versions_dir=versions_dir)
+    api.prediction_cache.clear()
+
+    rng = np.random.default_rng(0)
+    payloads = [{
+        "crop": commodity,
+        "state": state,
+        "market": str(markets[i % len(markets)]),
+        "temperature": float(rng.uniform(15, 40)),
+        "rainfall": float(rng.uniform(0, 300)),
+    } for i in range(n_requests)]
+
+    results = {}
+    with quiet(), TestClient(api.app) as client:
+        for name in ["predict_miss", "predict_hit"]:
+            seconds = []
+            for payload in payloads:
+                start = time.perf_counter()
+                response = client.post("/predict", json=payload)
+                seconds.append(time.perf_counter() - start)
+                response.raise_for_status()
+            results[name] = latency_summary(seconds)
+
+        api.prediction_cache.clear()
+        seconds = []
+        for i in range(0, n_requests, batch_size):
+            start = time.perf_counter()
+            response = client.post("/predict/batch", json=payloads[i:i + batch_size])
+            seconds.append(time.perf_counter() - start)
+            response.raise_for_status()
+        results["predict_batch"] = {**latency_summary(seconds), "batch_size": batch_size,
+                                    "records_per_second": float(n_requests / np.sum(seconds))}
+    return results
+
+
+def flatten_metrics(results):
+    """
+    The comparable metrics of a result file as {name: (value, higher_is_better)}:
+    every timing and throughput figure.
+    """
+    metrics = {}
+    for stage in results["pipeline"]:
+        metrics[f"pipeline.{stage['stage']}.seconds"] = (stage["seconds"], False)
+    for r in results["training"]:
+        metrics[f"training.{r['backend']}.fit_seconds"] = (r["fit_seconds"], False)
+        metrics[f"training.{r['backend']}.forecast_seconds"] = (r["forecast_seconds"], False)
+    for name, r in results.get("api", {}).items():
+        if isinstance(r, dict):
+            metrics[f"api.{name}.per_second"] = (r["per_second"], True)
+            metrics[f"api.{name}.p95_ms"] = (r["p95_ms"] / 1000, False)
+    return metrics
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares results with a baseline result file. Returns the regressions:
+    metrics more than tolerance worse than the baseline (timings under
+    MIN_SECONDS are ignored as noise).
+    """
+    if results["scale"] != baseline["scale"]:
+        print(f"Warning: baseline scale {baseline['scale']} differs from {results['scale']}")
+
+    current, previous = flatten_metrics(results), flatten_metrics(baseline)
+    regressions = []
+    print(f"\n{'Metric':<40} {'Baseline':>10} {'Current':>10} {'Change':>8}")
+    for name, (value, higher_is_better) in current.items():
+        if name not in previous:
+            continue
+        old = previous[name][0]
+        change = value / old - 1 if old else 0.0
+        worse = -change if higher_is_better else change
+        noise = not higher_is_better and max(value, old) < MIN_SECONDS
+        flag = ""
+        if worse > tolerance and not noise:
+            regressions.append({"metric": name, "baseline": old, "current": value, "change": change})
+            flag = "  REGRESSION"
+        print(f"{name:<40} {old:10.4f} {value:10.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def run_benchmarks(markets=200, months=36, commodities=1, backends=BACKENDS, repeats=3,
+                   n_requests=500, batch_size=50, workers=None, seed=42, api=True, verbose=False):
+    """
+    Benchmarks the whole system on a synthetic dataset of the given scale
+    (see SyntheticData.write_raw_tree), in a temporary directory so nothing
+    under ML/ is touched:
+    - every pipeline stage from raw files to the saved dataset,
+    - model fitting and the batched recursive forecast per backend,
+    - /predict and /predict/batch through the FastAPI app.
+    Returns the results dict (as written to the JSON file).
+    """
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "scale": {"markets": markets, "months": months, "commodities": commodities, "seed": seed},
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        dataset_dir = os.path.join(work_dir, "DataSet")
+        start = time.perf_counter()
+        n_files = write_raw_tree(dataset_dir, markets=markets, months=months, commodities=commodities, seed=seed)
+        print(f"Synthetic dataset: {n_files} raw files in {time.perf_counter() - start:.2f}s")
+
+        df, results["pipeline"] = bench_pipeline(dataset_dir, workers, verbose)
+        results["scale"]["rows"] = len(df)
+        for stage in results["pipeline"]:
+            print(f"  {stage['seconds']:7.3f}s  {stage['stage']:<18} {stage['rows_in']:>8} -> {stage['rows_out']:<8} rows")
+
+        results["training"], models = bench_training(df, backends, repeats, verbose=verbose)
+        for r in results["training"]:
+            print(f"  {r['fit_seconds']:7.3f}s  fit {r['backend']} ({r['rows_train']} rows), "
+                  f"{r['forecast_seconds']:.3f}s  forecast {r['forecast_markets']} markets x {r['forecast_horizon']} months")
+
+        if api:
+            model, state, commodity, segment_markets = models[backends[0]]
+            results["api"] = bench_api(os.path.join(dataset_dir, "main.csv"), model, state, commodity,
+                                       segment_markets, work_dir, n_requests, batch_size)
+            for name, r in results["api"].items():
+                if isinstance(r, dict):
+                    print(f"  {r['per_second']:9.1f} req/s  p50 {r['p50_ms']:6.2f}ms  p95 {r['p95_ms']:6.2f}ms  {name}")
+                else:
+                    print(f"  API benchmark skipped: {r}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline, training, forecasting and API on synthetic data.")
+    parser.add_argument("--markets", type=int, default=200)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--commodities", type=int, default=1)
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="Backend(s) to benchmark (default: all)")
+    parser.add_argument("--repeats", type=int, default=3, help="Fits/forecasts per backend (the median is reported)")
+    parser.add_argument("--requests", type=int, default=500, help="API requests per measurement")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for raw file ingestion")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-api", action="store_true", help="Skip the API benchmark")
+    parser.add_argument("--output", default=None, help="Result file (default: Benchmarks/benchmark_<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier result file to compare with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative slowdown flagged as a regression (default: 0.25)")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the benchmarked scripts")
+    args = parser.parse_args()
+
+    results = run_benchmarks(markets=args.markets, months=args.months, commodities=args.commodities,
+                             backends=args.backend or BACKENDS, repeats=args.repeats, n_requests=args.requests,
+                             batch_size=args.batch_size, workers=args.workers, seed=args.seed,
+                             api=not args.no_api, verbose=args.verbose)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            results["regressions"] = compare(results, json.load(f), args.tolerance)
+
+    output = args.output or os.path.join(BENCHMARK_DIR, f"benchmark_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {output}")
+
+    if results.get("regressions"):
+        print(f"{len(results['regressions'])} regression(s) against {args.baseline}")
+        sys.exit(1)
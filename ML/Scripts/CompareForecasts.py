@@ -4,6 +4,10 @@ import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from Storage import read_dataset
+from Instrumentation import instrumented, record_rows
+
+@instrumented()
 def compare_forecasts():
     script_dir = os.path.dirname(__file__)
     dataset_dir = os.path.join(script_dir, "../DataSet")
@@ -13,7 +17,11 @@ def compare_forecasts():
     
     # 1. Load Actual Data (2022 Jan-Mar)
     try:
-        df_main = pd.read_csv(main_csv_path)
+        # Only the 2022 partition and the columns compared below
+        df_main = read_dataset(
+            columns=['Year', 'Month', 'Market', 'Current_Month price'],
+            filters=[('Year', '==', 2022)]
+        )
     except FileNotFoundError:
         print("Error: main.csv not found.")
         return
@@ -34,6 +42,7 @@ def compare_forecasts():
 
     # Select relevant columns
     df_actual = df_actual[['Market', 'Month', 'Current_Month price']]
+    record_rows(rows_in=len(df_actual))
     df_actual.rename(columns={'Current_Month price': 'Actual_Price'}, inplace=True)
     
     # 2. Load Predicted Data from JSON
@@ -61,6 +70,7 @@ def compare_forecasts():
     
     # 3. Merge Data
     df_comparison = pd.merge(df_actual, df_pred, on=['Market', 'Month'], how='inner')
+    record_rows(rows_out=len(df_comparison))
     
     # Save to CSV
     output_csv_path = os.path.join(output_dir, "prediction.csv")
@@ -0,0 +1,69 @@
+import os
+
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+MONTH_MAP = {month: i + 1 for i, month in enumerate(MONTHS)}
+
+# Misspelled month directory names found in the raw data
+MONTH_ALIASES = {
+    'Febraury': 'February',
+    'Septemeber': 'September',
+    'Novemeber': 'November'
+}
+
+# Raw file names seen per month directory, in order of preference
+PRICE_FILES = ["prices.csv", "price.csv"]
+ARRIVAL_FILES = ["arrivals.csv", "arrival.csv"]
+
+
+def normalize_month(name):
+    """Strips and fixes a month name, e.g. 'Febraury ' -> 'February'. Returns None if unknown."""
+    name = name.strip()
+    name = MONTH_ALIASES.get(name, name)
+    return name if name in MONTH_MAP else None
+
+
+def _subdirs(path):
+    with os.scandir(path) as entries:
+        return sorted((e.name, e.path) for e in entries if e.is_dir())
+
+
+def discover_partitions(dataset_dir):
+    """
+    Scans dataset_dir once for every {State}/{Commodity}/{Year}/{Month} directory.
+
+    Returns a list of dicts (sorted by state, commodity, year, month) with the
+    normalized month name and number, the directory, and the raw prices and
+    arrivals file paths (None when missing).
+    """
+    partitions = []
+    for state, state_dir in _subdirs(dataset_dir):
+        for commodity, commodity_dir in _subdirs(state_dir):
+            # Skip placeholder folders and non-commodity folders (External Factors has no year dirs)
+            if commodity.lower().startswith("commodity"):
+                continue
+            for year, year_dir in _subdirs(commodity_dir):
+                if not year.isdigit():
+                    continue
+                for month_dir_name, month_dir in _subdirs(year_dir):
+                    month = normalize_month(month_dir_name)
+                    if month is None:
+                        print(f"Skipping unknown month directory: {month_dir}")
+                        continue
+                    with os.scandir(month_dir) as entries:
+                        files = {e.name for e in entries if e.is_file()}
+                    partitions.append({
+                        "state": state,
+                        "commodity": commodity,
+                        "year": int(year),
+                        "month": month,
+                        "month_num": MONTH_MAP[month],
+                        "dir": month_dir,
+                        "prices": next((os.path.join(month_dir, f) for f in PRICE_FILES if f in files), None),
+                        "arrivals": next((os.path.join(month_dir, f) for f in ARRIVAL_FILES if f in files), None)
+                    })
+
+    partitions.sort(key=lambda p: (p["state"], p["commodity"], p["year"], p["month_num"]))
+    return partitions
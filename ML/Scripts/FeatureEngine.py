@@ -0,0 +1,187 @@
+import pandas as pd
+import numpy as np
+
+# --- Feature specs ---
+# A spec maps a source column to the features derived from it:
+#   "lags":       [k, ...]                value k rows (months) earlier
+#   "rolling":    {"mean"|"std"|"min"|"max": [w, ...]}
+#                                         statistic over the w months up to and including the row
+#   "diffs":      [k, ...]                value minus the value k months earlier
+#   "pct_changes": [k, ...]               relative change over k months
+#   "names":      {"lag1": "...", ...}    optional output names; the defaults are
+#                                         "<column>_lag1", "<column>_roll3_mean",
+#                                         "<column>_diff1", "<column>_pct1"
+# Every feature is computed within a series (one market of one State/Commodity);
+# months before a series' first row (or windows reaching past it) give NaN.
+# Derived features ({name: (a, b)} -> a - b) are row-local and computed after.
+
+# Lag features of main.csv. Prev_Month price/arrivals come from the raw files
+# (as reported for the previous month), so lag 1 of them is the value 2 months back.
+LAG_SPEC = {
+    'Prev_Month price': {"lags": [1], "names": {"lag1": 'Prev_2_Month price'}},
+    'Prev_Month arrivals': {"lags": [1], "names": {"lag1": 'Prev_2_Month arrivals'}},
+}
+RAINFALL_LAG_SPEC = {
+    'Rainfall_mm': {"lags": [1], "names": {"lag1": 'Rainfall_Lag'}},
+}
+DERIVED = {
+    'Price_Velocity': ('Prev_Month price', 'Prev_2_Month price'),
+}
+
+# The same features for a month that has not been observed yet: its
+# "previous month" values are the latest observed current values
+NEXT_MONTH_SPEC = {
+    'Current_Month price': {"lags": [1], "names": {"lag1": 'Prev_Month price'}},
+    'Current_Month arrivals': {"lags": [1], "names": {"lag1": 'Prev_Month arrivals'}},
+    **LAG_SPEC,
+    **RAINFALL_LAG_SPEC,
+}
+# Held at their latest known values for the next month (naive assumption,
+# see Documentation.md)
+CARRIED_COLUMNS = [
+    'Current_Month arrivals', 'Rainfall_mm', 'Diesel_Price_Rs_per_Litre',
+    'Irrigation_Water_Usage_MCM', 'msp', 'Temperature'
+]
+
+ROLLING_STATS = ["mean", "std", "min", "max"]
+
+# Columns identifying one market's time series: features never look across
+# them. Frames of a single segment may leave out State/Commodity.
+SERIES_KEYS = ('State', 'Commodity', 'Market')
+
+
+def expand_spec(spec):
+    """Flattens a spec into (output name, column, op, param) tuples."""
+    features = []
+    for column, ops in spec.items():
+        names = ops.get("names", {})
+        items = [("lag", k, f"lag{k}") for k in ops.get("lags", [])]
+        for stat, windows in ops.get("rolling", {}).items():
+            if stat not in ROLLING_STATS:
+                raise ValueError(f"Unknown rolling statistic: {stat} (expected one of {ROLLING_STATS})")
+            items += [(stat, w, f"roll{w}_{stat}") for w in windows]
+        items += [("diff", k, f"diff{k}") for k in ops.get("diffs", [])]
+        items += [("pct_change", k, f"pct{k}") for k in ops.get("pct_changes", [])]
+        for op, param, token in items:
+            features.append((names.get(token, f"{column}_{token}"), column, op, param))
+    return features
+
+
+def lookback(spec):
+    """Number of rows per market the features of the next row depend on."""
+    depths = [param if op in ("lag", "diff", "pct_change") else param - 1 for _, _, op, param in expand_spec(spec)]
+    return max(depths, default=0)
+
+
+def _shift(values, group_start, k):
+    """values k rows earlier within the same market (NaN before the market's first row)."""
+    if k == 0:
+        return values
+    out = np.full(len(values), np.nan)
+    positions = np.arange(k, len(values))
+    valid = positions - k >= group_start[positions]
+    out[positions[valid]] = values[positions[valid] - k]
+    return out
+
+
+def series_keys(df, by=SERIES_KEYS):
+    """The columns of by present in df: what identifies one market's time series."""
+    if isinstance(by, str):
+        by = [by]
+    keys = [key for key in by if key in df.columns]
+    if not keys:
+        raise ValueError(f"None of the series key columns {list(by)} are in the frame")
+    return keys
+
+
+def sort_by_market(df, by=SERIES_KEYS, order=('Year', 'Month_Num')):
+    """Sorts df by series (see series_keys) and time unless it already is (then it is returned as is)."""
+    keys = series_keys(df, by) + list(order)
+    if pd.MultiIndex.from_frame(df[keys]).is_monotonic_increasing:
+        return df
+    return df.sort_values(by=keys, kind='stable').reset_index(drop=True)
+
+
+def compute_features(df, spec=None, derived=None, by=SERIES_KEYS, order=('Year', 'Month_Num')):
+    """
+    Adds the features of spec and derived to df in one sort and one grouping
+    pass. df is sorted by series and time (see sort_by_market); all time
+    features are array shifts within each series' block of rows. A series
+    is one market of one State/Commodity (the columns of by that df has),
+    so markets of the same name in other segments never share lags.
+    Returns the sorted DataFrame with the feature columns added.
+    """
+    features = expand_spec(spec or {})
+    if features:
+        df = sort_by_market(df, by, order)
+    df = df.copy()
+    if features:
+        # One grouping pass: the first row of every series' block
+        new_block = np.zeros(len(df), dtype=bool)
+        new_block[:1] = True
+        for key in series_keys(df, by):
+            values = df[key].to_numpy()
+            new_block[1:] |= values[1:] != values[:-1]
+        group_start = np.maximum.accumulate(np.where(new_block, np.arange(len(df)), 0))
+
+        columns = {column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+                   for column in {column for _, column, _, _ in features}}
+        shifted = {}
+
+        def lagged(column, k):
+            if (column, k) not in shifted:
+                shifted[(column, k)] = _shift(columns[column], group_start, k)
+            return shifted[(column, k)]
+
+        outputs = {}
+        for name, column, op, param in features:
+            if op == "lag":
+                outputs[name] = lagged(column, param)
+            elif op == "diff":
+                outputs[name] = columns[column] - lagged(column, param)
+            elif op == "pct_change":
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    outputs[name] = columns[column] / lagged(column, param) - 1
+            else:
+                window = np.column_stack([lagged(column, j) for j in range(param)])
+                if op == "mean":
+                    outputs[name] = window.mean(axis=1)
+                elif op == "std":
+                    outputs[name] = window.std(axis=1, ddof=1) if param > 1 else np.full(len(df), np.nan)
+                elif op == "min":
+                    outputs[name] = window.min(axis=1)
+                else:
+                    outputs[name] = window.max(axis=1)
+        for name, values in outputs.items():
+            df[name] = values
+
+    for name, (a, b) in (derived or {}).items():
+        df[name] = df[a] - df[b]
+    return df
+
+
+def next_month_features(history, spec=NEXT_MONTH_SPEC, carry=CARRIED_COLUMNS, derived=DERIVED,
+                        by=SERIES_KEYS, order=('Year', 'Month_Num')):
+    """
+    Builds the feature rows for the month after each series' latest row in
+    history, with the same code as the training features: a row per series
+    is appended (carry columns hold their latest value, everything else is
+    unknown) and compute_features fills in its lags.
+
+    Returns one row per series (market of a State/Commodity, see
+    series_keys), in the order in which the series' latest rows appear in
+    history, with Year/Month_Num set to the next month.
+    """
+    keys = series_keys(history, by)
+    history = sort_by_market(history.assign(_position=np.arange(len(history))), keys, order)
+    by_series = history.groupby(keys, sort=False, observed=True)
+    latest = by_series.tail(1)
+    recent = by_series.tail(max(lookback(spec), 1)).assign(_next=False)
+
+    nxt = latest[keys + list(carry) + ['_position']].assign(_next=True)
+    nxt[order[1]] = latest[order[1]].to_numpy() % 12 + 1
+    nxt[order[0]] = latest[order[0]].to_numpy() + (nxt[order[1]].to_numpy() == 1)
+
+    frame = compute_features(pd.concat([recent, nxt], ignore_index=True), spec, derived, keys, order)
+    rows = frame[frame['_next'].to_numpy(dtype=bool)].sort_values('_position')
+    return rows.drop(columns=['_position', '_next']).reset_index(drop=True)
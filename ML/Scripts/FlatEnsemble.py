@@ -0,0 +1,237 @@
+import argparse
+import os
+import time
+import warnings
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(__file__)
+MODEL_PATH = os.path.join(SCRIPT_DIR, "../Model/wheat_price_model.pkl")
+
+# Arrays of a flattened ensemble, as saved by FlatEnsemble.save
+ARRAY_NAMES = ["feature", "threshold", "left", "value", "roots"]
+
+
+def flat_path(model_path):
+    """Where the flattened arrays of the model at model_path are exported."""
+    return os.path.splitext(model_path)[0] + ".flat.npz"
+
+
+def _breadth_first(tree):
+    """Node ids of a sklearn tree in breadth-first order, children of a node next to each other."""
+    order = [0]
+    for node in order:
+        if tree.children_left[node] >= 0:
+            order += [tree.children_left[node], tree.children_right[node]]
+    return np.array(order)
+
+
+class FlatEnsemble:
+    """
+    A fitted GradientBoostingRegressor as contiguous NumPy arrays.
+
+    The nodes of all trees are concatenated in breadth-first order per tree,
+    so the right child of a node is always next to its left child: per node
+    the split feature and threshold, the left child's global index and the
+    leaf value (already scaled by the learning rate), plus the root of every
+    tree. Leaves point to themselves and never go right, so all trees are
+    walked together, one vectorized step per depth level, for any number of
+    rows: no Python work per tree.
+
+    Predictions follow sklearn exactly: the features are cast to float32 and
+    compared with `<=` against the float64 thresholds, and the tree outputs
+    are added to the initial prediction one tree at a time, in order.
+    """
+
+    def __init__(self, feature, threshold, left, value, roots, init, depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value
+        self.roots = roots
+        self.init = float(init)
+        self.depth = int(depth)
+        self.n_features_in_ = int(n_features)
+
+    @classmethod
+    def from_model(cls, model):
+        """Flattens a fitted GradientBoostingRegressor (raises ValueError for other models)."""
+        if type(model).__name__ != "GradientBoostingRegressor":
+            raise ValueError(f"Cannot flatten {type(model).__name__}, only GradientBoostingRegressor")
+
+        feature, threshold, left, value, roots = [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_[:, 0]:
+            tree = estimator.tree_
+            order = _breadth_first(tree)
+            position = np.empty_like(order)
+            position[order] = np.arange(len(order))
+
+            is_leaf = tree.children_left[order] < 0
+            feature.append(np.where(is_leaf, 0, tree.feature[order]))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+            children = position[np.where(is_leaf, 0, tree.children_left[order])]
+            left.append(np.where(is_leaf, np.arange(len(order)), children) + offset)
+            value.append(model.learning_rate * tree.value[order, 0, 0])
+            roots.append(offset)
+            offset += len(order)
+
+        n_features = model.n_features_in_
+        if model.init_ == "zero":
+            init = 0.0
+        else:
+            # Constant for the regression losses (the training target's mean/median/quantile)
+            init = model.init_.predict(np.zeros((1, n_features)))[0]
+
+        return cls(
+            feature=np.concatenate(feature).astype(np.intp),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            left=np.concatenate(left).astype(np.intp),
+            value=np.concatenate(value).astype(np.float64),
+            roots=np.array(roots, dtype=np.intp),
+            init=init,
+            depth=max(estimator.tree_.max_depth for estimator in model.estimators_[:, 0]),
+            n_features=n_features,
+        )
+
+    def predict(self, X):
+        """Predicts a 2-D array (or DataFrame) of rows with the model's feature columns."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected rows of {self.n_features_in_} features, got shape {X.shape}")
+
+        # Nodes are (tree, row); values index the flattened rows
+        values = X.ravel()
+        row_start = (np.arange(len(X)) * self.n_features_in_)[None, :]
+        node = np.repeat(self.roots[:, None], len(X), axis=1)
+        for _ in range(self.depth):
+            node = self.left[node] + (values[row_start + self.feature[node]] > self.threshold[node])
+
+        # Same order of additions as sklearn: init, then each tree's scaled output
+        steps = np.empty((len(self.roots) + 1, len(X)))
+        steps[0] = self.init
+        steps[1:] = self.value[node]
+        return np.cumsum(steps, axis=0)[-1]
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    def meta(self):
+        return {"init": self.init, "depth": self.depth, "n_features": self.n_features_in_}
+
+    def save(self, path):
+        """Writes the arrays and scalars to an uncompressed .npz (atomically)."""
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **self.arrays(), **{k: np.array(v) for k, v in self.meta().items()})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in ARRAY_NAMES},
+                       init=data["init"], depth=data["depth"], n_features=data["n_features"])
+
+
+def export_flat(model, model_path):
+    """
+    Saves the flattened model next to its pickle at model_path (see flat_path).
+    Returns the path written, or None for models that cannot be flattened.
+    """
+    try:
+        flat = FlatEnsemble.from_model(model)
+    except ValueError:
+        return None
+    path = flat_path(model_path)
+    flat.save(path)
+    return path
+
+
+def is_published(model_path):
+    """True for a model of a published version (ModelRegistry.py), whose directory is never modified."""
+    from ModelRegistry import MANIFEST_FILE
+    return os.path.exists(os.path.join(os.path.dirname(model_path), MANIFEST_FILE))
+
+
+def export_model(model_path=MODEL_PATH):
+    """
+    Flattens the pickled model at model_path and saves it next to it. A
+    published version is left as is: its flattened copy was written when it
+    was published (publish_model), and the path of that copy is returned
+    (None for models that cannot be flattened).
+    """
+    if is_published(model_path):
+        path = flat_path(model_path)
+        if not os.path.exists(path):
+            print(f"Published model {model_path} has no flattened copy")
+            return None
+        print(f"Published model, flattened at publish time: {path}")
+        return path
+
+    import joblib
+    model = joblib.load(model_path)
+    path = export_flat(model, model_path)
+    if path is None:
+        print(f"Cannot flatten {type(model).__name__}, only GradientBoostingRegressor")
+        return None
+    print(f"Flattened {len(model.estimators_)} trees to: {path}")
+    return path
+
+
+def benchmark(model_path=MODEL_PATH, repeats=200, batch_size=500, seed=0):
+    """
+    Compares FlatEnsemble with sklearn on rows sampled from main.csv: checks
+    the predictions match and reports the median latency of single-row and
+    batch predictions.
+    """
+    import joblib
+    import pandas as pd
+    from Storage import read_dataset
+    from ForecastPrices import FEATURES, TARGET, TRAINING_COLUMNS, prepare_data
+
+    model = joblib.load(model_path)
+    flat = FlatEnsemble.from_model(model)
+
+    df = read_dataset(columns=TRAINING_COLUMNS, filters=[('State', '==', 'Maharashtra'), ('Commodity', '==', 'Wheat')])
+    df, _ = prepare_data(df)
+    X = df.dropna(subset=FEATURES + [TARGET])[FEATURES].to_numpy(dtype=float)
+    rng = np.random.default_rng(seed)
+    batch = X[rng.integers(0, len(X), batch_size)]
+
+    expected = model.predict(pd.DataFrame(X, columns=FEATURES))
+    diff = np.abs(flat.predict(X) - expected).max()
+    print(f"{len(X)} rows: max |flat - sklearn| = {diff:.3g}")
+
+    def median_seconds(fn):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return float(np.median(times))
+
+    row = batch[:1]
+    # sklearn warns on every call with an array of a model fitted on a DataFrame
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    results = {
+        "sklearn, 1 row (DataFrame)": median_seconds(lambda: model.predict(pd.DataFrame(row, columns=FEATURES))),
+        "sklearn, 1 row (array)": median_seconds(lambda: model.predict(row)),
+        "flat, 1 row": median_seconds(lambda: flat.predict(row)),
+        f"sklearn, {batch_size} rows (array)": median_seconds(lambda: model.predict(batch)),
+        f"flat, {batch_size} rows": median_seconds(lambda: flat.predict(batch)),
+    }
+    print(f"\n{'Median latency':<32} {'ms':>9}")
+    for name, seconds in results.items():
+        print(f"{name:<32} {seconds * 1000:9.4f}")
+    return {"max_abs_diff": float(diff), "seconds": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flatten the trained GBR ensemble into NumPy arrays and benchmark it.")
+    parser.add_argument("--model", default=None,
+                        help="Pickled model (default: the current published version, else Model/wheat_price_model.pkl)")
+    parser.add_argument("--benchmark", action="store_true", help="Compare latency and predictions with sklearn")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+    from ModelRegistry import current_model_path
+    model_path = args.model or current_model_path(default=MODEL_PATH)
+    if export_model(model_path) and args.benchmark:
+        benchmark(model_path, repeats=args.repeats)
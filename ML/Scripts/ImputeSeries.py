@@ -0,0 +1,138 @@
+import time
+import pandas as pd
+import numpy as np
+from sklearn.experimental import enable_iterative_imputer
+from sklearn.impute import IterativeImputer
+
+# Value columns of a raw prices/arrivals file, by position as names vary:
+# 1: Current Month, 2: Previous Month, 3: Same Month Previous Year
+VALUE_COLUMNS = [1, 2, 3]
+# How many months before the file's month each value column refers to
+LAGS = [0, 1, 12]
+
+
+def period_of(year, month_num):
+    """Months since year 0, so consecutive months are consecutive integers."""
+    return year * 12 + month_num - 1
+
+
+def read_raw(file_path):
+    """Reads a raw prices/arrivals CSV (title row skipped) with numeric value columns."""
+    df = pd.read_csv(file_path, header=1)
+    # Convert columns to numeric, coercing errors to NaN (handles '-')
+    for col in df.columns[VALUE_COLUMNS]:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def impute_cross_section(df, feature_cols):
+    """
+    The per-file model: IterativeImputer over one month's value columns.
+    Returns the imputed columns (observed values are kept as they are).
+    """
+    imputer = IterativeImputer(max_iter=10, random_state=42)
+    return pd.DataFrame(imputer.fit_transform(df[feature_cols]), columns=feature_cols, index=df.index)
+
+
+def build_series(frames):
+    """
+    Builds the markets x months matrix of observed values from the raw files
+    of one State/Commodity/kind. frames is a list of (period, df).
+
+    Every file reports a market's value for its own month, the month before
+    and the same month a year before, so most months are reported by up to
+    three files; the file of the month itself wins.
+    """
+    parts = []
+    for period, df in frames:
+        markets = df[df.columns[0]].to_numpy()
+        for rank, (col, lag) in enumerate(zip(df.columns[VALUE_COLUMNS], LAGS)):
+            parts.append(pd.DataFrame({
+                "market": markets, "period": period - lag, "rank": rank, "value": df[col].to_numpy()
+            }))
+    long = pd.concat(parts, ignore_index=True)
+    all_markets = np.unique(long["market"].dropna().astype(str))
+    long = long.dropna(subset=["market", "value"])
+    long = long.sort_values("rank", kind="stable").drop_duplicates(["market", "period"])
+
+    periods = [period for period, _ in frames]
+    wide = long.pivot(index="market", columns="period", values="value")
+    return wide.reindex(index=all_markets, columns=range(min(periods) - max(LAGS), max(periods) + 1))
+
+
+# How each value of a filled series was obtained (see fill_series)
+FILL_METHODS = ["observed", "interpolated", "seasonal", "carried"]
+
+
+def fill_series(wide):
+    """
+    Fills the gaps of every market's series in one vectorized pass:
+    1. gaps between two known months are interpolated linearly in time,
+    2. months before the first / after the last known month take the value
+       of the same calendar month in the nearest year (seasonal carry-forward,
+       then backward),
+    3. what is left takes the nearest known month.
+    Markets without any observation stay empty. Returns (filled, method)
+    where method holds the FILL_METHODS index of every value (-1 if empty).
+    """
+    method = np.where(wide.notna().to_numpy(), 0, -1)
+
+    filled = wide.interpolate(axis=1, limit_area='inside')
+    method[(method < 0) & filled.notna().to_numpy()] = 1
+
+    by_calendar_month = filled.T.groupby(filled.columns.to_numpy() % 12)
+    filled = filled.fillna(by_calendar_month.ffill().T).fillna(by_calendar_month.bfill().T)
+    method[(method < 0) & filled.notna().to_numpy()] = 2
+
+    filled = filled.ffill(axis=1).bfill(axis=1)
+    method[(method < 0) & filled.notna().to_numpy()] = 3
+    return filled, method
+
+
+def impute_files(files, file_seconds=None):
+    """
+    Imputes all raw files of one State/Commodity/kind together and writes
+    their processed outputs. files is a list of (period, input_path,
+    output_path).
+
+    Missing values are read from each market's filled series; only markets
+    with no history at all fall back to the per-file cross-sectional model.
+    Returns counts of the values filled by each method. If file_seconds is a
+    dict, the time spent on each file (reading it, filling its gaps and
+    writing its output) is stored under its input path; building and
+    filling the shared series is not part of any file's time.
+    """
+    if file_seconds is None:
+        file_seconds = {}
+    frames = []
+    for period, file_path, _ in files:
+        start = time.perf_counter()
+        frames.append((period, read_raw(file_path)))
+        file_seconds[file_path] = time.perf_counter() - start
+    filled, method = fill_series(build_series(frames))
+    values = filled.to_numpy()
+    market_row = pd.Series(np.arange(len(filled.index)), index=filled.index)
+    first_period = filled.columns[0]
+
+    counts = dict.fromkeys(FILL_METHODS[1:] + ["cross_section"], 0)
+    for (period, df), (_, file_path, output_path) in zip(frames, files):
+        start = time.perf_counter()
+        feature_cols = df.columns[VALUE_COLUMNS]
+        rows = df[df.columns[0]].astype(str).map(market_row).to_numpy()
+        for col, lag in zip(feature_cols, LAGS):
+            missing = df[col].isnull().to_numpy() & ~np.isnan(rows)
+            if missing.any():
+                cells = (rows[missing].astype(int), period - lag - first_period)
+                df.loc[missing, col] = values[cells]
+                for m, n in zip(*np.unique(method[cells], return_counts=True)):
+                    if m > 0:
+                        counts[FILL_METHODS[m]] += int(n)
+
+        no_history = df[feature_cols].isnull().any(axis=1)
+        if no_history.any():
+            counts["cross_section"] += int(df.loc[no_history, feature_cols].isnull().values.sum())
+            df.loc[no_history, feature_cols] = impute_cross_section(df, feature_cols).loc[no_history]
+
+        df.to_csv(output_path, index=False)
+        file_seconds[file_path] += time.perf_counter() - start
+    return counts
@@ -0,0 +1,259 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+from sklearn.experimental import enable_iterative_imputer
+from sklearn.impute import IterativeImputer
+
+from DataSetIndex import discover_partitions, MONTH_MAP
+from IngestRaw import ingest_raw
+from Merge import load_partition
+from AddExternalFactors import transform_factors
+from ReorderColumns import transform_reorder_columns
+from FeatureEngine import LAG_SPEC, RAINFALL_LAG_SPEC, DERIVED, SERIES_KEYS, compute_features
+from Pipeline import FACTOR_STATE, run_pipeline
+from Storage import read_dataset, write_dataset
+
+MANIFEST_NAME = "build_manifest.json"
+
+# Inputs that feed every row of main.csv; a change to any of them forces a full rebuild
+EXTERNAL_FILES = ["Rainfall.csv", "Diesel.csv", "Irrigation.csv", "APY.csv", "Temprature.csv", "msp.pdf"]
+
+# A market's time series: lags are recomputed per State/Commodity/Market
+SERIES_COLS = list(SERIES_KEYS)
+
+# Same predictors AddLagFeatures uses for its IterativeImputer
+LAG_IMPUTE_COLS = [
+    'Year', 'Month_Num',
+    'Current_Month price', 'Prev_Month price', 'Prev_2_Month price',
+    'Current_Month arrivals', 'Prev_Month arrivals', 'Prev_2_Month arrivals',
+    'Rainfall_mm', 'Diesel_Price_Rs_per_Litre', 'Irrigation_Water_Usage_MCM',
+    'Area', 'Production', 'Yield', 'msp', 'Temperature'
+]
+
+
+def file_fingerprint(path, previous=None):
+    """
+    Returns {size, mtime_ns, sha256} for path. The content hash is reused from
+    previous when size and mtime are unchanged, so untouched files are not re-read.
+    """
+    stat = os.stat(path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+def partition_key(partition):
+    return f"{partition['state']}/{partition['commodity']}/{partition['year']}/{partition['month']}"
+
+
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return {"partitions": {}, "external": {}}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, manifest_path):
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def full_rebuild(dataset_dir):
+    """Runs the whole feature chain over main.csv (raw files are already processed)."""
+    return run_pipeline(skip=("ingest",), dataset_dir=dataset_dir) is not None
+
+
+def recompute_lag_rows(df, dirty):
+    """
+    Recomputes the lag-dependent columns (Prev_2_Month price/arrivals,
+    Rainfall_Lag, Price_Velocity) for the rows selected by the boolean mask
+    dirty, with the FeatureEngine specs of AddLagFeatures, AddRainfallLag and
+    AddPriceVelocity over the rows of the affected series (markets of a
+    State/Commodity). df must be sorted by State, Commodity, Market, Year, Month_Num.
+    """
+    series = pd.MultiIndex.from_frame(df[SERIES_COLS])
+    in_markets = series.isin(series[dirty.to_numpy()].unique())
+    # Already sorted, so compute_features keeps the index of the rows
+    lags = compute_features(df[in_markets], {**LAG_SPEC, **RAINFALL_LAG_SPEC})
+    lag_cols = ['Prev_2_Month price', 'Prev_2_Month arrivals']
+    for col in lag_cols + ['Rainfall_Lag']:
+        df.loc[dirty, col] = lags.loc[dirty[in_markets], col]
+
+    # Gaps (first month of a market) are imputed as in AddLagFeatures. The
+    # imputer is only fit when a recomputed row actually needs it.
+    needs_imputation = dirty & df[lag_cols].isnull().any(axis=1)
+    if needs_imputation.any():
+        print(f"Imputing {int(needs_imputation.sum())} missing lag rows (IterativeImputer)...")
+        numeric = df[LAG_IMPUTE_COLS].apply(pd.to_numeric, errors='coerce')
+        imputer = IterativeImputer(max_iter=10, random_state=0)
+        imputed = pd.DataFrame(imputer.fit_transform(numeric), columns=LAG_IMPUTE_COLS, index=df.index)
+        for col in lag_cols:
+            df.loc[needs_imputation, col] = imputed.loc[needs_imputation, col]
+
+    # First month of a market: backfill as in AddRainfallLag
+    df.loc[dirty, 'Rainfall_Lag'] = df['Rainfall_Lag'].bfill()[dirty]
+
+    df.loc[dirty, 'Price_Velocity'] = compute_features(df[dirty], derived=DERIVED)['Price_Velocity']
+    return df
+
+
+def patch_main_csv(main_csv_path, external_factors_dir, changed, removed_keys):
+    """
+    Replaces the rows of the changed/removed month partitions in main.csv and
+    recomputes the lag features of the affected series from the earliest
+    changed month onward. Every other row is kept as is.
+    """
+    parquet_dir = os.path.join(os.path.dirname(main_csv_path), "main_parquet")
+    df = read_dataset(parquet_dir=parquet_dir, csv_path=main_csv_path)
+    key_cols = ['State', 'Commodity', 'Year', 'Month']
+
+    drop_keys = {(p['state'], p['commodity'], p['year'], p['month']) for p in changed}
+    drop_keys.update(tuple(k.split("/")[:2]) + (int(k.split("/")[2]), k.split("/")[3]) for k in removed_keys)
+    drop_mask = pd.MultiIndex.from_frame(df[key_cols]).isin(list(drop_keys))
+
+    # Earliest changed period per State/Commodity segment
+    earliest = {}
+    for state, commodity, year, month in drop_keys:
+        period = year * 12 + MONTH_MAP[month]
+        earliest[(state, commodity)] = min(period, earliest.get((state, commodity), period))
+
+    # Row-local features are computed for the new rows only
+    new_parts = [load_partition(p['dir'], p['state'], p['commodity'], p['year'], p['month']) for p in changed]
+    new_parts = [part for part in new_parts if part is not None and not part.empty]
+    affected_series = set(df.loc[drop_mask, SERIES_COLS].itertuples(index=False, name=None))
+    if new_parts:
+        df_new = pd.concat(new_parts, ignore_index=True)
+        df_new = transform_factors(df_new, external_factors_dir, FACTOR_STATE)
+        if df_new is None:
+            return False
+        affected_series.update(df_new[SERIES_COLS].itertuples(index=False, name=None))
+        df = pd.concat([df[~drop_mask], df_new], ignore_index=True)
+    else:
+        df = df[~drop_mask]
+
+    df['Month_Num'] = df['Month'].map(MONTH_MAP)
+    df = df.sort_values(by=SERIES_COLS + ['Year', 'Month_Num']).reset_index(drop=True)
+
+    period = df['Year'] * 12 + df['Month_Num']
+    segment_start = pd.Series(
+        [earliest.get((s, c), float('inf')) for s, c in zip(df['State'], df['Commodity'])],
+        index=df.index
+    )
+    dirty = pd.Series(pd.MultiIndex.from_frame(df[SERIES_COLS]).isin(list(affected_series)), index=df.index)
+    dirty &= period >= segment_start
+    print(f"Recomputing lag features for {int(dirty.sum())} of {len(df)} rows...")
+    df = recompute_lag_rows(df, dirty)
+
+    df = transform_reorder_columns(df)
+    if df is None:
+        return False
+    write_dataset(df, parquet_dir, main_csv_path)
+    print(f"Patched main.csv: {len(drop_keys)} partitions replaced, {len(df)} rows.")
+    return True
+
+
+def incremental_build(dataset_dir=None, workers=None, force=False):
+    """
+    Brings main.csv up to date with the raw month files.
+
+    Content hashes and mtimes of every raw file, its processed output and the
+    external factor files are recorded in DataSet/build_manifest.json. Only
+    the series (State/Commodity/kind) with raw files whose content changed
+    are re-imputed, and only the month
+    partitions whose processed output changed are patched into main.csv
+    (together with the lag-dependent rows after them). A change to an
+    external factor file, a missing manifest or main.csv, or force=True
+    falls back to the full rebuild.
+    """
+    script_dir = os.path.dirname(__file__)
+    if dataset_dir is None:
+        dataset_dir = os.path.join(script_dir, "../DataSet")
+    main_csv_path = os.path.join(dataset_dir, "main.csv")
+    manifest_path = os.path.join(dataset_dir, MANIFEST_NAME)
+    external_factors_dir = os.path.join(dataset_dir, FACTOR_STATE, "External Factors")
+
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    previous = manifest["partitions"]
+
+    external = {}
+    for name in EXTERNAL_FILES:
+        path = os.path.join(external_factors_dir, name)
+        if os.path.exists(path):
+            external[name] = file_fingerprint(path, manifest["external"].get(name))
+    external_changed = {
+        name for name in set(external) | set(manifest["external"])
+        if external.get(name, {}).get("sha256") != manifest["external"].get(name, {}).get("sha256")
+    }
+
+    # 1. Reprocess raw files whose content changed (or whose output is missing)
+    partitions = [p for p in discover_partitions(dataset_dir) if p['prices'] and p['arrivals']]
+    raw = {}
+    to_process = []
+    for p in partitions:
+        key = partition_key(p)
+        prev = previous.get(key, {})
+        raw[key] = {
+            "prices": file_fingerprint(p['prices'], prev.get("prices")),
+            "arrivals": file_fingerprint(p['arrivals'], prev.get("arrivals"))
+        }
+        outputs_exist = all(os.path.exists(os.path.join(p['dir'], f)) for f in ["processed_prices.csv", "processed_arrivals.csv"])
+        if (not outputs_exist
+                or raw[key]["prices"]["sha256"] != prev.get("prices", {}).get("sha256")
+                or raw[key]["arrivals"]["sha256"] != prev.get("arrivals", {}).get("sha256")):
+            to_process.append(p)
+
+    if to_process:
+        print(f"Reprocessing {len(to_process)} changed month partitions...")
+        ingest_raw(dataset_dir, workers=workers, partitions=to_process)
+
+    # 2. Partitions whose processed output changed need their rows replaced
+    entries = {}
+    changed = []
+    for p in partitions:
+        key = partition_key(p)
+        prev = previous.get(key, {})
+        prices_out = os.path.join(p['dir'], "processed_prices.csv")
+        arrivals_out = os.path.join(p['dir'], "processed_arrivals.csv")
+        if not (os.path.exists(prices_out) and os.path.exists(arrivals_out)):
+            continue
+        entry = dict(raw[key])
+        entry["processed_prices"] = file_fingerprint(prices_out, prev.get("processed_prices"))
+        entry["processed_arrivals"] = file_fingerprint(arrivals_out, prev.get("processed_arrivals"))
+        entries[key] = entry
+        if (entry["processed_prices"]["sha256"] != prev.get("processed_prices", {}).get("sha256")
+                or entry["processed_arrivals"]["sha256"] != prev.get("processed_arrivals", {}).get("sha256")):
+            changed.append(p)
+    removed_keys = [key for key in previous if key not in entries]
+
+    if force or not previous or not os.path.exists(main_csv_path) or external_changed:
+        reason = "forced" if force else "external factors changed" if external_changed and previous else "no previous build"
+        print(f"Full rebuild ({reason})...")
+        if not full_rebuild(dataset_dir):
+            return
+    elif not changed and not removed_keys:
+        print("main.csv is up to date.")
+    else:
+        print(f"{len(changed)} changed and {len(removed_keys)} removed month partitions.")
+        if not patch_main_csv(main_csv_path, external_factors_dir, changed, removed_keys):
+            return
+
+    save_manifest({"partitions": entries, "external": external}, manifest_path)
+    print(f"Incremental build finished in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild main.csv, recomputing only changed month partitions.")
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and rebuild everything")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for raw file processing")
+    args = parser.parse_args()
+    incremental_build(workers=args.workers, force=args.force)
@@ -0,0 +1,97 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from DataSetIndex import discover_partitions
+from ImputeSeries import period_of, impute_files
+
+OUTPUT_FILES = {
+    "prices": "processed_prices.csv",
+    "arrivals": "processed_arrivals.csv"
+}
+
+
+def _process_group(task):
+    """Worker: imputes every file of one State/Commodity/kind series and returns its timings."""
+    (state, commodity, kind), files = task
+    start = time.perf_counter()
+    file_seconds = {}
+    try:
+        counts = impute_files(files, file_seconds)
+    except Exception as e:
+        print(f"Error processing {state}/{commodity} {kind}: {e}")
+        counts = None
+    return {
+        "group": f"{state}/{commodity} {kind}",
+        "files": len(files),
+        "file_seconds": file_seconds,
+        "counts": counts,
+        "seconds": time.perf_counter() - start,
+        "ok": counts is not None
+    }
+
+
+def ingest_raw(dataset_dir=None, kinds=("prices", "arrivals"), workers=None, partitions=None):
+    """
+    Processes every raw prices/arrivals file under dataset_dir.
+
+    The files of each State/Commodity/kind form one time series per market
+    and are imputed together in a single pass (see ImputeSeries), one
+    process per series. Month directories are discovered in a single scan
+    (any state, commodity and year, misspelled month names included). If a
+    list of partitions from discover_partitions is passed, only the series
+    containing them are reprocessed, with their full history. Returns the
+    per-series timings, each with the seconds spent on each of its files.
+    """
+    if dataset_dir is None:
+        script_dir = os.path.dirname(__file__)
+        dataset_dir = os.path.join(script_dir, "../DataSet")
+
+    all_partitions = discover_partitions(dataset_dir)
+    if partitions is None:
+        partitions = all_partitions
+    selected = {(p['state'], p['commodity'], kind) for p in partitions for kind in kinds if p[kind] is not None}
+
+    groups = {}
+    for p in all_partitions:
+        for kind in kinds:
+            key = (p['state'], p['commodity'], kind)
+            if key in selected and p[kind] is not None:
+                output_path = os.path.join(p['dir'], OUTPUT_FILES[kind])
+                groups.setdefault(key, []).append((period_of(p['year'], p['month_num']), p[kind], output_path))
+    tasks = sorted(groups.items())
+    n_files = sum(len(files) for _, files in tasks)
+    print(f"Found {len(partitions)} month directories, {n_files} files in {len(tasks)} series to process ({', '.join(kinds)})...")
+
+    if not tasks:
+        return []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        timings = list(pool.map(_process_group, tasks))
+    total = time.perf_counter() - start
+
+    print("\nPer-file timings (the series total includes filling the shared series):")
+    for t in timings:
+        if t["ok"]:
+            filled = ", ".join(f"{n} {method}" for method, n in t["counts"].items())
+            print(f"  {t['seconds']:7.3f}s  {t['group']:<28}  {t['files']:3d} files  filled: {filled}")
+        else:
+            print(f"  {t['seconds']:7.3f}s  {t['group']:<28}  FAILED")
+        for file_path, seconds in t["file_seconds"].items():
+            print(f"    {seconds:7.3f}s  {os.path.relpath(file_path, dataset_dir)}")
+
+    failed = sum(not t["ok"] for t in timings)
+    print(f"\nProcessed {len(timings) - failed}/{len(timings)} series ({n_files} files) in {total:.2f}s.")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Impute all raw prices/arrivals files, one pass per series.")
+    parser.add_argument("--kind", choices=["prices", "arrivals", "all"], default="all")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    kinds = ("prices", "arrivals") if args.kind == "all" else (args.kind,)
+    ingest_raw(kinds=kinds, workers=args.workers)
@@ -0,0 +1,176 @@
+import cProfile
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+SCRIPT_DIR = os.path.dirname(__file__)
+# One JSON object per stage run is appended here. STAGE_LOG overrides the
+# path ("-" writes to stderr, an empty value disables the log)
+DEFAULT_LOG_PATH = os.path.join(SCRIPT_DIR, "../Logs/stages.jsonl")
+# If set, every top-level stage is profiled to <dir>/<stage>-<run id>.prof
+PROFILE_DIR_ENV = "STAGE_PROFILE_DIR"
+
+# Groups the stages of one process (e.g. one nightly rebuild); STAGE_RUN_ID
+# lets a scheduler pass its own id
+RUN_ID = os.environ.get("STAGE_RUN_ID") or uuid.uuid4().hex[:12]
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_active = threading.local()
+
+
+def _stack():
+    if not hasattr(_active, "stack"):
+        _active.stack = []
+    return _active.stack
+
+
+def _cpu_seconds():
+    """User + system time of this process and of its finished child processes."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # No procfs: the process high-water mark (KB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _PeakRSS:
+    """Samples the resident set size in a background thread and keeps the maximum."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._done.set()
+        self._thread.join()
+        return max(self.peak, _rss_bytes())
+
+
+def _rows(value):
+    """Row count of a DataFrame-like value, None for anything else."""
+    if value is None or isinstance(value, (str, bytes, dict)):
+        return None
+    try:
+        return len(value) if hasattr(value, "columns") else None
+    except TypeError:
+        return None
+
+
+def emit(record):
+    """Writes one structured log record as a JSON line (see DEFAULT_LOG_PATH)."""
+    path = os.environ.get("STAGE_LOG", DEFAULT_LOG_PATH)
+    if not path:
+        return
+    line = json.dumps(record, default=str)
+    if path == "-":
+        print(line, file=sys.stderr)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(line + "\n")
+
+
+@contextmanager
+def stage(name, **fields):
+    """
+    Measures the block as stage name: wall time, CPU time (child processes
+    included), peak RSS and rows in/out, logged as one JSON record when the
+    block exits. Yields the record; set record["rows_in"] / ["rows_out"]
+    (or call record_rows) for stages that load or write their data.
+
+    Stages nest: a stage inside another one records it as its parent. With
+    STAGE_PROFILE_DIR set, top-level stages are also run under cProfile.
+    """
+    stack = _stack()
+    record = {
+        "run_id": RUN_ID,
+        "stage": name,
+        "parent": stack[-1]["stage"] if stack else None,
+        "started": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "pid": os.getpid(),
+        "rows_in": None,
+        "rows_out": None,
+        **fields
+    }
+    profile_dir = os.environ.get(PROFILE_DIR_ENV)
+    profiler = cProfile.Profile() if profile_dir and not stack else None
+
+    stack.append(record)
+    sampler = _PeakRSS().start()
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    record["status"] = "ok"
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        record["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+        record["cpu_seconds"] = round(_cpu_seconds() - cpu_start, 6)
+        record["peak_rss_mb"] = round(sampler.stop() / 2**20, 1)
+        stack.pop()
+        if profiler is not None:
+            os.makedirs(profile_dir, exist_ok=True)
+            record["profile"] = os.path.join(profile_dir, f"{name}-{RUN_ID}.prof")
+            profiler.dump_stats(record["profile"])
+        emit(record)
+
+
+def record_rows(rows_in=None, rows_out=None):
+    """Sets the row counts of the innermost active stage (no-op outside a stage)."""
+    stack = _stack()
+    if not stack:
+        return
+    if rows_in is not None:
+        stack[-1]["rows_in"] = int(rows_in)
+    if rows_out is not None:
+        stack[-1]["rows_out"] = int(rows_out)
+
+
+def instrumented(name=None):
+    """
+    Decorator running the function as a stage (see stage). Rows in/out
+    default to the length of the first DataFrame argument and of a
+    DataFrame result; functions working on files call record_rows.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name or fn.__name__) as record:
+                frames = [_rows(a) for a in list(args) + list(kwargs.values())]
+                record["rows_in"] = next((n for n in frames if n is not None), None)
+                result = fn(*args, **kwargs)
+                if record["rows_out"] is None:
+                    record["rows_out"] = _rows(result)
+                return result
+        return wrapper
+    return decorator
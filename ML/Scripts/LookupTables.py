@@ -0,0 +1,57 @@
+import pandas as pd
+
+from DataSetIndex import MONTHS
+
+KEY_COLUMNS = ['Year', 'Month']
+
+
+def forward_fill_years(table, years):
+    """
+    Extends a lookup table (Year or Year/Month -> values) to every year in
+    years after its latest year by repeating the rows of the latest year.
+    """
+    latest = table['Year'].max()
+    future = sorted(int(y) for y in set(years) if y > latest)
+    if not future:
+        return table
+    value_cols = [c for c in table.columns if c not in KEY_COLUMNS]
+    print(f"Forward filling {', '.join(value_cols)} from {latest} to {', '.join(map(str, future))}...")
+    latest_rows = table[table['Year'] == latest]
+    return pd.concat([table] + [latest_rows.assign(Year=year) for year in future], ignore_index=True)
+
+
+def by_month(table):
+    """Expands a per-year table to one row per (Year, Month)."""
+    if 'Month' in table.columns:
+        return table
+    return table.merge(pd.DataFrame({'Month': MONTHS}), how='cross')
+
+
+def attach(df_main, tables, state=None):
+    """
+    Joins lookup tables onto df_main by Year/Month with a single merge.
+
+    Each table has a Year column, optionally a Month column, and one or more
+    value columns; years of df_main after a table's latest year are forward
+    filled. With state, the tables hold that state's values and are joined
+    on State too: rows of other states get NaN. Value columns already in
+    df_main are replaced. Rows keep their order and index.
+    """
+    years = df_main['Year'].unique()
+    combined = None
+    for table in tables:
+        table = by_month(forward_fill_years(table, years))
+        combined = table if combined is None else combined.merge(table, on=KEY_COLUMNS, how='outer')
+
+    value_cols = [c for c in combined.columns if c not in KEY_COLUMNS]
+    keys = KEY_COLUMNS
+    if state is not None:
+        combined = combined.assign(State=state)
+        keys = ['State'] + KEY_COLUMNS
+    df_main = df_main.drop(columns=[c for c in value_cols if c in df_main.columns])
+    merged = df_main.merge(combined, on=keys, how='left')
+    merged.index = df_main.index
+    if state is not None:
+        # The merge would otherwise turn a categorical State into strings
+        merged['State'] = df_main['State']
+    return merged
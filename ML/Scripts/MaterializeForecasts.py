@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+import joblib
+
+from Storage import read_dataset
+from ForecastPrices import FEATURES, TARGET, TRAINING_COLUMNS, MONTH_MAP, prepare_data, recursive_forecast, build_report
+from Instrumentation import RUN_ID, instrumented, record_rows
+from ModelRegistry import VERSIONS_DIR, current_manifest, current_model_path
+
+SCRIPT_DIR = os.path.dirname(__file__)
+MODEL_DIR = os.path.join(SCRIPT_DIR, "../Model")
+REGISTRY_PATH = os.path.join(MODEL_DIR, "registry.json")
+MODEL_PATH = os.path.join(MODEL_DIR, "wheat_price_model.pkl")
+STORE_DIR = os.path.join(SCRIPT_DIR, "../ForecastStore")
+
+# Store layout (read by app/services/forecast_store.py):
+#   runs/<run id>/forecasts.bin  compact JSON documents, back to back
+#   runs/<run id>/index.json     document key -> [offset, length] in forecasts.bin
+#   CURRENT                      id of the run being served, replaced atomically
+CURRENT_FILE = "CURRENT"
+DATA_FILE = "forecasts.bin"
+INDEX_FILE = "index.json"
+
+MONTH_NAMES = list(MONTH_MAP)
+
+
+def store_key(state, commodity, market=None):
+    """Key of a segment's (or one of its markets') document, case-insensitive."""
+    parts = [state, commodity] if market is None else [state, commodity, market]
+    return "/".join(part.lower() for part in parts)
+
+
+def segment_models(registry_path=REGISTRY_PATH, model_path=MODEL_PATH, versions_dir=VERSIONS_DIR):
+    """
+    (state, commodity, model path, markets) of every served segment: the
+    registry's (see TrainSegments.py), or the current published model
+    (ModelRegistry.py, segment and markets from its manifest), else
+    wheat_price_model.pkl as Maharashtra/Wheat. markets is the LabelEncoder
+    order of the model, None when it is that of prepare_data on the
+    segment's data.
+    """
+    if not os.path.exists(registry_path):
+        manifest = current_manifest(versions_dir)
+        if manifest is None:
+            return [("Maharashtra", "Wheat", model_path, None)]
+        return [(manifest["state"], manifest["commodity"], current_model_path(versions_dir), manifest.get("markets"))]
+    with open(registry_path, "r") as f:
+        registry = json.load(f)
+    model_dir = os.path.dirname(registry_path)
+    return [(entry["state"], entry["commodity"], os.path.join(model_dir, entry["artifact"]), entry["markets"])
+            for entry in registry["segments"].values()]
+
+
+def next_months(year, month_num, horizon):
+    """The horizon (month name, month number, year) tuples after month_num of year."""
+    months = []
+    for _ in range(horizon):
+        year, month_num = (year + 1, 1) if month_num == 12 else (year, month_num + 1)
+        months.append((MONTH_NAMES[month_num - 1], month_num, year))
+    return months
+
+
+def horizon_label(future_months):
+    (first, _, first_year), (last, _, last_year) = future_months[0], future_months[-1]
+    span = f"{first[:3]}-{last[:3]} {last_year}" if first_year == last_year else \
+        f"{first[:3]} {first_year}-{last[:3]} {last_year}"
+    return f"{len(future_months)} Months ({span})"
+
+
+def forecast_segment(df, model, state, commodity, markets=None, horizon=3, base_year=None):
+    """
+    Forecasts every market of one segment horizon months past base_year
+    (default: the latest year with complete rows), from each market's latest
+    row of that year as forecast_prices does. Returns the report of
+    ForecastPrices.build_report.
+    """
+    df, _ = prepare_data(df)
+    if markets is not None:
+        codes = {market: code for code, market in enumerate(markets)}
+        df = df[df['Market'].isin(codes.keys())].copy()
+        df['Market_Encoded'] = df['Market'].map(codes)
+    df_clean = df.dropna(subset=FEATURES + [TARGET])
+    if df_clean.empty:
+        return None
+
+    if base_year is None:
+        base_year = int(df_clean['Year'].max())
+    df_latest = df_clean[df_clean['Year'] == base_year].sort_values(['Year', 'Month_Num']).groupby('Market').tail(1)
+    if df_latest.empty:
+        return None
+    base_month = int(df_latest['Month_Num'].max())
+    future_months = next_months(base_year, base_month, horizon)
+
+    predicted = recursive_forecast(model, df_latest, future_months)
+    return build_report(df_latest['Market'], df_latest[TARGET].to_numpy(dtype=float), predicted, future_months, {
+        "commodity": commodity,
+        "state": state,
+        "base_month": f"{MONTH_NAMES[base_month - 1]} {base_year}",
+        "horizon": horizon_label(future_months)
+    })
+
+
+def report_documents(report):
+    """
+    The stored documents of one segment report: the whole report (the
+    dashboard's view, same shape as forecast_report.json) and one document
+    per market with its series, risk and the state summary.
+    """
+    metadata = report["report_metadata"]
+    state, commodity = metadata["state"], metadata["commodity"]
+    documents = {store_key(state, commodity): report}
+    for detail in report["market_details"]:
+        documents[store_key(state, commodity, detail["market_name"])] = {
+            "report_metadata": metadata,
+            "state_summary": report["state_summary"],
+            "market": detail
+        }
+    return documents
+
+
+def _write_synced(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_store(documents, store_dir=STORE_DIR, run_id=None, keep=3):
+    """
+    Writes documents (key -> JSON-serializable dict) as a new run of the
+    store and publishes it by replacing CURRENT. The run directory is
+    complete before CURRENT points to it, so readers see either the previous
+    run or the new one. Only the keep most recent runs are kept.
+    Returns the run directory.
+    """
+    if run_id is None:
+        run_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{RUN_ID}"
+    runs_dir = os.path.join(store_dir, "runs")
+    run_dir = os.path.join(runs_dir, run_id)
+    tmp_dir = run_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    entries = {}
+    chunks = []
+    offset = 0
+    for key, document in documents.items():
+        payload = json.dumps(document, separators=(",", ":")).encode()
+        entries[key] = [offset, len(payload)]
+        chunks.append(payload)
+        offset += len(payload)
+    _write_synced(os.path.join(tmp_dir, DATA_FILE), b"".join(chunks))
+
+    index = {
+        "run_id": run_id,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entries": entries
+    }
+    _write_synced(os.path.join(tmp_dir, INDEX_FILE), json.dumps(index).encode())
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.rename(tmp_dir, run_dir)
+
+    current_tmp = os.path.join(store_dir, CURRENT_FILE + ".tmp")
+    _write_synced(current_tmp, run_id.encode())
+    os.replace(current_tmp, os.path.join(store_dir, CURRENT_FILE))
+
+    # Older runs; a reader still holding one keeps its open mapping
+    runs = sorted((name for name in os.listdir(runs_dir) if not name.endswith(".tmp") and name != run_id),
+                  key=lambda name: os.path.getmtime(os.path.join(runs_dir, name)))
+    for name in runs[:max(len(runs) - (keep - 1), 0)]:
+        shutil.rmtree(os.path.join(runs_dir, name), ignore_errors=True)
+    return run_dir
+
+
+@instrumented()
+def materialize_forecasts(df=None, horizon=3, base_year=None, store_dir=STORE_DIR,
+                          registry_path=REGISTRY_PATH, model_path=MODEL_PATH):
+    """
+    Forecasts every market of every served segment and publishes the reports
+    to the forecast store, which the API serves on /forecast without running
+    a model. df is the main dataset; each segment is read from disk when not
+    given.
+    """
+    documents = {}
+    rows_in = 0
+    for state, commodity, segment_model_path, markets in segment_models(registry_path, model_path):
+        if df is None:
+            segment_df = read_dataset(columns=TRAINING_COLUMNS,
+                                      filters=[('State', '==', state), ('Commodity', '==', commodity)])
+        else:
+            segment_df = df.loc[(df['State'] == state) & (df['Commodity'] == commodity), TRAINING_COLUMNS].copy()
+        rows_in += len(segment_df)
+
+        report = forecast_segment(segment_df, joblib.load(segment_model_path), state, commodity,
+                                  markets, horizon, base_year)
+        if report is None:
+            print(f"  Skipped {state}/{commodity}: no complete rows for the base year")
+            continue
+        documents.update(report_documents(report))
+        metadata = report["report_metadata"]
+        print(f"  {state}/{commodity}: {len(report['market_details'])} markets, "
+              f"{metadata['horizon']} after {metadata['base_month']}")
+
+    record_rows(rows_in=rows_in, rows_out=len(documents))
+    if not documents:
+        print("No forecasts to materialize; store not updated.")
+        return None
+    run_dir = write_store(documents, store_dir)
+    print(f"Materialized {len(documents)} forecast documents to: {run_dir}")
+    return run_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute every segment's market forecasts into the forecast store.")
+    parser.add_argument("--horizon", type=int, default=3, help="Months to forecast (default: 3)")
+    parser.add_argument("--base-year", type=int, default=None,
+                        help="Forecast from each market's latest month of this year (default: latest year)")
+    args = parser.parse_args()
+    materialize_forecasts(horizon=args.horizon, base_year=args.base_year)
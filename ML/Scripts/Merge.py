@@ -1,99 +1,103 @@
 import pandas as pd
+import numpy as np
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+from DataSetIndex import discover_partitions
+from Instrumentation import instrumented, record_rows
+from Storage import write_dataset
+
+CORE_COLUMNS = ["State", "Commodity", "Year", "Month", "Market", 
+                "Current_Month price", "Prev_Month price", 
+                "Current_Month arrivals", "Prev_Month arrivals"]
+
+def read_partition(month_dir):
+    """
+    Reads processed_prices.csv and processed_arrivals.csv of one month directory
+    and returns them merged on Market (Market, Current/Prev_Month price,
+    Current/Prev_Month arrivals), or None if either file is missing or malformed.
+    """
+    prices_path = os.path.join(month_dir, "processed_prices.csv")
+    arrivals_path = os.path.join(month_dir, "processed_arrivals.csv")
+    if not (os.path.exists(prices_path) and os.path.exists(arrivals_path)):
+        return None
+
+    try:
+        df_prices = pd.read_csv(prices_path)
+        df_arrivals = pd.read_csv(arrivals_path)
+    except Exception as e:
+        print(f"Error processing {month_dir}: {e}")
+        return None
+
+    # Prices: Market(0), Current(1), Prev(2)
+    # Arrivals: Market(0), Current(1), Prev(2)
+    if len(df_prices.columns) < 3 or len(df_arrivals.columns) < 3:
+        return None
+
+    df_prices = df_prices.iloc[:, :3]
+    df_prices.columns = ['Market', 'Current_Month price', 'Prev_Month price']
+    df_arrivals = df_arrivals.iloc[:, :3]
+    df_arrivals.columns = ['Market', 'Current_Month arrivals', 'Prev_Month arrivals']
+
+    return pd.merge(df_prices, df_arrivals, on='Market', how='inner')
+
+def load_partition(month_dir, state, commodity, year, month):
+    """Like read_partition, with the State/Commodity/Year/Month columns added (CORE_COLUMNS)."""
+    merged_df = read_partition(month_dir)
+    if merged_df is None:
+        return None
+    merged_df.insert(0, 'State', state)
+    merged_df.insert(1, 'Commodity', commodity)
+    merged_df.insert(2, 'Year', year)
+    merged_df.insert(3, 'Month', month)
+    return merged_df[CORE_COLUMNS]
+
+def _partition_column(values, part_index):
+    """Expands one value per partition to a categorical column over all rows."""
+    categories = sorted(set(values))
+    codes = np.array([categories.index(v) for v in values], dtype=np.int32)
+    return pd.Categorical.from_codes(codes[part_index], categories=categories)
+
+def build_main_frame(dataset_dir, workers=None):
+    """
+    Aggregates every month directory under dataset_dir into one DataFrame (None if no data).
+
+    Partitions are read concurrently, concatenated once, and the
+    State/Commodity/Month metadata is attached as categorical columns.
+    """
+    print(f"\nAggregating data from {dataset_dir}...")
+
+    # Structure: .../DataSet/{State}/{Commodity}/{Year}/{Month}/...
+    partitions = discover_partitions(dataset_dir)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(read_partition, [p['dir'] for p in partitions]))
+
+    found = [(p, f) for p, f in zip(partitions, frames) if f is not None]
+    if not found:
+        return None
+
+    main_df = pd.concat([f for _, f in found], ignore_index=True)
+    part_index = np.repeat(np.arange(len(found)), [len(f) for _, f in found])
+
+    main_df['State'] = _partition_column([p['state'] for p, _ in found], part_index)
+    main_df['Commodity'] = _partition_column([p['commodity'] for p, _ in found], part_index)
+    main_df['Year'] = np.array([p['year'] for p, _ in found])[part_index]
+    main_df['Month'] = _partition_column([p['month'] for p, _ in found], part_index)
+    return main_df[CORE_COLUMNS]
+
+@instrumented()
 def create_main_csv():
     # Define the dataset directory relative to this script
     script_dir = os.path.dirname(__file__)
     dataset_dir = os.path.join(script_dir, "../DataSet")
-    
-    print(f"\nAggregating data from {dataset_dir}...")
-    
-    data_rows = []
-
-    # Walk through the directory structure
-    for root, dirs, files in os.walk(dataset_dir):
-        # Check if both processed files exist
-        if "processed_prices.csv" in files and "processed_arrivals.csv" in files:
-            prices_path = os.path.join(root, "processed_prices.csv")
-            arrivals_path = os.path.join(root, "processed_arrivals.csv")
-            
-            # Extract metadata from path
-            # Structure: .../DataSet/{State}/{Commodity}/{Year}/{Month}/...
-            try:
-                # Get relative path from dataset_dir to handle varying absolute paths
-                rel_path = os.path.relpath(root, dataset_dir)
-                path_parts = rel_path.split(os.sep)
-                
-                # We expect at least 4 parts: State, Commodity, Year, Month
-                if len(path_parts) >= 4:
-                    state = path_parts[0]
-                    commodity = path_parts[1] 
-                    year = path_parts[2]
-                    month = path_parts[3]
-
-                    # Filter out placeholder directories if any (though unlikely with new structure)
-                    if commodity.lower().startswith("commodity"):
-                        continue
-                    
-                    # Read CSVs
-                    df_prices = pd.read_csv(prices_path)
-                    df_arrivals = pd.read_csv(arrivals_path)
-                    
-                    # Ensure minimal columns exist
-                    # Prices: Market(0), Current(1), Prev(2)
-                    # Arrivals: Market(0), Current(1), Prev(2)
-                    if len(df_prices.columns) >= 3 and len(df_arrivals.columns) >= 3:
-                         # Rename columns for merging and clarity
-                         # We assume Market is the first column in both
-                         market_col_prices = df_prices.columns[0]
-                         market_col_arrivals = df_arrivals.columns[0]
-                         
-                         # Rename to standard names for merge
-                         df_prices = df_prices.rename(columns={
-                             df_prices.columns[0]: 'Market',
-                             df_prices.columns[1]: 'Current_Month price',
-                             df_prices.columns[2]: 'Prev_Month price'
-                         })
-                         
-                         df_arrivals = df_arrivals.rename(columns={
-                             df_arrivals.columns[0]: 'Market',
-                             df_arrivals.columns[1]: 'Current_Month arrivals',
-                             df_arrivals.columns[2]: 'Prev_Month arrivals'
-                         })
-                         
-                         # Select only necessary columns
-                         df_prices_clean = df_prices[['Market', 'Current_Month price', 'Prev_Month price']]
-                         df_arrivals_clean = df_arrivals[['Market', 'Current_Month arrivals', 'Prev_Month arrivals']]
-                         
-                         # Merge on Market
-                         merged_df = pd.merge(df_prices_clean, df_arrivals_clean, on='Market', how='inner')
-                         
-                         for _, row in merged_df.iterrows():
-                             data_rows.append({
-                                 "State": state,
-                                 "Commodity": commodity,
-                                 "Year": year,
-                                 "Month": month,
-                                 "Market": row['Market'],
-                                 "Current_Month price": row['Current_Month price'],
-                                 "Prev_Month price": row['Prev_Month price'],
-                                 "Current_Month arrivals": row['Current_Month arrivals'],
-                                 "Prev_Month arrivals": row['Prev_Month arrivals']
-                             })
-
-            except Exception as e:
-                print(f"Error processing {root}: {e}")
-
-    # Create DataFrame and save
-    if data_rows:
-        # Define column order
-        columns = ["State", "Commodity", "Year", "Month", "Market", 
-                   "Current_Month price", "Prev_Month price", 
-                   "Current_Month arrivals", "Prev_Month arrivals"]
-        main_df = pd.DataFrame(data_rows, columns=columns)
-        
+
+    main_df = build_main_frame(dataset_dir)
+
+    # Save
+    if main_df is not None:
         output_path = os.path.join(dataset_dir, "main.csv")
-        main_df.to_csv(output_path, index=False)
+        write_dataset(main_df, csv_path=output_path)
+        record_rows(rows_out=len(main_df))
         print(f"\nSuccessfully created main.csv at {output_path}")
         print("First 5 rows:")
         print(main_df.head())
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+import joblib
+
+from FlatEnsemble import export_flat
+
+SCRIPT_DIR = os.path.dirname(__file__)
+MODEL_DIR = os.path.join(SCRIPT_DIR, "../Model")
+# Published model versions:
+#   versions/<version>/model.pkl       the fitted model
+#   versions/<version>/model.flat.npz  its flattened trees (GBR only, see FlatEnsemble)
+#   versions/<version>/manifest.json   training run: params, data, validation metrics
+#   versions/CURRENT                   the version being served, replaced atomically
+VERSIONS_DIR = os.path.join(MODEL_DIR, "versions")
+# Segment models (TrainSegments.py) are published the same way, under
+# segments/<State>_<Commodity>/, and registry.json points at their versions
+REGISTRY_PATH = os.path.join(MODEL_DIR, "registry.json")
+CURRENT_FILE = "CURRENT"
+MODEL_FILE = "model.pkl"
+MANIFEST_FILE = "manifest.json"
+
+
+def fsync_dir(path):
+    """Makes renames inside path durable."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_file(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def atomic_write_text(path, text):
+    """Writes text to path through a temporary file: fsync, then rename over path."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def current_version(versions_dir=VERSIONS_DIR):
+    """Id of the version being served, or None if nothing was published."""
+    try:
+        with open(os.path.join(versions_dir, CURRENT_FILE), "r") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def current_model_path(versions_dir=VERSIONS_DIR, default=None):
+    """model.pkl of the current version, or default when nothing was published."""
+    version = current_version(versions_dir)
+    return os.path.join(versions_dir, version, MODEL_FILE) if version else default
+
+
+def load_manifest(version, versions_dir=VERSIONS_DIR):
+    with open(os.path.join(versions_dir, version, MANIFEST_FILE), "r") as f:
+        return json.load(f)
+
+
+def current_manifest(versions_dir=VERSIONS_DIR):
+    """Manifest of the current version (segment, markets, ...), or None when nothing was published."""
+    version = current_version(versions_dir)
+    return load_manifest(version, versions_dir) if version else None
+
+
+def list_versions(versions_dir=VERSIONS_DIR):
+    """Published version ids, oldest first (ids sort by publish time)."""
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(name for name in os.listdir(versions_dir)
+                  if os.path.isdir(os.path.join(versions_dir, name)) and not name.endswith(".tmp"))
+
+
+def _artifact_paths(registry_path, pack_dir):
+    """Model files in use: the artifacts of registry.json and of every model pack in pack_dir."""
+    paths = []
+    try:
+        with open(registry_path, "r") as f:
+            registry = json.load(f)
+        model_dir = os.path.dirname(registry_path)
+        paths += [os.path.join(model_dir, entry["artifact"]) for entry in registry["segments"].values()]
+    except (OSError, ValueError, KeyError):
+        pass
+    if pack_dir and os.path.isdir(pack_dir):
+        for name in os.listdir(pack_dir):
+            try:
+                with open(os.path.join(pack_dir, name, MANIFEST_FILE), "r") as f:
+                    pack = json.load(f)
+            except (OSError, ValueError):
+                continue
+            paths += [entry["artifact"] for entry in pack.get("segments", []) if entry.get("artifact")]
+    return paths
+
+
+def referenced_versions(versions_dir=VERSIONS_DIR, registry_path=None, pack_dir=None):
+    """
+    Versions in versions_dir whose model is still referenced: by
+    registry.json (default: REGISTRY_PATH), or by a model pack of the API
+    (default: MODEL_SHARE_DIR), whose workers load models that cannot be
+    flattened from their artifact.
+    """
+    root = os.path.realpath(versions_dir)
+    versions = set()
+    for path in _artifact_paths(registry_path or REGISTRY_PATH, pack_dir or os.getenv("MODEL_SHARE_DIR")):
+        version_dir = os.path.dirname(os.path.realpath(path))
+        if os.path.dirname(version_dir) == root:
+            versions.add(os.path.basename(version_dir))
+    return versions
+
+
+def activate(version, versions_dir=VERSIONS_DIR):
+    """Points CURRENT at a published version (e.g. to roll back)."""
+    if not os.path.exists(os.path.join(versions_dir, version, MANIFEST_FILE)):
+        raise ValueError(f"Unknown model version: {version}")
+    atomic_write_text(os.path.join(versions_dir, CURRENT_FILE), version)
+
+
+def publish_model(model, manifest, versions_dir=VERSIONS_DIR, keep=5):
+    """
+    Publishes model as a new version and makes it current.
+
+    The model, its flattened trees and manifest (plus version and publish
+    time) are written and fsynced in a temporary directory, which is renamed
+    into place before CURRENT is replaced. A reader following CURRENT never
+    sees a partial version. Older versions beyond the keep most recent ones
+    besides the current one are deleted, unless they are still referenced
+    (see referenced_versions). Returns the version directory.
+    """
+    os.makedirs(versions_dir, exist_ok=True)
+    now = datetime.now(timezone.utc)
+    version = now.strftime("%Y%m%dT%H%M%S%fZ")
+    version_dir = os.path.join(versions_dir, version)
+    tmp_dir = version_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    model_path = os.path.join(tmp_dir, MODEL_FILE)
+    joblib.dump(model, model_path)
+    _fsync_file(model_path)
+    flat_path = export_flat(model, model_path)
+    if flat_path:
+        _fsync_file(flat_path)
+
+    manifest = {
+        "version": version,
+        "published": now.isoformat(timespec="seconds"),
+        "model_type": type(model).__name__,
+        "flat": flat_path is not None,
+        **manifest
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    fsync_dir(tmp_dir)
+
+    os.rename(tmp_dir, version_dir)
+    fsync_dir(versions_dir)
+    atomic_write_text(os.path.join(versions_dir, CURRENT_FILE), version)
+
+    referenced = referenced_versions(versions_dir)
+    for old in list_versions(versions_dir)[:-(keep + 1)]:
+        if old != version and old not in referenced:
+            shutil.rmtree(os.path.join(versions_dir, old), ignore_errors=True)
+    return version_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the published model versions or switch the current one.")
+    parser.add_argument("--activate", metavar="VERSION", help="Serve VERSION (e.g. roll back to an earlier model)")
+    args = parser.parse_args()
+
+    if args.activate:
+        activate(args.activate)
+        print(f"Current model version: {args.activate}")
+    else:
+        current = current_version()
+        for version in list_versions():
+            manifest = load_manifest(version)
+            metrics = manifest.get("metrics", {})
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  {manifest.get('backend', '?'):<4} "
+                  f"MAPE {metrics.get('mape', float('nan')):.4f} RMSE {metrics.get('rmse', float('nan')):.2f} "
+                  f"R^2 {metrics.get('r2', float('nan')):.4f}")
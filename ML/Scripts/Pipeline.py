@@ -0,0 +1,160 @@
+import argparse
+import os
+
+from IngestRaw import ingest_raw
+from Merge import build_main_frame
+from AddExternalFactors import transform_factors
+from AddLagFeatures import transform_lag_features
+from AddRainfallLag import transform_rainfall_lag
+from AddPriceVelocity import transform_price_velocity
+from ReorderColumns import transform_reorder_columns
+from Storage import write_dataset
+from Instrumentation import stage
+
+FACTOR_STATE = "Maharashtra"
+
+# --- Stages ---
+# Each stage takes the in-memory main DataFrame and the run context and
+# returns the new DataFrame (None aborts the run).
+
+def stage_ingest(df, ctx):
+    ingest_raw(ctx["dataset_dir"], workers=ctx["workers"])
+    return df
+
+def stage_merge(df, ctx):
+    return build_main_frame(ctx["dataset_dir"])
+
+def stage_external_factors(df, ctx):
+    # Rainfall, Diesel, Irrigation, APY, Temperature and MSP in one merge
+    return transform_factors(df, ctx["external_factors_dir"], ctx["factor_state"])
+
+def stage_lag_features(df, ctx):
+    return transform_lag_features(df)
+
+def stage_rainfall_lag(df, ctx):
+    return transform_rainfall_lag(df)
+
+def stage_price_velocity(df, ctx):
+    return transform_price_velocity(df)
+
+def stage_reorder_columns(df, ctx):
+    return transform_reorder_columns(df)
+
+def stage_save(df, ctx):
+    # Parquet dataset is canonical; main.csv is exported alongside
+    write_dataset(df, ctx["parquet_dir"], ctx["main_csv_path"])
+    return df
+
+def stage_train(df, ctx):
+    # Imported here so dataset-only runs don't load the training/plotting stack
+    from ForecastPrices import forecast_prices
+    forecast_prices(df, plots=ctx["plots"], backend=ctx["backend"])
+    return df
+
+def stage_materialize(df, ctx):
+    from MaterializeForecasts import materialize_forecasts
+    materialize_forecasts(df)
+    return df
+
+# Stage name -> (function, dependencies). Declaration order breaks ties
+# between stages that are ready at the same time.
+STAGES = {
+    "ingest": (stage_ingest, []),
+    "merge": (stage_merge, ["ingest"]),
+    "external_factors": (stage_external_factors, ["merge"]),
+    "lag_features": (stage_lag_features, ["external_factors"]),  # imputer uses msp and Temperature
+    "rainfall_lag": (stage_rainfall_lag, ["external_factors"]),
+    "price_velocity": (stage_price_velocity, ["lag_features"]),
+    "reorder_columns": (stage_reorder_columns, ["price_velocity", "rainfall_lag"]),
+    "save": (stage_save, ["reorder_columns"]),
+    "train": (stage_train, ["save"]),
+    "materialize": (stage_materialize, ["train"]),
+}
+
+
+def resolve_stages(targets, skip=()):
+    """Returns the stages needed for targets in dependency order (Kahn's algorithm)."""
+    needed = set()
+    stack = list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage: {name}")
+        if name not in needed:
+            needed.add(name)
+            stack.extend(STAGES[name][1])
+
+    declared = list(STAGES)
+    remaining = {name: set(STAGES[name][1]) & needed for name in needed}
+    order = []
+    while remaining:
+        ready = [name for name in declared if name in remaining and not remaining[name]]
+        if not ready:
+            raise ValueError(f"Cycle between stages: {sorted(remaining)}")
+        name = ready[0]
+        order.append(name)
+        del remaining[name]
+        for deps in remaining.values():
+            deps.discard(name)
+
+    return [name for name in order if name not in skip]
+
+
+def pipeline_context(dataset_dir=None, workers=None, plots=True, backend="gbr"):
+    """The run context passed to every stage, for the dataset under dataset_dir."""
+    if dataset_dir is None:
+        dataset_dir = os.path.join(os.path.dirname(__file__), "../DataSet")
+    return {
+        "dataset_dir": dataset_dir,
+        # External factor files exist for this state only (see transform_factors)
+        "factor_state": FACTOR_STATE,
+        "external_factors_dir": os.path.join(dataset_dir, FACTOR_STATE, "External Factors"),
+        "main_csv_path": os.path.join(dataset_dir, "main.csv"),
+        "parquet_dir": os.path.join(dataset_dir, "main_parquet"),
+        "workers": workers,
+        "plots": plots,
+        "backend": backend
+    }
+
+
+def run_pipeline(targets=("save",), skip=(), dataset_dir=None, workers=None, plots=True, backend="gbr"):
+    """
+    Runs the stages needed for targets, passing one DataFrame in memory.
+    The dataset is written once by the save stage. Returns the final DataFrame.
+    """
+    ctx = pipeline_context(dataset_dir, workers, plots, backend)
+
+    order = resolve_stages(targets, skip)
+    print(f"Pipeline stages: {' -> '.join(order)}")
+
+    df = None
+    timings = []
+    for name in order:
+        # Logged with wall/CPU time, peak RSS and rows (see Instrumentation)
+        with stage(name) as record:
+            record["rows_in"] = 0 if df is None else len(df)
+            df = STAGES[name][0](df, ctx)
+            record["rows_out"] = 0 if df is None else len(df)
+        timings.append((name, record["wall_seconds"]))
+        if df is None and name != "ingest":
+            print(f"Pipeline aborted: stage '{name}' produced no data.")
+            return None
+
+    print("\nStage timings:")
+    for name, seconds in timings:
+        print(f"  {seconds:7.3f}s  {name}")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the feature pipeline in memory (raw files -> main.csv -> model).")
+    parser.add_argument("--target", action="append", choices=list(STAGES),
+                        help="Stage(s) to build, with their dependencies (default: save)")
+    parser.add_argument("--skip", action="append", default=[], choices=list(STAGES),
+                        help="Stage(s) to skip, e.g. ingest when processed files are current")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for raw file ingestion")
+    parser.add_argument("--no-plots", action="store_true", help="Train without the training curves plot")
+    parser.add_argument("--backend", choices=["gbr", "hgb"], default="gbr", help="Model backend for the train stage")
+    args = parser.parse_args()
+    run_pipeline(targets=args.target or ["save"], skip=args.skip, workers=args.workers,
+                 plots=not args.no_plots, backend=args.backend)
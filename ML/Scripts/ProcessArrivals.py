@@ -1,13 +1,17 @@
-import pandas as pd
-import numpy as np
 import os
-from sklearn.experimental import enable_iterative_imputer
-from sklearn.impute import IterativeImputer
 
+from ImputeSeries import VALUE_COLUMNS, read_raw, impute_cross_section
+from Instrumentation import instrumented, record_rows
+
+@instrumented()
 def process_arrivals(file_path):
     """
-    Reads an arrivals CSV file, imputes missing values using IterativeImputer,
-    and saves the result to 'processed_arrivals.csv' in the same directory.
+    Reads an arrivals CSV file, imputes missing values from that month alone
+    (IterativeImputer) and saves the result to 'processed_arrivals.csv' in the
+    same directory. Returns the output path, or None on failure.
+
+    Ingestion (IngestRaw.py) imputes every month of a series together from
+    each market's history instead; this is the standalone single-file path.
     """
     if not os.path.exists(file_path):
         print(f"File not found: {file_path}")
@@ -16,27 +20,18 @@ def process_arrivals(file_path):
     print(f"\nProcessing Arrivals: {file_path}")
 
     try:
-        # Read the CSV file, skipping the first row as it contains the title
-        df = pd.read_csv(file_path, header=1)
-
-        # Columns to process (Indices 1, 2, 3)
-        # 1: Arrivals Current Month
-        # 2: Arrivals Previous Month
-        # 3: Arrivals Previous Year
-        feature_cols_indices = [1, 2, 3]
-        feature_cols = df.columns[feature_cols_indices]
-        
-        # Convert columns to numeric, coercing errors to NaN (handles '-')
-        for col in feature_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        # Read the CSV file, skipping the first row as it contains the title;
+        # value columns are selected by position as names might vary slightly
+        df = read_raw(file_path)
+        feature_cols = df.columns[VALUE_COLUMNS]
+        record_rows(rows_in=len(df))
 
         # Check if imputation is needed
         if df[feature_cols].isnull().values.any():
             print(f"Missing values found. Imputing...")
             
             # Use IterativeImputer
-            imputer = IterativeImputer(max_iter=10, random_state=42)
-            df[feature_cols] = imputer.fit_transform(df[feature_cols])
+            df[feature_cols] = impute_cross_section(df, feature_cols)
         else:
             print("No missing values found.")
 
@@ -44,42 +39,16 @@ def process_arrivals(file_path):
         output_dir = os.path.dirname(file_path)
         output_path = os.path.join(output_dir, "processed_arrivals.csv")
         df.to_csv(output_path, index=False)
+        record_rows(rows_out=len(df))
         print(f"Processed arrivals saved to: {output_path}")
+        return output_path
 
     except Exception as e:
         print(f"Error processing {file_path}: {e}")
 
-# ... (imports and function definition)
-
 # --- Main Batch Execution ---
 
 if __name__ == "__main__":
-    # Define the base directory relative to this script
-    script_dir = os.path.dirname(__file__)
-    base_dir = os.path.join(script_dir, "../DataSet/Maharashtra/Wheat")
-    
-    years = ["2021", "2022", "2023"]
-    months = [
-        "January", "February", "Febraury ", "March", "April", "May", "June", 
-        "July", "August", "September", "Septemeber", "October", "November", "Novemeber", "December"
-    ]
-
-    print("Starting batch processing for Arrivals (2021-2022)...")
-
-    for year in years:
-        for month in months:
-            # Check for both "arrivals.csv" and "arrival.csv"
-            possible_files = ["arrivals.csv", "arrival.csv"]
-            
-            # Check directory existence first (some might have typos like "Febraury ")
-            month_dir = os.path.join(base_dir, year, month)
-            
-            if os.path.exists(month_dir):
-                for filename in possible_files:
-                    file_path = os.path.join(month_dir, filename)
-                    if os.path.exists(file_path):
-                        process_arrivals(file_path)
-                        # Stop after finding one valid file to avoid duplicates if both exist (unlikely)
-                        break
-
-    print("\nBatch processing for Arrivals complete.")
+    # Imputes every series (all states/commodities/years) with its history, in a process pool
+    from IngestRaw import ingest_raw
+    ingest_raw(kinds=("arrivals",))
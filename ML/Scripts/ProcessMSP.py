@@ -5,15 +5,28 @@ import os
 import re
 from sklearn.linear_model import LinearRegression
 
-def process_msp():
-    script_dir = os.path.dirname(__file__)
-    dataset_dir = os.path.join(script_dir, "../DataSet")
-    pdf_path = os.path.join(dataset_dir, "Maharashtra/External Factors/msp.pdf")
-    main_csv_path = os.path.join(dataset_dir, "main.csv")
-    
+from LookupTables import attach
+from Storage import write_dataset
+
+def transform_msp(df_main, pdf_path):
+    """
+    Returns df_main with the msp column for its Year, or None if msp.pdf is
+    missing or has no MSP rows for Wheat.
+    """
+    table = msp_table(pdf_path, df_main['Year'].unique())
+    if table is None:
+        return None
+    return attach(df_main.copy(), [table])
+
+def msp_table(pdf_path, years):
+    """
+    The Year -> msp lookup table of Wheat from msp.pdf, with the years
+    before the PDF predicted by linear regression. None if msp.pdf is
+    missing or has no MSP rows for Wheat.
+    """
     if not os.path.exists(pdf_path):
         print(f"File not found: {pdf_path}")
-        return
+        return None
 
     # --- Step 1: Extract Text from PDF ---
     print("Reading PDF...")
@@ -23,46 +36,57 @@ def process_msp():
         full_text += page.extract_text() + "\n"
         
     # --- Step 2: Parse Wheat MSP ---
-    # Looking for line: "15 Wheat 2015 2125 2275 2425 2585"
-    # Column headers in PDF: 2022-23, 2023-24, 2024-25, 2025-26, 2026-27
-    # So 2015 corresponds to 2022-23 (Marketing Season usually is Year+1 for Rabi? No, typically listed as Year-Year+1)
-    # Let's re-verify headers from inspection output:
-    # "RABI CROPS RMS 2022-23 RMS 2023-24 RMS 2024-25 RMS 2025-26 RMS 2026-27"
-    # "15 Wheat 2015 2125 2275 2425 2585"
-    
-    # So:
-    # 2022-23 -> 2015
-    # 2023-24 -> 2125
-    # 2024-25 -> 2275
-    # 2025-26 -> 2425
-    # 2026-27 -> 2585
-    
-    # Our data in main.csv has "Year".
-    # Prices for "2022" (calendar year) likely fall under RMS 2022-23 (marketed in early 2022).
-    # Prices for "2021" (calendar year) likely fall under RMS 2021-22.
-    
-    # We DO NOT have 2021-22 in the PDF.
-    # We have years: 2022, 2023, 2024, 2025, 2026 (taken as the start year of the RMS pair)
-    years_x = np.array([2022, 2023, 2024, 2025, 2026]).reshape(-1, 1)
-    msp_y = np.array([2015, 2125, 2275, 2425, 2585])
-    
-    print(f"Extracted MSP Data points: \nYears: {years_x.flatten()}\nMSP: {msp_y}")
-    
-    # --- Step 3: Predict 2021 ---
-    print("Predicting 2021 MSP using Linear Regression...")
-    model = LinearRegression()
-    model.fit(years_x, msp_y)
-    
-    # Predict for 2021
-    msp_2021_pred = model.predict([[2021]])[0]
-    print(f"Predicted MSP for 2021: {msp_2021_pred:.2f}")
-    
-    # Values to use
-    msp_2021 = msp_2021_pred
-    msp_2022 = 2015 # From PDF directly
-    msp_2023 = 2125 # From PDF directly (RMS 2023-24)
+    # Looking for the header "RABI CROPS RMS 2022-23 RMS 2023-24 ..." and the
+    # line "15 Wheat 2015 2125 2275 2425 2585"
+    # Prices for "2022" (calendar year) likely fall under RMS 2022-23 (marketed in early 2022),
+    # so every RMS is taken as its start year.
+    table = parse_msp(full_text, crop='Wheat')
+    if table is None:
+        print("Error: Wheat MSP not found in msp.pdf")
+        return None
+
+    print(f"Extracted MSP Data points: \nYears: {table['Year'].to_numpy()}\nMSP: {table['msp'].to_numpy()}")
+
+    # --- Step 3: Predict years before the PDF ---
+    # Years after it are forward filled from the latest year when attached
+    earlier_years = sorted(int(y) for y in years if y < table['Year'].min())
+    if earlier_years:
+        print(f"Predicting {', '.join(map(str, earlier_years))} MSP using Linear Regression...")
+        model = LinearRegression()
+        model.fit(table[['Year']].to_numpy(), table['msp'].to_numpy())
+        predicted = model.predict(np.array(earlier_years).reshape(-1, 1))
+        for year, value in zip(earlier_years, predicted):
+            print(f"Predicted MSP for {year}: {value:.2f}")
+        table = pd.concat([pd.DataFrame({'Year': earlier_years, 'msp': predicted}), table], ignore_index=True)
+    return table
+
+def parse_msp(text, crop):
+    """
+    Returns the Year -> msp table of crop from the text of msp.pdf (Rabi
+    Marketing Seasons, e.g. RMS 2022-23 is used for 2022), or None if the
+    season header or the crop line is not found.
+    """
+    years = None
+    for line in text.splitlines():
+        seasons = re.findall(r'RMS\s+(\d{4})-\d{2}', line)
+        if seasons:
+            years = [int(y) for y in seasons]
+            continue
+        match = re.match(rf'\s*\d+\s+{re.escape(crop)}\s+([\d\s]+)$', line)
+        if years and match:
+            values = [int(v) for v in match.group(1).split()]
+            return pd.DataFrame({'Year': years[:len(values)], 'msp': values[:len(years)]})
+    return None
+
+def process_msp():
+    script_dir = os.path.dirname(__file__)
+    dataset_dir = os.path.join(script_dir, "../DataSet")
+    pdf_path = os.path.join(dataset_dir, "Maharashtra/External Factors/msp.pdf")
+    main_csv_path = os.path.join(dataset_dir, "main.csv")
     
-    print(f"Using - 2021: {msp_2021:.2f}, 2022: {msp_2022}, 2023: {msp_2023}")
+    if not os.path.exists(pdf_path):
+        print(f"File not found: {pdf_path}")
+        return
 
     # --- Step 4: Update main.csv ---
     if not os.path.exists(main_csv_path):
@@ -71,22 +95,12 @@ def process_msp():
         
     print("Updating main.csv...")
     df_main = pd.read_csv(main_csv_path)
-    
-    # Function to assign MSP based on Year
-    def get_msp(year):
-        if year == 2021:
-            return msp_2021
-        elif year == 2022:
-            return msp_2022
-        elif year == 2023:
-            return msp_2023
-        else:
-            return None
-            
-    df_main['msp'] = df_main['Year'].apply(get_msp)
+    df_main = transform_msp(df_main, pdf_path)
+    if df_main is None:
+        return
     
     # Save
-    df_main.to_csv(main_csv_path, index=False)
+    write_dataset(df_main, csv_path=main_csv_path)
     print(f"Successfully updated main.csv with MSP data.")
     print("First 5 rows:")
     print(df_main[['Year', 'Month', 'msp']].head())
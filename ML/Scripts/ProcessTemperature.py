@@ -4,15 +4,36 @@ import os
 from sklearn.experimental import enable_iterative_imputer
 from sklearn.impute import IterativeImputer
 
-def process_temperature():
-    script_dir = os.path.dirname(__file__)
-    dataset_dir = os.path.join(script_dir, "../DataSet")
-    temp_csv_path = os.path.join(dataset_dir, "Maharashtra/External Factors/Temprature.csv")
-    main_csv_path = os.path.join(dataset_dir, "main.csv")
-    
+from LookupTables import attach
+from Storage import write_dataset
+
+# Season columns of Temprature.csv and the months they cover
+SEASON_MONTHS = {
+    'JAN-FEB': ['January', 'February'],
+    'MAR-MAY': ['March', 'April', 'May'],
+    'JUN-SEP': ['June', 'July', 'August', 'September'],
+    'OCT-DEC': ['October', 'November', 'December']
+}
+
+def transform_temperature(df_main, temp_csv_path):
+    """
+    Returns df_main with the season-wise Temperature column for its Year/Month,
+    or None if Temprature.csv is missing.
+    """
+    table = temperature_table(temp_csv_path, df_main['Year'].max())
+    if table is None:
+        return None
+    return attach(df_main.copy(), [table])
+
+def temperature_table(temp_csv_path, max_year):
+    """
+    The (Year, Month) -> Temperature lookup table of Temprature.csv (the
+    temperature of the month's season), imputed up to the year after its
+    latest one when max_year is later. None if the file is missing.
+    """
     if not os.path.exists(temp_csv_path):
         print(f"File not found: {temp_csv_path}")
-        return
+        return None
 
     print("Loading Temprature.csv...")
     # Load and clean data (handle junk at end)
@@ -29,11 +50,14 @@ def process_temperature():
     df_temp = df_temp.dropna(subset=['YEAR'])
     df_temp['YEAR'] = df_temp['YEAR'].astype(int)
     
-    # Check if 2022 exists
-    if 2022 not in df_temp['YEAR'].values:
-        print("2022 data missing. preparing for imputation...")
-        # Append 2022 row
-        new_row = pd.DataFrame({'YEAR': [2022], 'ANNUAL': [np.nan], 
+    # The year after the latest recorded one is estimated by the imputer;
+    # years after that are forward filled from it when attached
+    last_year = df_temp['YEAR'].max()
+    if max_year > last_year:
+        next_year = last_year + 1
+        print(f"{next_year} data missing. preparing for imputation...")
+        # Append next_year row
+        new_row = pd.DataFrame({'YEAR': [next_year], 'ANNUAL': [np.nan], 
                                 'JAN-FEB': [np.nan], 'MAR-MAY': [np.nan],
                                 'JUN-SEP': [np.nan], 'OCT-DEC': [np.nan]})
         df_temp = pd.concat([df_temp, new_row], ignore_index=True)
@@ -46,14 +70,27 @@ def process_temperature():
     df_imputed = pd.DataFrame(df_imputed_array, columns=cols)
     df_imputed['YEAR'] = df_imputed['YEAR'].astype(int)
     
-    # Extract 2021 and 2022 data for quick lookup
-    temp_2021 = df_imputed[df_imputed['YEAR'] == 2021].iloc[0]
-    temp_2022 = df_imputed[df_imputed['YEAR'] == 2022].iloc[0]
-    
     print("\nTemperature Data (Season-wise):")
-    print(f"2021: {temp_2021.to_dict()}")
-    print(f"2022: {temp_2022.to_dict()}")
+    for _, row in df_imputed.tail(2).iterrows():
+        print(f"{int(row['YEAR'])}: {row.to_dict()}")
+
+    # (Year, Month) -> Temperature of the month's season
+    table = df_imputed.rename(columns={'YEAR': 'Year'}).melt(
+        id_vars='Year', value_vars=list(SEASON_MONTHS), var_name='Season', value_name='Temperature'
+    )
+    table['Month'] = table['Season'].map(SEASON_MONTHS)
+    return table.explode('Month')[['Year', 'Month', 'Temperature']]
+
+def process_temperature():
+    script_dir = os.path.dirname(__file__)
+    dataset_dir = os.path.join(script_dir, "../DataSet")
+    temp_csv_path = os.path.join(dataset_dir, "Maharashtra/External Factors/Temprature.csv")
+    main_csv_path = os.path.join(dataset_dir, "main.csv")
     
+    if not os.path.exists(temp_csv_path):
+        print(f"File not found: {temp_csv_path}")
+        return
+
     # --- Merge into main.csv ---
     if not os.path.exists(main_csv_path):
         print(f"Error: {main_csv_path} not found.")
@@ -61,38 +98,12 @@ def process_temperature():
         
     print("\nUpdating main.csv...")
     df_main = pd.read_csv(main_csv_path)
-    
-    # Helper to map Month to Season Column
-    def get_temperature(row):
-        year = row['Year']
-        month = row['Month']
-        
-        # Select appropriate year data
-        if year == 2021:
-            data = temp_2021
-        elif year == 2022:
-            data = temp_2022
-        elif year == 2023: # Use 2022 data for 2023
-            data = temp_2022
-        else:
-            return None # Should not happen for this dataset
-            
-        # Map Month to Season
-        if month in ['January', 'February']:
-            return data['JAN-FEB']
-        elif month in ['March', 'April', 'May']:
-            return data['MAR-MAY']
-        elif month in ['June', 'July', 'August', 'September']:
-            return data['JUN-SEP']
-        elif month in ['October', 'November', 'December']:
-            return data['OCT-DEC']
-        else:
-            return None
-
-    df_main['Temperature'] = df_main.apply(get_temperature, axis=1)
+    df_main = transform_temperature(df_main, temp_csv_path)
+    if df_main is None:
+        return
     
     # Save
-    df_main.to_csv(main_csv_path, index=False)
+    write_dataset(df_main, csv_path=main_csv_path)
     print(f"Successfully updated main.csv with Temperature data.")
     print("First 5 rows:")
     print(df_main[['Year', 'Month', 'Temperature']].head())
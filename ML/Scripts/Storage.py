@@ -0,0 +1,136 @@
+import os
+import shutil
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(__file__)
+DATASET_DIR = os.path.join(SCRIPT_DIR, "../DataSet")
+
+# Canonical columnar copy of main.csv, hive-partitioned as
+# main_parquet/State=.../Commodity=.../Year=.../part-0.parquet
+PARQUET_DIR = os.path.join(DATASET_DIR, "main_parquet")
+MAIN_CSV_PATH = os.path.join(DATASET_DIR, "main.csv")
+
+PARTITION_COLS = ["State", "Commodity", "Year"]
+# Low-cardinality strings are stored dictionary-encoded
+CATEGORY_COLS = ["State", "Commodity", "Month", "Market"]
+
+
+def write_dataset(df, parquet_dir=PARQUET_DIR, csv_path=MAIN_CSV_PATH):
+    """
+    Writes the main dataset as partitioned Parquet and, if csv_path is given,
+    exports main.csv as well.
+
+    main.csv is written to a temporary file and renamed over the old one
+    first. The new Parquet tree is then written next to the old one and
+    swapped in with two renames; between them there is no Parquet directory
+    for a moment, and read_dataset falls back to the (already new) main.csv.
+    read_dataset therefore returns the old or the new dataset, never a
+    half-written one. Without csv_path (or for readers opening the Parquet
+    directory themselves) the dataset is briefly missing during the swap.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(df.columns)
+    typed = df.copy()
+    typed['Year'] = typed['Year'].astype(int)
+    for col in CATEGORY_COLS:
+        if col in typed.columns:
+            typed[col] = typed[col].astype('category')
+
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+    # Column order of main.csv, restored on read (partition columns come back last)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"ace_columns": ",".join(columns).encode()})
+
+    if csv_path is not None:
+        tmp_csv = csv_path + ".tmp"
+        df.to_csv(tmp_csv, index=False)
+        os.replace(tmp_csv, csv_path)
+        print(f"Exported {csv_path}")
+
+    tmp_dir = parquet_dir + ".tmp"
+    old_dir = parquet_dir + ".old"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    pq.write_to_dataset(table, tmp_dir, partition_cols=PARTITION_COLS, basename_template="part-{i}.parquet")
+    if os.path.exists(parquet_dir):
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.rename(parquet_dir, old_dir)
+    os.rename(tmp_dir, parquet_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"Saved {len(df)} rows to {parquet_dir}")
+
+
+def _column_order(parquet_dir):
+    import pyarrow.parquet as pq
+    for root, _, files in os.walk(parquet_dir):
+        for name in files:
+            if name.endswith(".parquet"):
+                metadata = pq.read_schema(os.path.join(root, name)).metadata or {}
+                if b"ace_columns" in metadata:
+                    return metadata[b"ace_columns"].decode().split(",")
+    return None
+
+
+def read_dataset(columns=None, filters=None, parquet_dir=PARQUET_DIR, csv_path=MAIN_CSV_PATH, categorical=False):
+    """
+    Loads the main dataset.
+
+    Only the requested columns are read, and filters (pyarrow DNF, e.g.
+    [("State", "==", "Maharashtra"), ("Year", "<=", 2022)]) prune whole
+    partitions before any data is read. Files are memory-mapped. Columns come
+    back in main.csv order with plain types (str, int Year) unless
+    categorical=True keeps the dictionary-encoded strings as pandas categories.
+
+    Falls back to main.csv when the Parquet dataset has not been written yet.
+    Raises FileNotFoundError if neither exists.
+    """
+    if not os.path.exists(parquet_dir):
+        # Filter columns are read too, then dropped unless requested
+        filter_cols = [col for col, _, _ in filters or []]
+        usecols = None if columns is None else list(dict.fromkeys(list(columns) + filter_cols))
+        df = pd.read_csv(csv_path, usecols=usecols)
+        for col, op, value in filters or []:
+            df = df[_compare(df[col], op, value)]
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        return df.reset_index(drop=True)
+
+    import pyarrow.parquet as pq
+    table = pq.read_table(parquet_dir, columns=columns, filters=filters, memory_map=True)
+    df = table.to_pandas()
+
+    order = columns or _column_order(parquet_dir)
+    if order:
+        df = df[[c for c in order if c in df.columns]]
+
+    if 'Year' in df.columns:
+        df['Year'] = df['Year'].astype(int)
+    if not categorical:
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+
+def _compare(series, op, value):
+    if op == "==":
+        return series == value
+    if op == "!=":
+        return series != value
+    if op == "<":
+        return series < value
+    if op == "<=":
+        return series <= value
+    if op == ">":
+        return series > value
+    if op == ">=":
+        return series >= value
+    if op == "in":
+        return series.isin(value)
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+if __name__ == "__main__":
+    # Convert the current main.csv into the Parquet dataset
+    print(f"Loading {MAIN_CSV_PATH}...")
+    write_dataset(pd.read_csv(MAIN_CSV_PATH), csv_path=None)
@@ -0,0 +1,107 @@
+import argparse
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+from DataSetIndex import MONTHS
+
+SCRIPT_DIR = os.path.dirname(__file__)
+# External factor files are copied from the real dataset (they do not depend on the scale)
+EXTERNAL_FACTORS_DIR = os.path.join(SCRIPT_DIR, "../DataSet/Maharashtra/External Factors")
+
+COMMODITY_NAMES = ["Wheat", "Jowar", "Bajra", "Maize", "Gram", "Tur", "Soyabean", "Cotton"]
+
+
+def commodity_names(n):
+    return [COMMODITY_NAMES[i] if i < len(COMMODITY_NAMES) else f"Crop{i + 1}" for i in range(n)]
+
+
+def market_names(n):
+    return [f"Market {i + 1:04d} APMC" for i in range(n)]
+
+
+def synthetic_series(n_markets, n_periods, rng, base, volatility, seasonality):
+    """markets x months matrix: a seasonal random walk around a per-market level."""
+    level = base * rng.uniform(0.7, 1.3, size=(n_markets, 1))
+    phase = rng.uniform(0, 2 * np.pi, size=(n_markets, 1))
+    season = 1 + seasonality * np.sin(2 * np.pi * np.arange(n_periods) / 12 + phase)
+    walk = np.exp(np.cumsum(rng.normal(0, volatility, size=(n_markets, n_periods)), axis=1))
+    return level * season * walk
+
+
+def _write_raw_file(path, title, header, markets, columns, missing, rng):
+    """Writes one raw file like the downloaded ones: a title row, then Market and three value columns."""
+    values = {}
+    for name, column in zip(header[1:4], columns):
+        text = np.round(column, 2).astype(str).astype(object)
+        text[rng.random(len(column)) < missing] = "-"
+        values[name] = text
+    df = pd.DataFrame({header[0]: markets, **values, header[4]: "-", header[5]: "-"})
+    with open(path, "w") as f:
+        f.write(f',,,"{title}",,\n')
+        df.to_csv(f, index=False)
+
+
+def write_raw_tree(dataset_dir, markets=200, months=36, commodities=1, end_year=2023,
+                   missing=0.05, coverage=0.9, seed=42, external_factors_dir=EXTERNAL_FACTORS_DIR):
+    """
+    Writes a synthetic raw dataset under dataset_dir in the layout of
+    ML/DataSet: Maharashtra/{Commodity}/{Year}/{Month}/prices.csv and
+    arrivals.csv for the months months up to December of end_year, plus a
+    copy of the external factor files. The pipeline turns it into the
+    main.csv schema.
+
+    Every market reports in a file with probability coverage, and each
+    reported value is missing ("-") with probability missing, so ingestion
+    has gaps to fill. Returns the number of raw files written.
+    """
+    rng = np.random.default_rng(seed)
+    names = market_names(markets)
+    # Raw files also report the previous month and the same month a year before
+    n_periods = months + 12
+    first_period = end_year * 12 + 12 - n_periods
+
+    n_files = 0
+    for commodity in commodity_names(commodities):
+        series = {
+            "prices": synthetic_series(markets, n_periods, rng, base=2000, volatility=0.03, seasonality=0.05),
+            "arrivals": synthetic_series(markets, n_periods, rng, base=500, volatility=0.15, seasonality=0.3),
+        }
+        for p in range(12, n_periods):
+            year, month = divmod(first_period + p, 12)
+            month_dir = os.path.join(dataset_dir, "Maharashtra", commodity, str(year), MONTHS[month])
+            os.makedirs(month_dir, exist_ok=True)
+            reported = rng.random(markets) < coverage
+
+            for kind, unit, file_name in [("prices", "Rs./Quintal", "prices.csv"), ("arrivals", "Quintal", "arrivals.csv")]:
+                label = kind.capitalize()
+                header = [
+                    "Market",
+                    f"{label} {MONTHS[month]}, {year} ({unit})",
+                    f"{label} {MONTHS[(month - 1) % 12]}, {year - (month == 0)} ({unit})",
+                    f"{label} {MONTHS[month]}, {year - 1} ({unit})",
+                    "Change (Over Previous Month)",
+                    "Change (Over Previous Year)",
+                ]
+                values = series[kind][reported]
+                title = f"Market-wise Wholesale {label} Monthly Analysis (All Districts) for {commodity} in Maharashtra - {MONTHS[month]}, {year}"
+                _write_raw_file(os.path.join(month_dir, file_name), title, header, np.array(names)[reported],
+                                [values[:, p], values[:, p - 1], values[:, p - 12]], missing, rng)
+                n_files += 1
+
+    shutil.copytree(external_factors_dir, os.path.join(dataset_dir, "Maharashtra", "External Factors"), dirs_exist_ok=True)
+    return n_files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic raw dataset (markets x months x commodities).")
+    parser.add_argument("dataset_dir", help="Output directory (used as the pipeline's DataSet directory)")
+    parser.add_argument("--markets", type=int, default=200)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--commodities", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    n_files = write_raw_tree(args.dataset_dir, markets=args.markets, months=args.months,
+                             commodities=args.commodities, seed=args.seed)
+    print(f"Wrote {n_files} raw files to {args.dataset_dir}")
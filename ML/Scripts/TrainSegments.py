@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Storage import read_dataset
+from ModelRegistry import MODEL_FILE, atomic_write_text, publish_model
+from ForecastPrices import (
+    BACKENDS, FEATURES, TARGET, TRAINING_COLUMNS,
+    segment_key, load_tuned_entry, prepare_data, resolve_params, build_model, fit_model, validation_metrics
+)
+
+SCRIPT_DIR = os.path.dirname(__file__)
+MODEL_DIR = os.path.join(SCRIPT_DIR, "../Model")
+REGISTRY_PATH = os.path.join(MODEL_DIR, "registry.json")
+
+
+def discover_segments():
+    """Returns every (State, Commodity) pair present in the dataset."""
+    df = read_dataset(columns=['State', 'Commodity'])
+    return sorted(set(zip(df['State'], df['Commodity'])))
+
+
+def train_segment(task):
+    """
+    Worker: trains one State/Commodity model and publishes it as a new
+    version under Model/segments/<State>_<Commodity>/ (see ModelRegistry).
+
+    Validates on val_year (default: the segment's latest year) and trains on
+    every earlier year. Returns the registry entry, or a dict with an error.
+    """
+    state, commodity, val_year, backend = task
+    key = segment_key(state, commodity)
+    start = time.perf_counter()
+
+    df = read_dataset(columns=TRAINING_COLUMNS, filters=[('State', '==', state), ('Commodity', '==', commodity)])
+    df, le_market = prepare_data(df)
+    df_clean = df.dropna(subset=FEATURES + [TARGET])
+
+    years = sorted(df_clean['Year'].unique().tolist())
+    if not years:
+        return {"key": key, "error": "no complete rows"}
+    if val_year is None:
+        val_year = years[-1]
+    train_mask = df_clean['Year'] < val_year
+    val_mask = df_clean['Year'] == val_year
+    if not train_mask.any() or not val_mask.any():
+        return {"key": key, "error": f"needs data for {val_year} and at least one earlier year (has {years})"}
+
+    X_train = df_clean.loc[train_mask, FEATURES]
+    y_train = df_clean.loc[train_mask, TARGET]
+    X_val = df_clean.loc[val_mask, FEATURES]
+    y_val = df_clean.loc[val_mask, TARGET]
+
+    # Tuned for this segment (TuneModel.py), else the defaults
+    params, params_source = resolve_params(backend, state=state, commodity=commodity)
+    model = build_model(backend, n_markets=len(le_market.classes_), params=params)
+    fit_model(model, X_train, y_train, X_val, y_val)
+    metrics = validation_metrics(model, X_val, y_val)
+
+    entry = {
+        "state": state,
+        "commodity": commodity,
+        "backend": backend,
+        "hyperparameters": params,
+        "params_source": params_source,
+        "tuning": load_tuned_entry(backend, state, commodity).get("cv") if params_source == "tuned" else None,
+        "features": FEATURES,
+        "markets": le_market.classes_.tolist(),
+        "train_years": sorted(df_clean.loc[train_mask, 'Year'].unique().tolist()),
+        "val_year": int(val_year),
+        "rows_train": int(train_mask.sum()),
+        "rows_val": int(val_mask.sum()),
+        "metrics": metrics
+    }
+    # A new version directory: the registry (and a running API) keep using
+    # the previous one until the registry is replaced
+    versions_dir = os.path.join(MODEL_DIR, "segments", f"{state}_{commodity}".replace(" ", "_"))
+    version_dir = publish_model(model, {"name": key, **entry}, versions_dir)
+    artifact = os.path.relpath(os.path.join(version_dir, MODEL_FILE), MODEL_DIR)
+
+    return {
+        "key": key,
+        **entry,
+        "artifact": artifact,
+        "version": os.path.basename(version_dir),
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def write_registry(entries, registry_path=REGISTRY_PATH):
+    registry = {"segments": {entry.pop("key"): entry for entry in entries}}
+    atomic_write_text(registry_path, json.dumps(registry, indent=2))
+    return registry
+
+
+def train_all_segments(workers=None, val_year=None, backend="gbr"):
+    """
+    Trains one model per State/Commodity segment across a process pool and
+    writes Model/registry.json mapping each segment to its artifact.
+    """
+    segments = discover_segments()
+    print(f"Training {len(segments)} segments: {', '.join(segment_key(s, c) for s, c in segments)}")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(train_segment, [(s, c, val_year, backend) for s, c in segments]))
+
+    trained = [r for r in results if "error" not in r]
+    for r in results:
+        if "error" in r:
+            print(f"  Skipped {r['key']}: {r['error']}")
+        else:
+            m = r["metrics"]
+            print(f"  {r['key']}: train {r['train_years']} / val {r['val_year']} "
+                  f"MAPE {m['mape']:.4f} RMSE {m['rmse']:.2f} R^2 {m['r2']:.4f} "
+                  f"({r['params_source']} hyperparameters, {r['seconds']:.2f}s)")
+
+    if not trained:
+        print("No segment could be trained; registry not updated.")
+        return None
+
+    registry = write_registry(trained)
+    print(f"Registry with {len(trained)} segments saved to: {REGISTRY_PATH} ({time.perf_counter() - start:.2f}s)")
+    return registry
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train one price model per State/Commodity segment.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--val-year", type=int, default=None, help="Validation year (default: latest year of each segment)")
+    parser.add_argument("--backend", choices=BACKENDS, default="gbr", help="Model backend (default: gbr)")
+    args = parser.parse_args()
+    train_all_segments(workers=args.workers, val_year=args.val_year, backend=args.backend)
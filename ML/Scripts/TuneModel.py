@@ -0,0 +1,184 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
+
+from Storage import read_dataset
+from ForecastPrices import (
+    BACKENDS, FEATURES, TARGET, TRAINING_COLUMNS, TUNED_PARAMS_PATH,
+    segment_key, prepare_data, build_model, fit_model
+)
+
+# Candidate values per backend; grid search tries every combination,
+# random search samples --n-iter of them
+PARAM_GRID = {
+    "gbr": {
+        "n_estimators": [100, 200, 300],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [3, 4, 5, 6],
+    },
+    "hgb": {
+        "learning_rate": [0.05, 0.1, 0.2],
+        "max_depth": [3, 5, None],
+        "max_leaf_nodes": [15, 31, 63],
+        "l2_regularization": [0.0, 1.0],
+    },
+}
+
+
+def candidate_params(backend, search="grid", n_iter=10, seed=42):
+    grid = PARAM_GRID[backend]
+    names = list(grid)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    if search == "random" and n_iter < len(candidates):
+        candidates = random.Random(seed).sample(candidates, n_iter)
+    return candidates
+
+
+def walk_forward_folds(df, n_folds=6):
+    """
+    Rolling-origin folds by month. df must be sorted by period (Year, Month_Num).
+    Fold k tests on one of the last n_folds months and trains on every earlier
+    month, so each fold is just (test_start, test_end) row positions into df,
+    training on df[:test_start]: no per-fold copies of the data.
+    """
+    period = (df['Year'] * 12 + df['Month_Num']).to_numpy()
+    months = np.unique(period)
+    if len(months) <= n_folds:
+        raise ValueError(f"Need more than {n_folds} months of data, have {len(months)}")
+    folds = []
+    for month in months[-n_folds:]:
+        test_start = int(np.searchsorted(period, month, side='left'))
+        test_end = int(np.searchsorted(period, month, side='right'))
+        folds.append((test_start, test_end))
+    return folds
+
+
+# Fold data, set once per worker process by _init_worker
+_FOLD_DATA = {}
+
+
+def _init_worker(X, y, n_markets):
+    _FOLD_DATA.update(X=X, y=y, n_markets=n_markets)
+
+
+def _evaluate(task):
+    """Worker: fits one candidate on one fold and scores it on the fold's test month."""
+    candidate, fold_index, backend, params, (test_start, test_end) = task
+    X, y = _FOLD_DATA["X"], _FOLD_DATA["y"]
+    start = time.perf_counter()
+    model = build_model(backend, n_markets=_FOLD_DATA["n_markets"], params=params)
+    fit_model(model, X.iloc[:test_start], y.iloc[:test_start])
+    preds = model.predict(X.iloc[test_start:test_end])
+    y_test = y.iloc[test_start:test_end]
+    return {
+        "candidate": candidate,
+        "fold": fold_index,
+        "mape": float(mean_absolute_percentage_error(y_test, preds)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, preds))),
+        "seconds": time.perf_counter() - start
+    }
+
+
+def save_tuned_params(state, commodity, backend, entry, path=TUNED_PARAMS_PATH):
+    """Stores the best configuration of backend on a segment, keeping the other segments' and backends' entries."""
+    tuned = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            tuned = json.load(f)
+    tuned.setdefault(segment_key(state, commodity), {})[backend] = entry
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(tuned, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def tune(backend="gbr", search="grid", n_iter=10, n_folds=6, max_year=2021, workers=None,
+         state="Maharashtra", commodity="Wheat"):
+    """
+    Walk-forward cross-validation of the candidate hyperparameters across a
+    process pool. Candidates are ranked by mean MAPE over the folds and the
+    best one is written to Model/tuned_params.json under the segment, which
+    build_model (and so ForecastPrices.py / TrainSegments.py) reads for that
+    segment only.
+
+    Only years up to max_year are used. The default stops before 2022,
+    ForecastPrices' validation year, so its published validation metrics stay
+    out of sample.
+    """
+    df = read_dataset(columns=TRAINING_COLUMNS, filters=[('State', '==', state), ('Commodity', '==', commodity)])
+    df, le_market = prepare_data(df)
+    df = df[df['Year'] <= max_year].dropna(subset=FEATURES + [TARGET])
+    # Period order makes every training set a prefix of the data
+    df = df.sort_values(['Year', 'Month_Num'], kind='stable').reset_index(drop=True)
+
+    folds = walk_forward_folds(df, n_folds)
+    fold_months = [f"{df['Month'].iloc[start]} {df['Year'].iloc[start]}" for start, _ in folds]
+    candidates = candidate_params(backend, search, n_iter)
+    tasks = [
+        (c, k, backend, params, fold)
+        for c, params in enumerate(candidates)
+        for k, fold in enumerate(folds)
+    ]
+    print(f"{backend}: {len(candidates)} candidates x {len(folds)} folds ({', '.join(fold_months)})")
+
+    start = time.perf_counter()
+    # Fold data is sent once per worker, not with every task
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(df[FEATURES], df[TARGET], len(le_market.classes_))) as pool:
+        results = list(pool.map(_evaluate, tasks))
+    print(f"Evaluated {len(tasks)} fits in {time.perf_counter() - start:.2f}s")
+
+    scores = []
+    for c, params in enumerate(candidates):
+        fold_results = [r for r in results if r["candidate"] == c]
+        scores.append({
+            "params": params,
+            "mape": float(np.mean([r["mape"] for r in fold_results])),
+            "rmse": float(np.mean([r["rmse"] for r in fold_results])),
+            "fold_mape": [round(r["mape"], 6) for r in fold_results]
+        })
+    scores.sort(key=lambda s: s["mape"])
+
+    print(f"\n{'MAPE':>8} {'RMSE':>9}  params")
+    for s in scores[:10]:
+        print(f"{s['mape']:8.4f} {s['rmse']:9.2f}  {s['params']}")
+
+    best = scores[0]
+    save_tuned_params(state, commodity, backend, {
+        "params": best["params"],
+        "cv": {
+            "segment": segment_key(state, commodity),
+            "max_year": max_year,
+            "folds": fold_months,
+            "mape": best["mape"],
+            "rmse": best["rmse"],
+            "fold_mape": best["fold_mape"],
+            "search": search,
+            "candidates": len(candidates)
+        }
+    })
+    print(f"\nBest {backend} configuration saved to: {TUNED_PARAMS_PATH}")
+    return scores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune model hyperparameters with walk-forward cross-validation by month.")
+    parser.add_argument("--backend", choices=BACKENDS, default="gbr", help="Model backend (default: gbr)")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--n-iter", type=int, default=10, help="Candidates sampled by random search")
+    parser.add_argument("--folds", type=int, default=6, help="Number of test months (the latest months up to --max-year)")
+    parser.add_argument("--max-year", type=int, default=2021,
+                        help="Last year used for tuning (default: 2021, before ForecastPrices' validation year)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--state", default="Maharashtra", help="State of the segment to tune (default: Maharashtra)")
+    parser.add_argument("--commodity", default="Wheat", help="Commodity of the segment to tune (default: Wheat)")
+    args = parser.parse_args()
+    tune(backend=args.backend, search=args.search, n_iter=args.n_iter, n_folds=args.folds,
+         max_year=args.max_year, workers=args.workers, state=args.state, commodity=args.commodity)
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The scripts import each other as top-level modules (run from ML/Scripts)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../Scripts"))
+
+
+@pytest.fixture(autouse=True)
+def stage_log(tmp_path, monkeypatch):
+    """Stage records (see Instrumentation) go to a per-test file instead of ML/Logs."""
+    path = tmp_path / "stages.jsonl"
+    monkeypatch.setenv("STAGE_LOG", str(path))
+    monkeypatch.delenv("STAGE_PROFILE_DIR", raising=False)
+    return path
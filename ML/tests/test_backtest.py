@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import Backtest
+from Backtest import _init_worker, _run_origin, error_summary, month_label, origins
+from ForecastPrices import MONTH_MAP, TARGET, prepare_data
+from ImputeSeries import period_of
+
+MARKETS = ["Pune", "Nagpur", "Latur"]
+
+
+def backtest_frame(seed=0):
+    """Two years of 3 markets, prepared and period-sorted as backtest() does."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for market in MARKETS:
+        for year in (2021, 2022):
+            for month in MONTH_MAP:
+                price = rng.uniform(1800, 2600)
+                rows.append({
+                    "Year": year, "Month": month, "Market": market, TARGET: price,
+                    "Prev_Month price": price - rng.uniform(-50, 50), "Prev_2_Month price": price - rng.uniform(-80, 80),
+                    "Price_Velocity": rng.normal(), "Current_Month arrivals": rng.uniform(100, 900),
+                    "Prev_Month arrivals": rng.uniform(100, 900), "Rainfall_mm": rng.uniform(0, 300),
+                    "Rainfall_Lag": rng.uniform(0, 300), "Diesel_Price_Rs_per_Litre": 95.0,
+                    "Irrigation_Water_Usage_MCM": 225.0, "msp": 2015.0, "Temperature": 27.0,
+                })
+    df, _ = prepare_data(pd.DataFrame(rows))
+    df = df.assign(period=period_of(df['Year'], df['Month_Num']).astype(int))
+    return df.sort_values(['period', 'Market'], kind='stable').reset_index(drop=True)
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """The worker state of a backtest, set in this process."""
+    monkeypatch.setattr(Backtest, "_DATA", {})
+    df = backtest_frame()
+    _init_worker(df, len(MARKETS), "gbr", {"n_estimators": 10, "max_depth": 3})
+    return df
+
+
+def test_origins_leave_history_and_a_month_to_score():
+    period = np.repeat(np.arange(100, 112), 3)
+    assert origins(period, min_train_months=6) == list(range(105, 111))
+    assert origins(period, min_train_months=12) == []
+    assert month_label(period_of(2022, 3)) == "March 2022"
+
+
+def test_run_origin_scores_the_months_after_the_origin(worker):
+    df = worker
+    origin = period_of(2021, 12)
+    forecasts, timing = _run_origin((origin, 3))
+
+    assert timing["rows_train"] == len(MARKETS) * 12
+    assert len(forecasts) == len(MARKETS) * 3
+    assert sorted(forecasts["period"].unique()) == [origin + 1, origin + 2, origin + 3]
+    actual = df.set_index(["Market", "period"])[TARGET]
+    for _, row in forecasts.iterrows():
+        assert row["actual"] == actual[(row["Market"], row["period"])]
+        assert row["step"] == row["period"] - origin
+
+
+def test_run_origin_only_trains_on_the_past(worker):
+    df = worker
+    origin = period_of(2021, 12)
+    before, _ = _run_origin((origin, 2))
+    # Later prices change the scores, never the forecasts
+    Backtest._DATA["df"] = df.assign(**{TARGET: np.where(df["period"] > origin, df[TARGET] * 3, df[TARGET])})
+    after, _ = _run_origin((origin, 2))
+    np.testing.assert_allclose(after["predicted"], before["predicted"])
+    np.testing.assert_allclose(after["actual"], before["actual"] * 3)
+
+
+def test_months_without_a_price_are_not_scored(worker):
+    df = worker
+    origin = period_of(2021, 12)
+    Backtest._DATA["df"] = df.assign(**{TARGET: np.where(
+        (df["period"] == origin + 1) & (df["Market"] == "Pune"), 0.0, df[TARGET])})
+    forecasts, _ = _run_origin((origin, 2))
+    assert len(forecasts) == len(MARKETS) * 2 - 1
+    assert not ((forecasts["Market"] == "Pune") & (forecasts["step"] == 1)).any()
+
+
+def test_error_summary():
+    forecasts = pd.DataFrame({
+        "step": [1, 1, 2, 2], "Market": ["A", "B", "A", "B"],
+        "predicted": [90.0, 220.0, 100.0, 150.0], "actual": [100.0, 200.0, 100.0, 200.0],
+    })
+    summary = error_summary(forecasts, ["step"])
+    assert summary["step"].tolist() == [1, 2] and summary["n"].tolist() == [2, 2]
+    np.testing.assert_allclose(summary["mape"], [0.1, 0.125])
+    np.testing.assert_allclose(summary["rmse"], [np.sqrt((100 + 400) / 2), np.sqrt(2500 / 2)])
@@ -0,0 +1,57 @@
+import numpy as np
+
+from BenchmarkSuite import MIN_SECONDS, compare, flatten_metrics, latency_summary, run_benchmarks
+
+
+def results(stage_seconds=1.0, fit_seconds=2.0, per_second=100.0, markets=200):
+    return {
+        "scale": {"markets": markets, "months": 36, "commodities": 1, "seed": 42},
+        "pipeline": [{"stage": "merge", "seconds": stage_seconds}],
+        "training": [{"backend": "hgb", "fit_seconds": fit_seconds, "forecast_seconds": 0.5}],
+        "api": {"predict": {"per_second": per_second, "p95_ms": 4.0}, "predict_batch": "fastapi not installed"},
+    }
+
+
+def test_latency_summary():
+    summary = latency_summary([0.001, 0.002, 0.003, 0.004])
+    assert summary["requests"] == 4
+    assert np.isclose(summary["per_second"], 400.0)
+    assert np.isclose(summary["p50_ms"], 2.5)
+
+
+def test_flatten_metrics_marks_throughput_as_higher_is_better():
+    assert flatten_metrics(results()) == {
+        "pipeline.merge.seconds": (1.0, False),
+        "training.hgb.fit_seconds": (2.0, False),
+        "training.hgb.forecast_seconds": (0.5, False),
+        "api.predict.per_second": (100.0, True),
+        "api.predict.p95_ms": (0.004, False),
+    }
+
+
+def test_compare_flags_metrics_beyond_the_tolerance():
+    baseline = results()
+    assert compare(results(stage_seconds=1.2, per_second=80.0), baseline) == []
+
+    regressions = compare(results(stage_seconds=1.5, fit_seconds=1.0, per_second=60.0), baseline)
+    assert [r["metric"] for r in regressions] == ["pipeline.merge.seconds", "api.predict.per_second"]
+    assert np.isclose(regressions[0]["change"], 0.5) and np.isclose(regressions[1]["change"], -0.4)
+    assert compare(results(stage_seconds=1.5), baseline, tolerance=0.6) == []
+
+
+def test_compare_ignores_noise_and_new_metrics(capsys):
+    baseline = results(stage_seconds=MIN_SECONDS / 4)
+    current = results(stage_seconds=MIN_SECONDS / 2, markets=50)
+    current["training"].append({"backend": "gbr", "fit_seconds": 9.0, "forecast_seconds": 9.0})
+    assert compare(current, baseline) == []
+    assert "baseline scale" in capsys.readouterr().out
+
+
+def test_run_benchmarks_on_a_small_synthetic_dataset():
+    out = run_benchmarks(markets=4, months=24, commodities=2, backends=["hgb"], repeats=1, workers=1, api=False)
+    assert [s["stage"] for s in out["pipeline"]][-1] == "save"
+    assert out["scale"]["rows"] == out["pipeline"][-1]["rows_out"] > 0
+    assert [r["backend"] for r in out["training"]] == ["hgb"]
+    assert out["training"][0]["forecast_markets"] == 4
+    assert "api" not in out
+    assert set(flatten_metrics(out)) >= {"training.hgb.fit_seconds", "pipeline.save.seconds"}
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from FeatureEngine import (
+    CARRIED_COLUMNS, DERIVED, LAG_SPEC, RAINFALL_LAG_SPEC,
+    compute_features, expand_spec, lookback, next_month_features
+)
+
+
+def history(seed=0, months=7):
+    """Rows of 3 markets in shuffled order, Pune with a month missing."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for market in ["Solapur", "Nagpur", "Pune"]:
+        for month in range(1, months + 1):
+            if market == "Pune" and month == 4:
+                continue
+            rows.append({
+                "Market": market, "Year": 2022, "Month_Num": month,
+                "Current_Month price": rng.uniform(1800, 2600), "Prev_Month price": rng.uniform(1800, 2600),
+                "Current_Month arrivals": rng.uniform(100, 900), "Prev_Month arrivals": rng.uniform(100, 900),
+                "Rainfall_mm": rng.uniform(0, 300), "Diesel_Price_Rs_per_Litre": rng.uniform(90, 100),
+                "Irrigation_Water_Usage_MCM": 40.0, "msp": 2015.0, "Temperature": rng.uniform(20, 32),
+            })
+    return pd.DataFrame(rows).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def per_script_features(df):
+    """AddLagFeatures/AddRainfallLag/AddPriceVelocity before FeatureEngine (groupby shifts)."""
+    df = df.sort_values(by=["Market", "Year", "Month_Num"]).reset_index(drop=True)
+    df["Prev_2_Month price"] = df.groupby("Market")["Prev_Month price"].shift(1)
+    df["Prev_2_Month arrivals"] = df.groupby("Market")["Prev_Month arrivals"].shift(1)
+    df["Rainfall_Lag"] = df.groupby("Market")["Rainfall_mm"].shift(1)
+    df["Price_Velocity"] = df["Prev_Month price"] - df["Prev_2_Month price"]
+    return df
+
+
+def test_compute_features_matches_per_script_output():
+    df = history()
+    features = compute_features(df, {**LAG_SPEC, **RAINFALL_LAG_SPEC}, DERIVED)
+    pd.testing.assert_frame_equal(features, per_script_features(df))
+
+
+def test_compute_features_rolling_diff_and_pct_change():
+    df = pd.DataFrame({"Market": ["A"] * 4 + ["B"] * 2, "Year": 2022, "Month_Num": [1, 2, 3, 4, 1, 2],
+                       "x": [1.0, 2.0, 4.0, 8.0, 10.0, 30.0]})
+    spec = {"x": {"lags": [2], "rolling": {"mean": [2], "max": [3]}, "diffs": [1], "pct_changes": [1]}}
+    out = compute_features(df, spec)
+    np.testing.assert_allclose(out["x_lag2"], [np.nan, np.nan, 1.0, 2.0, np.nan, np.nan])
+    np.testing.assert_allclose(out["x_roll2_mean"], [np.nan, 1.5, 3.0, 6.0, np.nan, 20.0])
+    np.testing.assert_allclose(out["x_roll3_max"], [np.nan, np.nan, 4.0, 8.0, np.nan, np.nan])
+    np.testing.assert_allclose(out["x_diff1"], [np.nan, 1.0, 2.0, 4.0, np.nan, 20.0])
+    np.testing.assert_allclose(out["x_pct1"], [np.nan, 1.0, 1.0, 1.0, np.nan, 2.0])
+    assert lookback(spec) == 2
+
+
+def test_unknown_rolling_statistic_raises():
+    with pytest.raises(ValueError):
+        expand_spec({"x": {"rolling": {"median": [3]}}})
+
+
+def test_next_month_features_match_recursive_state():
+    df = history()
+    rows = next_month_features(df)
+    latest = df.sort_values(["Year", "Month_Num"]).groupby("Market").tail(1).set_index("Market")
+
+    # Markets in the order their latest rows appear in df
+    order = df.assign(p=np.arange(len(df))).sort_values(["Market", "Year", "Month_Num"]) \
+        .groupby("Market").tail(1).sort_values("p")["Market"].tolist()
+    assert rows["Market"].tolist() == order
+    rows = rows.set_index("Market").loc[latest.index]
+
+    # The state ForecastPrices carried from each market's latest month
+    np.testing.assert_allclose(rows["Prev_Month price"], latest["Current_Month price"])
+    np.testing.assert_allclose(rows["Prev_2_Month price"], latest["Prev_Month price"])
+    np.testing.assert_allclose(rows["Price_Velocity"], latest["Current_Month price"] - latest["Prev_Month price"])
+    np.testing.assert_allclose(rows["Prev_Month arrivals"], latest["Current_Month arrivals"])
+    np.testing.assert_allclose(rows["Rainfall_Lag"], latest["Rainfall_mm"])
+    for column in CARRIED_COLUMNS:
+        np.testing.assert_allclose(rows[column], latest[column])
+    assert (rows["Month_Num"] == latest["Month_Num"] % 12 + 1).all()
+
+
+def test_next_month_features_roll_over_the_year():
+    df = pd.DataFrame({"Market": ["A", "A"], "Year": [2021, 2021], "Month_Num": [11, 12],
+                       "Current_Month price": [10.0, 11.0], "Prev_Month price": [9.0, 10.0],
+                       "Current_Month arrivals": [1.0, 2.0], "Prev_Month arrivals": [1.0, 1.0],
+                       "Rainfall_mm": [5.0, 6.0], **{c: 0.0 for c in CARRIED_COLUMNS[2:]}})
+    row = next_month_features(df).iloc[0]
+    assert (row["Year"], row["Month_Num"]) == (2022, 1)
+
+
+def two_segments():
+    """Wheat and Onion histories of Maharashtra sharing market names, interleaved."""
+    wheat = history(seed=1).assign(State="Maharashtra", Commodity="Wheat")
+    onion = history(seed=2).assign(State="Maharashtra", Commodity="Onion")
+    return pd.concat([wheat, onion]).sample(frac=1, random_state=3).reset_index(drop=True)
+
+
+def test_compute_features_never_mixes_segments():
+    df = two_segments()
+    features = compute_features(df, {**LAG_SPEC, **RAINFALL_LAG_SPEC}, DERIVED)
+    assert features[["State", "Commodity", "Market"]].drop_duplicates().shape[0] == 6
+    for commodity, segment in df.groupby("Commodity"):
+        expected = per_script_features(segment.drop(columns=["State", "Commodity"]))
+        got = features[features["Commodity"] == commodity].drop(columns=["State", "Commodity"])
+        pd.testing.assert_frame_equal(got.reset_index(drop=True), expected[got.columns])
+
+
+def test_next_month_features_one_row_per_segment_market():
+    df = two_segments()
+    rows = next_month_features(df)
+    assert len(rows) == 6
+    for commodity, segment in df.groupby("Commodity"):
+        expected = next_month_features(segment.drop(columns=["State", "Commodity"])).set_index("Market")
+        got = rows[rows["Commodity"] == commodity].set_index("Market").loc[expected.index]
+        np.testing.assert_allclose(got["Prev_2_Month price"], expected["Prev_2_Month price"])
+        np.testing.assert_allclose(got["Rainfall_Lag"], expected["Rainfall_Lag"])
+        np.testing.assert_allclose(got["Prev_Month price"], expected["Prev_Month price"])
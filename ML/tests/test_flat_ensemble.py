@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+
+from FlatEnsemble import FlatEnsemble, export_flat, flat_path
+
+
+def data(rows=400, features=6, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features))
+    # Repeated values make rows land exactly on split thresholds
+    X[:, 0] = rng.integers(0, 20, rows)
+    y = 3 * X[:, 0] + np.sin(X[:, 1]) * 10 + X[:, 2] * X[:, 3] + rng.normal(size=rows)
+    return X, y
+
+
+@pytest.mark.parametrize("params", [
+    {"n_estimators": 50, "max_depth": 3},
+    {"n_estimators": 80, "max_depth": 5, "learning_rate": 0.05},
+    {"n_estimators": 30, "max_depth": 4, "loss": "absolute_error"},
+    {"n_estimators": 20, "max_depth": 3, "init": "zero"},
+])
+def test_predictions_match_sklearn_exactly(params):
+    X, y = data()
+    model = GradientBoostingRegressor(random_state=0, **params).fit(X, y)
+    flat = FlatEnsemble.from_model(model)
+    X_new, _ = data(seed=1)
+    for rows in (X, X_new, X_new[:1]):
+        np.testing.assert_array_equal(flat.predict(rows), model.predict(rows))
+
+
+def test_save_load_round_trip(tmp_path):
+    X, y = data()
+    model = GradientBoostingRegressor(n_estimators=20, max_depth=4, random_state=0).fit(X, y)
+    path = export_flat(model, str(tmp_path / "model.pkl"))
+    assert path == flat_path(str(tmp_path / "model.pkl")) == str(tmp_path / "model.flat.npz")
+    np.testing.assert_array_equal(FlatEnsemble.load(path).predict(X), model.predict(X))
+
+
+def test_other_models_are_not_flattened(tmp_path):
+    X, y = data()
+    model = HistGradientBoostingRegressor(max_iter=10).fit(X, y)
+    with pytest.raises(ValueError):
+        FlatEnsemble.from_model(model)
+    assert export_flat(model, str(tmp_path / "model.pkl")) is None
+
+
+def test_wrong_feature_count_raises():
+    X, y = data()
+    flat = FlatEnsemble.from_model(GradientBoostingRegressor(n_estimators=5, random_state=0).fit(X, y))
+    with pytest.raises(ValueError):
+        flat.predict(X[:, :3])
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error, r2_score
+
+from ForecastPrices import (
+    FEATURES, MONTH_MAP, TARGET, TRAINING_COLUMNS,
+    build_model, fit_model, prepare_data, recursive_forecast, staged_metrics
+)
+
+MONTHS = list(MONTH_MAP)
+MARKETS = ["Solapur", "Nagpur", "Pune", "Latur"]
+
+
+def training_frame(seed=0, years=(2021, 2022)):
+    """TRAINING_COLUMNS of a few markets with consistent price lags."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for market in MARKETS:
+        prices = rng.uniform(1800, 2600, size=12 * len(years) + 2)
+        for i, (year, month) in enumerate((y, m) for y in years for m in MONTHS):
+            rows.append({
+                "Year": year, "Month": month, "Market": market,
+                TARGET: prices[i + 2], "Prev_Month price": prices[i + 1], "Prev_2_Month price": prices[i],
+                "Price_Velocity": prices[i + 1] - prices[i],
+                "Current_Month arrivals": rng.uniform(100, 900), "Prev_Month arrivals": rng.uniform(100, 900),
+                "Rainfall_mm": rng.uniform(0, 300), "Rainfall_Lag": rng.uniform(0, 300),
+                "Diesel_Price_Rs_per_Litre": rng.uniform(90, 100), "Irrigation_Water_Usage_MCM": 40.0,
+                "msp": 2015.0, "Temperature": rng.uniform(20, 32),
+            })
+    return pd.DataFrame(rows)[TRAINING_COLUMNS]
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    df, _ = prepare_data(training_frame())
+    model = GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0)
+    model.fit(df[FEATURES], df[TARGET])
+    return model, df
+
+
+def per_market_forecast(model, df_base, future_months):
+    """The forecast loop before batching: one single-row predict per market and month."""
+    predicted = []
+    for _, row in df_base.iterrows():
+        current = row.copy()
+        prices = []
+        for _, month_num, year in future_months:
+            nxt = current.copy()
+            nxt["Year"], nxt["Month_Num"] = year, month_num
+            nxt["Prev_2_Month price"] = current["Prev_Month price"]
+            nxt["Prev_Month price"] = current[TARGET]
+            nxt["Price_Velocity"] = nxt["Prev_Month price"] - nxt["Prev_2_Month price"]
+            nxt["Prev_Month arrivals"] = current["Current_Month arrivals"]
+            nxt["Rainfall_Lag"] = current["Rainfall_mm"]
+            price = model.predict(pd.DataFrame([nxt[FEATURES].to_numpy(dtype=float)], columns=FEATURES))[0]
+            prices.append(price)
+            nxt[TARGET] = price
+            current = nxt
+        predicted.append(prices)
+    return np.array(predicted)
+
+
+def test_batched_forecast_matches_per_market_loop(fitted):
+    model, df = fitted
+    df_base = df[df["Year"] == 2021].sort_values(["Year", "Month_Num"]).groupby("Market").tail(1)
+    future_months = [("January", 1, 2022), ("February", 2, 2022), ("March", 3, 2022)]
+
+    predicted = recursive_forecast(model, df_base, future_months)
+    assert predicted.shape == (len(MARKETS), 3)
+    np.testing.assert_allclose(predicted, per_market_forecast(model, df_base, future_months))
+
+
+def test_forecast_rows_follow_the_base_order(fitted):
+    model, df = fitted
+    df_base = df[(df["Year"] == 2022) & (df["Month_Num"] == 12)]
+    future_months = [("January", 1, 2023), ("February", 2, 2023)]
+    predicted = recursive_forecast(model, df_base, future_months)
+
+    reversed_base = df_base.iloc[::-1]
+    np.testing.assert_allclose(recursive_forecast(model, reversed_base, future_months), predicted[::-1])
+    # The first step only depends on known values: the lags of each market's latest month
+    first = df_base[FEATURES].assign(**{
+        "Year": 2023, "Month_Num": 1,
+        "Prev_2_Month price": df_base["Prev_Month price"], "Prev_Month price": df_base[TARGET],
+        "Price_Velocity": df_base[TARGET] - df_base["Prev_Month price"],
+        "Prev_Month arrivals": df_base["Current_Month arrivals"], "Rainfall_Lag": df_base["Rainfall_mm"],
+    })
+    np.testing.assert_allclose(predicted[:, 0], model.predict(first[FEATURES]))
+
+
+def test_staged_metrics_match_sklearn_per_stage(fitted):
+    model, df = fitted
+    X, y = df[FEATURES], df[TARGET]
+    curves = staged_metrics(model, X, y)
+    stages = list(model.staged_predict(X))
+    assert [len(curves[name]) for name in ("mse", "r2", "mape")] == [model.n_estimators_] * 3
+    np.testing.assert_allclose(curves["mse"], [mean_squared_error(y, p) for p in stages])
+    np.testing.assert_allclose(curves["r2"], [r2_score(y, p) for p in stages])
+    np.testing.assert_allclose(curves["mape"], [mean_absolute_percentage_error(y, p) for p in stages])
+
+
+def test_staged_metrics_computes_only_the_requested_metrics(fitted):
+    model, df = fitted
+    curves = staged_metrics(model, df[FEATURES], df[TARGET], metrics=("r2",))
+    assert list(curves) == ["r2"]
+    # A constant target has no variance: R^2 is reported as 0 rather than dividing by zero
+    flat = staged_metrics(model, df[FEATURES].iloc[:5], np.full(5, 2000.0), metrics=("r2",))
+    assert flat["r2"] == [0.0] * model.n_estimators_
+
+
+def test_hgb_treats_the_market_as_categorical():
+    model = build_model("hgb", n_markets=len(MARKETS), params={"max_iter": 50})
+    assert isinstance(model, HistGradientBoostingRegressor)
+    assert model.categorical_features == ["Market_Encoded"] and model.early_stopping is True
+    # Beyond max_bins categories the market code is split on as a number
+    assert build_model("hgb", n_markets=300, params={}).categorical_features is None
+    assert isinstance(build_model("gbr", params={}), GradientBoostingRegressor)
+    with pytest.raises(ValueError, match="Unknown backend"):
+        build_model("xgb", params={})
+
+
+def test_hgb_stops_early_on_the_validation_set():
+    df, _ = prepare_data(training_frame(seed=1))
+    train, val = df[df["Year"] == 2021], df[df["Year"] == 2022]
+    model = build_model("hgb", n_markets=len(MARKETS), params={"max_iter": 500, "learning_rate": 0.3})
+    fit_model(model, train[FEATURES], train[TARGET], val[FEATURES], val[TARGET])
+    assert model.n_iter_ < 500
+    # One validation score per iteration, plus the initial one
+    assert len(model.validation_score_) == model.n_iter_ + 1
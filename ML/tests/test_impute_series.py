@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from ImputeSeries import FILL_METHODS, build_series, fill_series, impute_files
+
+OBSERVED, INTERPOLATED, SEASONAL, CARRIED = range(4)
+
+
+def series(values, start=0):
+    """One market's series over consecutive periods starting at period start."""
+    return pd.DataFrame([values], index=["A"], columns=range(start, start + len(values)), dtype=float)
+
+
+def test_interpolates_between_known_months_first():
+    filled, method = fill_series(series([100, np.nan, np.nan, 130]))
+    np.testing.assert_allclose(filled.iloc[0], [100, 110, 120, 130])
+    assert method[0].tolist() == [OBSERVED, INTERPOLATED, INTERPOLATED, OBSERVED]
+
+
+def test_edges_take_the_same_calendar_month_of_the_nearest_year():
+    # 25 months from period 0 (January): only the middle year is observed
+    values = [np.nan] * 12 + [float(m) for m in range(12)] + [np.nan]
+    filled, method = fill_series(series(values))
+    # Before the first known month: backward by calendar month
+    np.testing.assert_allclose(filled.iloc[0, :12], range(12))
+    # After the last known month: forward by calendar month
+    assert filled.iloc[0, 24] == 0.0
+    assert set(method[0, :12]) == {SEASONAL} and method[0, 24] == SEASONAL
+
+
+def test_seasonal_is_preferred_over_the_nearest_month():
+    # January known in year 1 only; year 2's January is seasonal, not carried
+    values = [50.0] + [np.nan] * 11 + [60.0, 61.0] + [np.nan] * 10 + [np.nan]
+    filled, method = fill_series(series(values))
+    assert filled.iloc[0, 24] == 60.0 and method[0, 24] == SEASONAL
+
+
+def test_carries_the_nearest_month_when_nothing_else_applies():
+    filled, method = fill_series(series([np.nan, 70.0, np.nan]))
+    np.testing.assert_allclose(filled.iloc[0], [70, 70, 70])
+    assert method[0].tolist() == [CARRIED, OBSERVED, CARRIED]
+
+
+def test_markets_without_observations_stay_empty():
+    wide = pd.concat([series([1.0, np.nan]), series([np.nan, np.nan]).rename(index={"A": "B"})])
+    filled, method = fill_series(wide)
+    assert filled.loc["B"].isna().all()
+    assert (method[1] == -1).all()
+    assert FILL_METHODS[method[0, 1]] == "carried"
+
+
+def raw_file(path, rows):
+    """A raw prices file: title row, header, then Market, Current, Previous, Same month last year."""
+    lines = ["Title", "Market,Current Month,Previous Month,Same Month Previous Year"]
+    lines += [",".join("-" if v is None else str(v) for v in row) for row in rows]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_build_series_prefers_the_file_of_the_month_itself(tmp_path):
+    frames = [
+        (24, pd.read_csv(raw_file(tmp_path / "a.csv", [("A", 10, 9, 5)]), header=1)),
+        (25, pd.read_csv(raw_file(tmp_path / "b.csv", [("A", 11, 99, 6)]), header=1)),
+    ]
+    wide = build_series(frames)
+    # Period 24 is reported by a.csv (current) and b.csv (previous): a.csv wins
+    assert wide.loc["A", 24] == 10 and wide.loc["A", 25] == 11
+    assert wide.loc["A", 23] == 9 and wide.loc["A", 12] == 5 and wide.loc["A", 13] == 6
+
+
+def test_impute_files_reads_gaps_from_the_series(tmp_path):
+    files = [
+        (24, raw_file(tmp_path / "a.csv", [("A", 10, 8, 5), ("B", 20, 19, 15)]), str(tmp_path / "a_out.csv")),
+        (25, raw_file(tmp_path / "b.csv", [("A", None, 10, 6), ("B", 21, 20, 16)]), str(tmp_path / "b_out.csv")),
+        (26, raw_file(tmp_path / "c.csv", [("A", 14, None, 7), ("B", 22, 21, 17)]), str(tmp_path / "c_out.csv")),
+    ]
+    file_seconds = {}
+    counts = impute_files(files, file_seconds)
+    assert sorted(file_seconds) == sorted(path for _, path, _ in files)
+    assert all(seconds > 0 for seconds in file_seconds.values())
+    b = pd.read_csv(tmp_path / "b_out.csv")
+    c = pd.read_csv(tmp_path / "c_out.csv")
+    # A's month 25 is missing everywhere: interpolated between 10 and 14
+    assert b.iloc[0, 1] == 12.0 and c.iloc[0, 2] == 12.0
+    assert counts["interpolated"] == 2 and counts["cross_section"] == 0
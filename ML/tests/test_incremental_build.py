@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from DataSetIndex import MONTH_MAP
+from AddLagFeatures import transform_lag_features
+from AddRainfallLag import transform_rainfall_lag
+from AddPriceVelocity import transform_price_velocity
+from IncrementalBuild import recompute_lag_rows
+
+MONTHS = list(MONTH_MAP)[:8]
+MARKETS = ["Nagpur", "Pune", "Solapur"]
+
+
+def core_frame(seed=0):
+    """main.csv rows before the lag features: 3 markets x 8 months of 2022."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for market in MARKETS:
+        for month in MONTHS:
+            rows.append({
+                "State": "Maharashtra", "Commodity": "Wheat", "Year": 2022, "Month": month, "Market": market,
+                "Current_Month price": rng.uniform(1800, 2600), "Prev_Month price": rng.uniform(1800, 2600),
+                "Current_Month arrivals": rng.uniform(100, 900), "Prev_Month arrivals": rng.uniform(100, 900),
+                "Rainfall_mm": rng.uniform(0, 300), "Diesel_Price_Rs_per_Litre": 95.0,
+                "Irrigation_Water_Usage_MCM": 40.0, "Area": 1000.0, "Production": 2000.0, "Yield": 2.0,
+                "msp": 2015.0, "Temperature": 27.0,
+            })
+    return pd.DataFrame(rows)
+
+
+def full_rebuild(df):
+    return transform_price_velocity(transform_rainfall_lag(transform_lag_features(df)))
+
+
+def test_one_month_patch_matches_full_rebuild():
+    before = core_frame()
+    after = before.copy()
+    patched = (after["Market"] == "Pune") & (after["Month"] == "May")
+    after.loc[patched, ["Current_Month price", "Prev_Month price", "Rainfall_mm"]] = [2450.0, 2390.0, 120.0]
+
+    expected = full_rebuild(after)
+
+    # The previous build, with the patched month's row-local columns replaced
+    previous = full_rebuild(before)
+    df = previous.copy()
+    key = (df["Market"] == "Pune") & (df["Month"] == "May")
+    df.loc[key, ["Current_Month price", "Prev_Month price", "Rainfall_mm"]] = [2450.0, 2390.0, 120.0]
+    df["Month_Num"] = df["Month"].map(MONTH_MAP)
+    df = df.sort_values(by=["Market", "Year", "Month_Num"]).reset_index(drop=True)
+    dirty = (df["Market"] == "Pune") & (df["Month_Num"] >= MONTH_MAP["May"])
+
+    df = recompute_lag_rows(df, dirty)
+
+    columns = ["Prev_2_Month price", "Prev_2_Month arrivals", "Rainfall_Lag", "Price_Velocity"]
+    expected = expected.set_index(["Market", "Month"])
+    patched_rows = df[dirty].set_index(["Market", "Month"])
+    assert len(patched_rows) == 4
+    pd.testing.assert_frame_equal(patched_rows[columns], expected.loc[patched_rows.index, columns])
+    # Rows outside the patch keep the previous build's values (a full rebuild
+    # refits the imputer of the first months on the new data)
+    clean = df[~dirty].set_index(["Market", "Month"])
+    previous = previous.set_index(["Market", "Month"])
+    pd.testing.assert_frame_equal(clean[columns], previous.loc[clean.index, columns])
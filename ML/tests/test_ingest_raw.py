@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+
+from DataSetIndex import discover_partitions
+from IngestRaw import ingest_raw
+
+
+def raw_file(path, rows):
+    """A raw file: title row, header, then Market, Current, Previous, Same month last year."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = ["Title", "Market,Current Month,Previous Month,Same Month Previous Year"]
+    lines += [",".join("-" if v is None else str(v) for v in row) for row in rows]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def dataset(root):
+    """Maharashtra Wheat (prices and arrivals) and Onion (prices), with the raw tree's quirks."""
+    wheat = root / "Maharashtra" / "Wheat" / "2022"
+    raw_file(wheat / "January" / "prices.csv", [("A", 10, 9, 5), ("B", 20, 19, 15)])
+    raw_file(wheat / "January" / "arrivals.csv", [("A", 100, 90, 50), ("B", 200, 190, 150)])
+    raw_file(wheat / "Febraury " / "price.csv", [("A", None, 10, 6), ("B", 22, 20, 16)])
+    raw_file(wheat / "March" / "prices.csv", [("A", 14, None, 7), ("B", 23, 22, 17)])
+    raw_file(root / "Maharashtra" / "Onion" / "2022" / "January" / "prices.csv", [("A", 30, 29, 25)])
+    # Placeholder commodity, external factors without year directories, an unknown month
+    (root / "Maharashtra" / "Commodity 3" / "2022" / "January").mkdir(parents=True)
+    (root / "Maharashtra" / "External Factors").mkdir(parents=True)
+    (root / "Maharashtra" / "Wheat" / "2022" / "Summary").mkdir()
+    return root
+
+
+def test_discover_partitions_scans_every_month_directory(tmp_path):
+    partitions = discover_partitions(str(dataset(tmp_path)))
+    assert [(p["commodity"], p["year"], p["month"], p["month_num"]) for p in partitions] == [
+        ("Onion", 2022, "January", 1),
+        ("Wheat", 2022, "January", 1), ("Wheat", 2022, "February", 2), ("Wheat", 2022, "March", 3),
+    ]
+    february = partitions[2]
+    assert february["dir"].endswith("Febraury ")
+    assert os.path.basename(february["prices"]) == "price.csv" and february["arrivals"] is None
+
+
+def test_ingest_raw_imputes_each_series_in_one_pass(tmp_path):
+    root = dataset(tmp_path)
+    timings = ingest_raw(str(root), workers=1)
+
+    assert [t["group"] for t in timings] == [
+        "Maharashtra/Onion prices", "Maharashtra/Wheat arrivals", "Maharashtra/Wheat prices"
+    ]
+    assert all(t["ok"] for t in timings)
+    wheat_prices = timings[2]
+    assert wheat_prices["files"] == 3 and len(wheat_prices["file_seconds"]) == 3
+    # A's February is missing from every file of the series: interpolated between 10 and 14
+    february = pd.read_csv(root / "Maharashtra" / "Wheat" / "2022" / "Febraury " / "processed_prices.csv")
+    assert february.iloc[0, 1] == 12.0
+    assert (root / "Maharashtra" / "Wheat" / "2022" / "January" / "processed_arrivals.csv").exists()
+
+
+def test_ingest_raw_reprocesses_only_the_series_of_the_given_partitions(tmp_path):
+    root = dataset(tmp_path)
+    onion = [p for p in discover_partitions(str(root)) if p["commodity"] == "Onion"]
+    timings = ingest_raw(str(root), workers=1, partitions=onion)
+
+    assert [t["group"] for t in timings] == ["Maharashtra/Onion prices"]
+    assert not (root / "Maharashtra" / "Wheat" / "2022" / "January" / "processed_prices.csv").exists()
@@ -0,0 +1,83 @@
+import json
+
+import pandas as pd
+import pytest
+
+from Instrumentation import RUN_ID, instrumented, record_rows, stage
+
+
+def records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_stage_logs_one_record_with_its_measurements(stage_log):
+    with stage("merge", source="test") as record:
+        record["rows_out"] = 3
+        sum(range(100000))
+    logged, = records(stage_log)
+    assert logged == record
+    assert (logged["run_id"], logged["stage"], logged["parent"]) == (RUN_ID, "merge", None)
+    assert (logged["status"], logged["source"], logged["rows_in"], logged["rows_out"]) == ("ok", "test", None, 3)
+    assert logged["wall_seconds"] > 0 and logged["cpu_seconds"] >= 0 and logged["peak_rss_mb"] > 0
+
+
+def test_nested_stages_record_their_parent(stage_log):
+    with stage("pipeline"):
+        with stage("train"):
+            record_rows(rows_in=10, rows_out=8)
+        record_rows(rows_out=8)
+    train, pipeline = records(stage_log)
+    assert (train["stage"], train["parent"], train["rows_in"], train["rows_out"]) == ("train", "pipeline", 10, 8)
+    assert (pipeline["parent"], pipeline["rows_in"], pipeline["rows_out"]) == (None, None, 8)
+    # Outside a stage there is nothing to record
+    record_rows(rows_in=1)
+    assert len(records(stage_log)) == 2
+
+
+def test_failed_stage_is_logged_and_raised(stage_log):
+    with pytest.raises(KeyError):
+        with stage("save"):
+            raise KeyError("Year")
+    logged, = records(stage_log)
+    assert logged["status"] == "error" and logged["error"] == "KeyError: 'Year'"
+
+
+def test_instrumented_counts_dataframe_rows(stage_log):
+    @instrumented()
+    def keep_even(path, df):
+        return df[df["x"] % 2 == 0]
+
+    @instrumented("write")
+    def write(df):
+        record_rows(rows_out=1)
+        return "main.csv"
+
+    keep_even("main.csv", pd.DataFrame({"x": range(5)}))
+    write(pd.DataFrame({"x": range(2)}))
+    filtered, written = records(stage_log)
+    assert (filtered["stage"], filtered["rows_in"], filtered["rows_out"]) == ("keep_even", 5, 3)
+    assert (written["stage"], written["rows_in"], written["rows_out"]) == ("write", 2, 1)
+
+
+def test_log_can_be_disabled_or_sent_to_stderr(monkeypatch, capsys, stage_log):
+    monkeypatch.setenv("STAGE_LOG", "")
+    with stage("quiet"):
+        pass
+    assert not stage_log.exists()
+
+    monkeypatch.setenv("STAGE_LOG", "-")
+    with stage("stderr"):
+        pass
+    assert json.loads(capsys.readouterr().err)["stage"] == "stderr"
+
+
+def test_top_level_stages_are_profiled(monkeypatch, tmp_path, stage_log):
+    monkeypatch.setenv("STAGE_PROFILE_DIR", str(tmp_path / "profiles"))
+    with stage("outer"):
+        with stage("inner"):
+            pass
+    inner, outer = records(stage_log)
+    assert "profile" not in inner
+    assert outer["profile"].endswith(f"outer-{RUN_ID}.prof")
+    assert (tmp_path / "profiles" / f"outer-{RUN_ID}.prof").exists()
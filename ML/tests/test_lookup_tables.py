@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from LookupTables import attach, by_month, forward_fill_years
+
+
+def main_frame():
+    return pd.DataFrame({
+        "State": ["Maharashtra", "Maharashtra", "Punjab", "Maharashtra"],
+        "Year": [2021, 2022, 2022, 2023],
+        "Month": ["January", "February", "February", "March"],
+        "Rainfall_mm": [0.0, 0.0, 0.0, 0.0],
+    }, index=[10, 11, 12, 13])
+
+
+RAINFALL = pd.DataFrame({"Year": [2021, 2022], "Month": ["January", "February"], "Rainfall_mm": [5.0, 7.0]})
+MSP = pd.DataFrame({"Year": [2021, 2022], "msp": [1975.0, 2015.0]})
+
+
+def test_forward_fill_repeats_the_latest_year():
+    table = forward_fill_years(MSP, [2021, 2022, 2024])
+    assert table.set_index("Year")["msp"].to_dict() == {2021: 1975.0, 2022: 2015.0, 2024: 2015.0}
+    assert forward_fill_years(MSP, [2021]) is MSP
+
+
+def test_by_month_expands_yearly_tables():
+    table = by_month(MSP)
+    assert len(table) == 24 and set(table.columns) == {"Year", "Month", "msp"}
+    assert by_month(RAINFALL) is RAINFALL
+
+
+def test_attach_joins_every_table_in_one_merge():
+    df = attach(main_frame(), [RAINFALL, MSP])
+    assert list(df.index) == [10, 11, 12, 13]
+    assert list(df.columns) == ["State", "Year", "Month", "Rainfall_mm", "msp"]
+    # Replaced, not duplicated; 2023 is forward filled from 2022 (no March row in the rainfall table)
+    np.testing.assert_allclose(df["Rainfall_mm"], [5.0, 7.0, 7.0, np.nan])
+    np.testing.assert_allclose(df["msp"], [1975.0, 2015.0, 2015.0, 2015.0])
+
+
+def test_attach_with_state_leaves_other_states_empty():
+    df = attach(main_frame().astype({"State": "category"}), [RAINFALL, MSP], state="Maharashtra")
+    np.testing.assert_allclose(df["msp"], [1975.0, 2015.0, np.nan, 2015.0])
+    np.testing.assert_allclose(df["Rainfall_mm"], [5.0, 7.0, np.nan, np.nan])
+    assert isinstance(df["State"].dtype, pd.CategoricalDtype)
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from Merge import CORE_COLUMNS, build_main_frame, load_partition, read_partition
+
+
+def processed(month_dir, kind, rows):
+    """A processed file: Market, Current, Previous, Same month last year, then a change column."""
+    month_dir.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame(rows, columns=["Market", f"{kind} current", f"{kind} previous", f"{kind} last year"])
+    df["Change (Over Previous Month)"] = "-"
+    df.to_csv(month_dir / f"processed_{kind}.csv", index=False)
+
+
+def partition(month_dir, markets, base):
+    processed(month_dir, "prices", [(m, base + i, base + i - 1, base - 100) for i, m in enumerate(markets)])
+    processed(month_dir, "arrivals", [(m, 10.0 * i, 5.0 * i, 1.0) for i, m in enumerate(markets)])
+
+
+def test_read_partition_merges_prices_and_arrivals_on_market(tmp_path):
+    processed(tmp_path, "prices", [("A", 10.0, 9.0, 5.0), ("B", 20.0, 19.0, 15.0)])
+    processed(tmp_path, "arrivals", [("B", 200.0, 190.0, 150.0), ("C", 300.0, 290.0, 250.0)])
+    df = read_partition(str(tmp_path))
+    assert df.columns.tolist() == [
+        "Market", "Current_Month price", "Prev_Month price", "Current_Month arrivals", "Prev_Month arrivals"
+    ]
+    assert df.values.tolist() == [["B", 20.0, 19.0, 200.0, 190.0]]
+
+
+def test_read_partition_skips_incomplete_directories(tmp_path):
+    processed(tmp_path, "prices", [("A", 10.0, 9.0, 5.0)])
+    assert read_partition(str(tmp_path)) is None
+    pd.DataFrame({"Market": ["A"], "x": [1.0]}).to_csv(tmp_path / "processed_arrivals.csv", index=False)
+    assert read_partition(str(tmp_path)) is None
+
+
+def test_build_main_frame_matches_per_partition_frames(tmp_path):
+    wheat = tmp_path / "Maharashtra" / "Wheat"
+    partition(wheat / "2021" / "December", ["A", "B"], 1000)
+    partition(wheat / "2022" / "January", ["A", "B", "C"], 2000)
+    partition(wheat / "2022" / "Febraury", ["B"], 3000)
+    partition(tmp_path / "Karnataka" / "Onion" / "2022" / "January", ["D"], 4000)
+    # Prices without arrivals: left out
+    processed(wheat / "2022" / "March", "prices", [("A", 1.0, 1.0, 1.0)])
+
+    df = build_main_frame(str(tmp_path), workers=2)
+
+    expected = pd.concat([
+        load_partition(str(tmp_path / "Karnataka" / "Onion" / "2022" / "January"), "Karnataka", "Onion", 2022, "January"),
+        load_partition(str(wheat / "2021" / "December"), "Maharashtra", "Wheat", 2021, "December"),
+        load_partition(str(wheat / "2022" / "January"), "Maharashtra", "Wheat", 2022, "January"),
+        load_partition(str(wheat / "2022" / "Febraury"), "Maharashtra", "Wheat", 2022, "February"),
+    ], ignore_index=True)
+    assert df.columns.tolist() == CORE_COLUMNS
+    labels = {c: object for c in ["State", "Commodity", "Month"]}
+    pd.testing.assert_frame_equal(df.astype(labels), expected.astype(labels))
+    for column in ["State", "Commodity", "Month"]:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+
+
+def test_build_main_frame_without_data(tmp_path):
+    (tmp_path / "Maharashtra" / "Wheat" / "2022" / "January").mkdir(parents=True)
+    assert build_main_frame(str(tmp_path)) is None
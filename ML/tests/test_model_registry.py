@@ -0,0 +1,108 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+import ModelRegistry
+from FlatEnsemble import export_model
+from ModelRegistry import (
+    CURRENT_FILE, activate, current_manifest, current_model_path, current_version,
+    list_versions, load_manifest, publish_model, referenced_versions
+)
+
+
+def fitted(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(100, 3))
+    return GradientBoostingRegressor(n_estimators=5, random_state=seed).fit(X, X[:, 0] * seed)
+
+
+def test_nothing_published(tmp_path):
+    versions = str(tmp_path / "versions")
+    assert current_version(versions) is None
+    assert current_manifest(versions) is None
+    assert current_model_path(versions, default="fallback.pkl") == "fallback.pkl"
+    assert list_versions(versions) == []
+
+
+def test_publish_makes_the_version_current(tmp_path):
+    versions = str(tmp_path / "versions")
+    version_dir = publish_model(fitted(1), {"backend": "gbr", "metrics": {"mape": 0.1}}, versions)
+    version = os.path.basename(version_dir)
+
+    assert current_version(versions) == version
+    assert current_model_path(versions) == os.path.join(version_dir, "model.pkl")
+    assert sorted(os.listdir(version_dir)) == ["manifest.json", "model.flat.npz", "model.pkl"]
+    manifest = load_manifest(version, versions)
+    assert manifest["version"] == version and manifest["flat"] is True
+    assert manifest["model_type"] == "GradientBoostingRegressor" and manifest["metrics"] == {"mape": 0.1}
+    assert current_manifest(versions) == manifest
+    # Nothing temporary is left behind
+    assert not [name for name in os.listdir(versions) if name.endswith(".tmp")]
+
+
+def test_activate_rolls_back_and_forward(tmp_path):
+    versions = str(tmp_path / "versions")
+    first = os.path.basename(publish_model(fitted(1), {}, versions))
+    second = os.path.basename(publish_model(fitted(2), {}, versions))
+    assert list_versions(versions) == [first, second]
+    assert current_version(versions) == second
+
+    activate(first, versions)
+    assert current_version(versions) == first
+    model = joblib.load(current_model_path(versions))
+    X = np.ones((1, 3))
+    np.testing.assert_array_equal(model.predict(X), fitted(1).predict(X))
+
+    activate(second, versions)
+    assert current_version(versions) == second
+
+
+def test_activate_unknown_version_raises(tmp_path):
+    versions = str(tmp_path / "versions")
+    publish_model(fitted(1), {}, versions)
+    with open(os.path.join(versions, CURRENT_FILE)) as f:
+        current = f.read()
+    with pytest.raises(ValueError):
+        activate("20000101T000000000000Z", versions)
+    assert current_version(versions) == current
+
+
+def test_keeps_only_recent_versions(tmp_path):
+    versions = str(tmp_path / "versions")
+    published = [os.path.basename(publish_model(fitted(seed), {}, versions, keep=2)) for seed in range(1, 6)]
+    assert list_versions(versions) == published[-3:]
+    assert current_version(versions) == published[-1]
+
+
+def test_referenced_versions_are_not_pruned(tmp_path, monkeypatch):
+    versions = str(tmp_path / "segments" / "Maharashtra_Wheat")
+    first = publish_model(fitted(1), {}, versions, keep=1)
+    second = publish_model(fitted(2), {}, versions, keep=1)
+
+    # The registry points at the first version, a model pack of the API at the second
+    registry_path = tmp_path / "registry.json"
+    registry_path.write_text(json.dumps({"segments": {"Maharashtra/Wheat": {
+        "artifact": os.path.relpath(os.path.join(first, "model.pkl"), tmp_path)}}}))
+    pack = tmp_path / "share" / "1-1"
+    pack.mkdir(parents=True)
+    (pack / "manifest.json").write_text(json.dumps({"segments": [{"artifact": os.path.join(second, "model.pkl")}]}))
+    monkeypatch.setattr(ModelRegistry, "REGISTRY_PATH", str(registry_path))
+    monkeypatch.setenv("MODEL_SHARE_DIR", str(tmp_path / "share"))
+    assert referenced_versions(versions) == {os.path.basename(first), os.path.basename(second)}
+
+    published = [os.path.basename(publish_model(fitted(seed), {}, versions, keep=1)) for seed in range(3, 6)]
+    assert list_versions(versions) == [os.path.basename(first), os.path.basename(second)] + published[-2:]
+
+
+def test_flattening_a_published_version_leaves_it_untouched(tmp_path):
+    versions = str(tmp_path / "versions")
+    version_dir = publish_model(fitted(1), {}, versions)
+    os.remove(os.path.join(version_dir, "model.flat.npz"))
+    assert export_model(os.path.join(version_dir, "model.pkl")) is None
+    assert sorted(os.listdir(version_dir)) == ["manifest.json", "model.pkl"]
+    with open(os.path.join(version_dir, "manifest.json")) as f:
+        assert json.load(f)["flat"] is True
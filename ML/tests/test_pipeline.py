@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+import Pipeline
+from Pipeline import STAGES, resolve_stages, run_pipeline
+
+
+def test_save_needs_every_dataset_stage_in_dependency_order():
+    assert resolve_stages(["save"]) == [
+        "ingest", "merge", "external_factors", "lag_features", "rainfall_lag",
+        "price_velocity", "reorder_columns", "save",
+    ]
+
+
+def test_every_stage_runs_after_its_dependencies():
+    order = resolve_stages(["materialize"])
+    assert order == list(STAGES)
+    for name in order:
+        assert all(order.index(dep) < order.index(name) for dep in STAGES[name][1])
+
+
+def test_targets_share_their_dependencies():
+    assert resolve_stages(["rainfall_lag", "lag_features"]) == [
+        "ingest", "merge", "external_factors", "lag_features", "rainfall_lag",
+    ]
+
+
+def test_skipped_stages_are_left_out():
+    order = resolve_stages(["train"], skip=["ingest", "save"])
+    assert order[0] == "merge" and order[-1] == "train"
+    assert "ingest" not in order and "save" not in order
+
+
+def test_unknown_stage_raises():
+    with pytest.raises(ValueError, match="Unknown stage: fit"):
+        resolve_stages(["fit"])
+
+
+def test_cycle_raises(monkeypatch):
+    monkeypatch.setattr(Pipeline, "STAGES", {"a": (None, ["b"]), "b": (None, ["a"])})
+    with pytest.raises(ValueError, match="Cycle"):
+        resolve_stages(["a"])
+
+
+def test_run_pipeline_passes_one_frame_through_the_stages(monkeypatch, tmp_path):
+    calls = []
+
+    def step(name, transform):
+        def run(df, ctx):
+            calls.append((name, None if df is None else df["x"].tolist()))
+            return transform(df)
+        return run
+
+    monkeypatch.setattr(Pipeline, "STAGES", {
+        "load": (step("load", lambda df: pd.DataFrame({"x": [1, 2]})), []),
+        "double": (step("double", lambda df: df.assign(x=df["x"] * 2)), ["load"]),
+        "drop": (step("drop", lambda df: None), ["double"]),
+        "after": (step("after", lambda df: df), ["drop"]),
+    })
+    df = run_pipeline(targets=["double"], dataset_dir=str(tmp_path))
+    assert df["x"].tolist() == [2, 4]
+    assert calls == [("load", None), ("double", [1, 2])]
+
+    # A stage returning None aborts the run
+    calls.clear()
+    assert run_pipeline(targets=["after"], dataset_dir=str(tmp_path)) is None
+    assert [name for name, _ in calls] == ["load", "double", "drop"]
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from Storage import read_dataset, write_dataset
+
+ROWS = pd.DataFrame({
+    "State": ["Maharashtra", "Maharashtra", "Punjab", "Maharashtra"],
+    "Commodity": ["Wheat", "Wheat", "Wheat", "Rice"],
+    "Market": ["Pune", "Nagpur", "Ludhiana", "Pune"],
+    "Year": [2021, 2022, 2022, 2022],
+    "Month": ["January", "February", "March", "April"],
+    "Price": [2100.0, 2200.0, 1900.0, 3000.0],
+})
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "main.csv"
+    ROWS.to_csv(path, index=False)
+    return str(path)
+
+
+def test_csv_fallback_filters_on_columns_not_requested(tmp_path, csv_path):
+    df = read_dataset(columns=["Market", "Year", "Price"],
+                      filters=[("State", "==", "Maharashtra"), ("Commodity", "==", "Wheat")],
+                      parquet_dir=str(tmp_path / "missing"), csv_path=csv_path)
+    assert list(df.columns) == ["Market", "Year", "Price"]
+    assert df["Market"].tolist() == ["Pune", "Nagpur"]
+
+
+def test_csv_fallback_keeps_requested_filter_columns(tmp_path, csv_path):
+    df = read_dataset(columns=["Price", "State"], filters=[("Year", ">=", 2022)],
+                      parquet_dir=str(tmp_path / "missing"), csv_path=csv_path)
+    assert list(df.columns) == ["Price", "State"]
+    assert df["Price"].tolist() == [2200.0, 1900.0, 3000.0]
+
+
+def test_csv_fallback_reads_everything_without_columns(tmp_path, csv_path):
+    df = read_dataset(parquet_dir=str(tmp_path / "missing"), csv_path=csv_path)
+    pd.testing.assert_frame_equal(df, ROWS)
+
+
+def test_missing_dataset_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_dataset(parquet_dir=str(tmp_path / "missing"), csv_path=str(tmp_path / "missing.csv"))
+
+
+def test_parquet_matches_csv_fallback(tmp_path, csv_path):
+    pytest.importorskip("pyarrow")
+    parquet_dir = str(tmp_path / "main_parquet")
+    write_dataset(ROWS, parquet_dir, csv_path=None)
+    kwargs = dict(columns=["Market", "Month", "Price"], filters=[("State", "==", "Maharashtra")])
+    from_parquet = read_dataset(parquet_dir=parquet_dir, csv_path=csv_path, **kwargs)
+    from_csv = read_dataset(parquet_dir=str(tmp_path / "missing"), csv_path=csv_path, **kwargs)
+    sort = ["Market", "Month"]
+    pd.testing.assert_frame_equal(from_parquet.sort_values(sort).reset_index(drop=True),
+                                  from_csv.sort_values(sort).reset_index(drop=True))
+
+
+def test_rewrite_replaces_both_copies(tmp_path, csv_path):
+    pytest.importorskip("pyarrow")
+    parquet_dir = str(tmp_path / "main_parquet")
+    write_dataset(ROWS, parquet_dir, csv_path)
+    write_dataset(ROWS.assign(Price=ROWS["Price"] + 1), parquet_dir, csv_path)
+
+    for df in [read_dataset(parquet_dir=parquet_dir, csv_path=csv_path), pd.read_csv(csv_path)]:
+        assert sorted(df["Price"]) == sorted(ROWS["Price"] + 1)
+    # No temporary or old copies are left behind
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["main.csv", "main_parquet"]
@@ -0,0 +1,87 @@
+import functools
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import TrainSegments
+from ForecastPrices import FEATURES, MONTH_MAP, TARGET
+from ModelRegistry import current_manifest
+from Storage import read_dataset
+from TrainSegments import discover_segments, train_segment, write_registry
+
+
+def segment_rows(state, commodity, markets, years, rng):
+    rows = []
+    for market in markets:
+        for year in years:
+            for month in MONTH_MAP:
+                price = rng.uniform(1800, 2600)
+                rows.append({
+                    "State": state, "Commodity": commodity, "Year": year, "Month": month, "Market": market,
+                    TARGET: price, "Prev_Month price": price - rng.uniform(-50, 50),
+                    "Prev_2_Month price": price - rng.uniform(-80, 80), "Price_Velocity": rng.normal(),
+                    "Current_Month arrivals": rng.uniform(100, 900), "Prev_Month arrivals": rng.uniform(100, 900),
+                    "Rainfall_mm": rng.uniform(0, 300), "Rainfall_Lag": rng.uniform(0, 300),
+                    "Diesel_Price_Rs_per_Litre": 95.0, "Irrigation_Water_Usage_MCM": 225.0,
+                    "msp": 2015.0, "Temperature": 27.0,
+                })
+    return rows
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    """main.csv with a trainable Maharashtra/Wheat segment and a single-year Karnataka/Onion one."""
+    rng = np.random.default_rng(0)
+    rows = segment_rows("Maharashtra", "Wheat", ["Pune", "Nagpur"], (2021, 2022), rng)
+    rows += segment_rows("Karnataka", "Onion", ["Hubli"], (2022,), rng)
+    csv_path = tmp_path / "main.csv"
+    pd.DataFrame(rows).to_csv(csv_path, index=False)
+
+    monkeypatch.setattr(TrainSegments, "read_dataset", functools.partial(
+        read_dataset, parquet_dir=str(tmp_path / "main_parquet"), csv_path=str(csv_path)))
+    model_dir = tmp_path / "Model"
+    monkeypatch.setattr(TrainSegments, "MODEL_DIR", str(model_dir))
+    return model_dir
+
+
+def test_discover_segments(model_dir):
+    assert discover_segments() == [("Karnataka", "Onion"), ("Maharashtra", "Wheat")]
+
+
+def test_train_segment_publishes_a_version(model_dir):
+    entry = train_segment(("Maharashtra", "Wheat", None, "gbr"))
+
+    assert entry["key"] == "Maharashtra/Wheat"
+    assert (entry["train_years"], entry["val_year"]) == ([2021], 2022)
+    assert (entry["rows_train"], entry["rows_val"]) == (24, 24)
+    # LabelEncoder order
+    assert entry["markets"] == ["Nagpur", "Pune"]
+    assert entry["params_source"] == "default" and entry["tuning"] is None
+
+    versions_dir = model_dir / "segments" / "Maharashtra_Wheat"
+    assert entry["artifact"] == os.path.join("segments", "Maharashtra_Wheat", entry["version"], "model.pkl")
+    assert current_manifest(str(versions_dir))["version"] == entry["version"]
+    model = joblib.load(model_dir / entry["artifact"])
+    assert model.n_features_in_ == len(FEATURES)
+
+
+def test_segment_without_an_earlier_year_is_skipped(model_dir):
+    result = train_segment(("Karnataka", "Onion", None, "gbr"))
+    assert result["key"] == "Karnataka/Onion" and "earlier year" in result["error"]
+    assert not (model_dir / "segments").exists()
+
+
+def test_write_registry_maps_segments_to_artifacts(model_dir):
+    entry = train_segment(("Maharashtra", "Wheat", 2022, "hgb"))
+    registry_path = model_dir / "registry.json"
+    write_registry([dict(entry)], str(registry_path))
+
+    registry = json.loads(registry_path.read_text())
+    assert list(registry["segments"]) == ["Maharashtra/Wheat"]
+    saved = registry["segments"]["Maharashtra/Wheat"]
+    assert "key" not in saved
+    assert (saved["backend"], saved["artifact"], saved["markets"]) == ("hgb", entry["artifact"], entry["markets"])
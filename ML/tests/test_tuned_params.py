@@ -0,0 +1,35 @@
+import json
+
+import ForecastPrices
+from ForecastPrices import DEFAULT_PARAMS, load_tuned_entry, load_tuned_params, resolve_params
+from TuneModel import save_tuned_params
+
+
+def test_tuned_params_are_kept_per_segment_and_backend(tmp_path):
+    path = str(tmp_path / "tuned_params.json")
+    save_tuned_params("Maharashtra", "Wheat", "gbr", {"params": {"max_depth": 3}, "cv": {"mape": 0.1}}, path)
+    save_tuned_params("Maharashtra", "Wheat", "hgb", {"params": {"max_iter": 200}}, path)
+    save_tuned_params("Punjab", "Wheat", "gbr", {"params": {"max_depth": 7}}, path)
+
+    with open(path) as f:
+        assert sorted(json.load(f)) == ["Maharashtra/Wheat", "Punjab/Wheat"]
+    assert load_tuned_params("gbr", "Maharashtra", "Wheat", path) == {"max_depth": 3}
+    assert load_tuned_params("hgb", "Maharashtra", "Wheat", path) == {"max_iter": 200}
+    assert load_tuned_params("gbr", "Punjab", "Wheat", path) == {"max_depth": 7}
+    assert load_tuned_entry("gbr", "Maharashtra", "Wheat", path)["cv"] == {"mape": 0.1}
+    # A segment that was not tuned has no entry
+    assert load_tuned_params("gbr", "Punjab", "Rice", path) == {}
+    assert load_tuned_params("gbr", "Maharashtra", "Wheat", str(tmp_path / "missing.json")) == {}
+
+
+def test_resolve_params_falls_back_to_defaults(monkeypatch):
+    tuned = {("gbr", "Maharashtra", "Wheat"): {"max_depth": 3}}
+    monkeypatch.setattr(ForecastPrices, "load_tuned_params",
+                        lambda backend, state, commodity: tuned.get((backend, state, commodity), {}))
+
+    assert resolve_params("gbr", state="Maharashtra", commodity="Wheat") == \
+        ({**DEFAULT_PARAMS["gbr"], "max_depth": 3}, "tuned")
+    assert resolve_params("gbr", state="Punjab", commodity="Rice") == (DEFAULT_PARAMS["gbr"], "default")
+    assert resolve_params("gbr") == (DEFAULT_PARAMS["gbr"], "default")
+    assert resolve_params("gbr", {"max_depth": 9}, "Maharashtra", "Wheat") == \
+        ({**DEFAULT_PARAMS["gbr"], "max_depth": 9}, "explicit")
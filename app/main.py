@@ -1,10 +1,108 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+from typing import List
 import hashlib
 import json
+import os
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+import numpy as np
 
-app = FastAPI()
+from services.model_service import ModelService
+from services.forecast_store import ForecastStore
+from services.prediction_cache import PredictionCache
+from services.metrics import COUNT_BUCKETS, CONTENT_TYPE, MetricsMiddleware, MetricsRegistry
+from services.batcher import MicroBatcher
+
+# MODEL_SHARE_DIR (e.g. /dev/shm/ace-models) makes the uvicorn workers share
+# one memory-mapped copy of the models instead of loading one each
+model_service = ModelService(share_dir=os.getenv("MODEL_SHARE_DIR") or None)
+forecast_store = ForecastStore()
+prediction_cache = PredictionCache(
+    max_size=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+)
+
+# In-process metrics, served in the Prometheus text format on /metrics
+metrics = MetricsRegistry()
+# Where the time of a prediction request goes: input/output hashing, cache
+# lookups, feature building, model inference and response serialization
+phase_seconds = metrics.histogram(
+    "prediction_phase_seconds", "Time per phase of prediction requests.", ("route", "phase"))
+predicted_records = metrics.counter(
+    "prediction_records_total", "Records predicted by the model (cache misses).", ("route",))
+queue_depth = metrics.histogram(
+    "prediction_queue_depth", "Requests already queued when a /predict request joins the queue.", (), COUNT_BUCKETS)
+batch_size = metrics.histogram(
+    "prediction_batch_size", "Requests per coalesced /predict model call.", (), COUNT_BUCKETS)
+
+
+def cache_stat(name):
+    return lambda: [((), prediction_cache.stats()[name])]
+
+
+for name, kind, help in [
+    ("hits", "counter", "Prediction cache hits."),
+    ("misses", "counter", "Prediction cache misses."),
+    ("evictions", "counter", "Prediction cache LRU evictions."),
+    ("expirations", "counter", "Prediction cache TTL expirations."),
+    ("size", "gauge", "Entries in the prediction cache."),
+    ("hit_rate", "gauge", "Prediction cache hit rate since startup."),
+]:
+    suffix = "_total" if kind == "counter" else ""
+    metrics.gauge_callback(f"prediction_cache_{name}{suffix}", help, cache_stat(name), kind=kind)
+
+
+def predict_coalesced(items):
+    """
+    Runs the queued /predict requests, (segment, feature vector) pairs, as
+    one model call per segment. Returns the prices in request order.
+    """
+    prices = [None] * len(items)
+    by_segment = {}
+    for i, (segment, _) in enumerate(items):
+        by_segment.setdefault(id(segment), []).append(i)
+    for positions in by_segment.values():
+        segment = items[positions[0]][0]
+        with phase_seconds.time("/predict", "inference"):
+            predicted = segment.predict(np.stack([items[i][1] for i in positions]))
+        for i, price in zip(positions, predicted.tolist()):
+            prices[i] = price
+    predicted_records.inc("/predict", amount=len(items))
+    return prices
+
+
+# Concurrent /predict requests wait up to PREDICT_BATCH_WAIT_MS (or until
+# PREDICT_BATCH_SIZE are queued) and are predicted together
+predict_batcher = MicroBatcher(
+    predict_coalesced,
+    max_batch_size=int(os.getenv("PREDICT_BATCH_SIZE", "64")),
+    max_wait_seconds=float(os.getenv("PREDICT_BATCH_WAIT_MS", "2")) / 1000,
+    queue_depth=queue_depth,
+    batch_size=batch_size
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the segment models and per-market feature state once, keep them in memory
+    model_service.load()
+    # New models (registry or published version) are loaded, warmed up and
+    # swapped in by a background thread. Cached predictions are tagged with
+    # the version of the models that produced them (see cached_prediction);
+    # the cache is also emptied on every swap to free the old entries
+    stop_watching = model_service.watch(float(os.getenv("MODEL_WATCH_INTERVAL", "2")),
+                                        on_reload=prediction_cache.clear)
+    # Precomputed forecasts (MaterializeForecasts.py), memory-mapped
+    forecast_store.load()
+    predict_batcher.start()
+    yield
+    stop_watching.set()
+    await predict_batcher.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS (VERY IMPORTANT)
 app.add_middleware(
@@ -14,10 +112,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it is the outermost middleware and times whole requests
+app.add_middleware(MetricsMiddleware, registry=metrics)
 
 class PredictionInput(BaseModel):
     crop: str
     state: str
+    market: str
     temperature: float
     rainfall: float
 
@@ -27,21 +128,138 @@ def generate_hash(data: dict) -> str:
     return hashlib.sha256(json_string.encode()).hexdigest()
 
 
+def cached_prediction(cache_key):
+    """Cached response of cache_key, if it was produced by the models being served."""
+    return prediction_cache.get(cache_key, version=model_service.model_version)
+
+
 @app.post("/predict")
-def predict(data: PredictionInput):
+async def predict(data: PredictionInput):
+    with phase_seconds.time("/predict", "hashing"):
+        cache_key = generate_hash(data.model_dump())
+    with phase_seconds.time("/predict", "cache"):
+        cached = cached_prediction(cache_key)
+    if cached is not None:
+        with phase_seconds.time("/predict", "serialization"):
+            return JSONResponse(cached)
+
+    segment = model_service.segment(data.crop, data.state)
+    if segment is None:
+        raise HTTPException(status_code=404, detail=f"No model for {data.crop} in {data.state}")
+
+    with phase_seconds.time("/predict", "features"):
+        features = segment.feature_vector(data.market, data.temperature, data.rainfall)
+    if features is None:
+        raise HTTPException(status_code=404, detail=f"Unknown market: {data.market}")
 
-    # Dummy model (replace later)
-    predicted_price = 3000 + data.temperature * 5 - data.rainfall * 2
+    # Waiting for the batch plus its model call (timed as "inference" there)
+    with phase_seconds.time("/predict", "queue"):
+        predicted_price = float(await predict_batcher.submit((segment, features)))
 
     prediction_output = {
         "crop": data.crop,
         "state": data.state,
-        "price": predicted_price
+        "market": data.market,
+        "price": round(predicted_price, 2)
     }
 
-    hash_value = generate_hash(prediction_output)
+    with phase_seconds.time("/predict", "hashing"):
+        hash_value = generate_hash(prediction_output)
 
-    return {
+    response = {
         "prediction": prediction_output,
         "hash": hash_value
     }
+    with phase_seconds.time("/predict", "cache"):
+        prediction_cache.put(cache_key, response, version=segment.version)
+    with phase_seconds.time("/predict", "serialization"):
+        return JSONResponse(response)
+
+
+@app.post("/predict/batch")
+def predict_batch(data: List[PredictionInput]):
+
+    segments = [model_service.segment(record.crop, record.state) for record in data]
+    for i, (record, segment) in enumerate(zip(data, segments)):
+        if segment is None:
+            raise HTTPException(status_code=404, detail=f"Record {i}: No model for {record.crop} in {record.state}")
+
+    with phase_seconds.time("/predict/batch", "hashing"):
+        cache_keys = [generate_hash(record.model_dump()) for record in data]
+    with phase_seconds.time("/predict/batch", "cache"):
+        results = [cached_prediction(key) for key in cache_keys]
+
+    # Cache misses grouped by segment: one feature matrix and one model call each
+    misses_by_segment = {}
+    for i, result in enumerate(results):
+        if result is None:
+            misses_by_segment.setdefault(id(segments[i]), []).append(i)
+
+    for misses in misses_by_segment.values():
+        segment = segments[misses[0]]
+        with phase_seconds.time("/predict/batch", "features"):
+            X, unknown = segment.feature_matrix(
+                [data[i].market for i in misses],
+                [data[i].temperature for i in misses],
+                [data[i].rainfall for i in misses]
+            )
+        if unknown:
+            record = data[misses[unknown[0]]]
+            raise HTTPException(status_code=404, detail=f"Record {misses[unknown[0]]}: Unknown market: {record.market}")
+
+        with phase_seconds.time("/predict/batch", "inference"):
+            predicted_prices = segment.predict(X).tolist()
+        predicted_records.inc("/predict/batch", amount=len(misses))
+
+        prediction_outputs = [{
+            "crop": data[i].crop,
+            "state": data[i].state,
+            "market": data[i].market,
+            "price": round(predicted_price, 2)
+        } for i, predicted_price in zip(misses, predicted_prices)]
+        with phase_seconds.time("/predict/batch", "hashing"):
+            hashes = [generate_hash(output) for output in prediction_outputs]
+
+        with phase_seconds.time("/predict/batch", "cache"):
+            for i, prediction_output, hash_value in zip(misses, prediction_outputs, hashes):
+                results[i] = {
+                    "prediction": prediction_output,
+                    "hash": hash_value
+                }
+                prediction_cache.put(cache_keys[i], results[i], version=segment.version)
+
+    # Plain dicts of str/float: skip FastAPI's per-item jsonable_encoder pass
+    with phase_seconds.time("/predict/batch", "serialization"):
+        return JSONResponse({"results": results})
+
+
+def forecast_response(state, commodity, market=None):
+    forecast_store.reload_if_changed()
+    payload, run_id = forecast_store.get(state, commodity, market)
+    if run_id is None:
+        raise HTTPException(status_code=503, detail="No forecasts have been materialized")
+    if payload is None:
+        what = f"{market} ({commodity} in {state})" if market is not None else f"{commodity} in {state}"
+        raise HTTPException(status_code=404, detail=f"No forecast for {what}")
+    # Stored as JSON already: no model run and no serialization per request
+    return Response(payload, media_type="application/json", headers={"X-Forecast-Run": run_id})
+
+
+@app.get("/forecast/{state}/{commodity}")
+def forecast(state: str, commodity: str):
+    return forecast_response(state, commodity)
+
+
+@app.get("/forecast/{state}/{commodity}/{market}")
+def forecast_market(state: str, commodity: str, market: str):
+    return forecast_response(state, commodity, market)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return prediction_cache.stats()
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
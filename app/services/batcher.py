@@ -0,0 +1,92 @@
+import asyncio
+from contextlib import suppress
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent async callers into batches for one vectorized call.
+
+    submit() queues an item and waits for its result. A collector task takes
+    the first queued item, waits up to max_wait_seconds for more (or until
+    max_batch_size are queued), and runs run_batch(items) -> results (same
+    order) on the default executor so the event loop keeps accepting
+    requests. Requests arriving meanwhile form the next batch. An exception
+    from run_batch is raised to every caller of that batch.
+
+    The wait only applies under concurrency: when nothing else is queued and
+    the previous batch was a single request, the item runs right away, so
+    sequential callers don't pay max_wait_seconds.
+
+    Optional histograms record the queue depth seen by each submit and the
+    size of each batch.
+    """
+
+    def __init__(self, run_batch, max_batch_size=64, max_wait_seconds=0.002, queue_depth=None, batch_size=None):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0.0, float(max_wait_seconds))
+        self.queue_depth = queue_depth
+        self.batch_size = batch_size
+        self._queue = None
+        self._full = None
+        self._worker = None
+        self._last_batch_size = 0
+
+    def start(self):
+        """Starts the collector on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker
+        self._worker = None
+
+    def depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, item):
+        """Queues item and returns its result once its batch has run."""
+        if self._worker is None or self._worker.done():
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        if self.queue_depth is not None:
+            self.queue_depth.observe(self._queue.qsize())
+        self._queue.put_nowait((item, future))
+        # The collector already holds the first item of the batch
+        if self._queue.qsize() >= self.max_batch_size - 1:
+            self._full.set()
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        concurrent = not self._queue.empty() or self._last_batch_size > 1
+        if concurrent and self.max_wait_seconds > 0 and self._queue.qsize() < self.max_batch_size - 1:
+            self._full.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._full.wait(), self.max_wait_seconds)
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self._last_batch_size = len(batch)
+            if self.batch_size is not None:
+                self.batch_size.observe(len(batch))
+            try:
+                results = await loop.run_in_executor(None, self.run_batch, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                # Callers that went away (cancelled) have a done future
+                if not future.done():
+                    future.set_result(result)
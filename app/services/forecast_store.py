@@ -0,0 +1,104 @@
+import json
+import mmap
+import os
+import threading
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = os.path.normpath(os.path.join(APP_DIR, "../ML/ForecastStore"))
+
+# Must match the layout written by ML/Scripts/MaterializeForecasts.py
+CURRENT_FILE = "CURRENT"
+DATA_FILE = "forecasts.bin"
+INDEX_FILE = "index.json"
+
+
+def store_key(state, commodity, market=None):
+    parts = [state, commodity] if market is None else [state, commodity, market]
+    return "/".join(part.lower() for part in parts)
+
+
+class ForecastStore:
+    """
+    Serves the forecast documents precomputed by MaterializeForecasts.py.
+
+    The current run's forecasts.bin is memory-mapped and its index kept as a
+    dict, so a lookup is one dict get and one slice of the mapping: reads
+    never evaluate a model. When CURRENT points to a new run, the next
+    request maps it and swaps it in.
+    """
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        self.version = None
+        # (run id, key -> [offset, length], mapped data), replaced as a whole
+        self._run = None
+        self._reload_lock = threading.Lock()
+
+    @property
+    def run_id(self):
+        return self._run[0] if self._run else None
+
+    def current_version(self):
+        # CURRENT is replaced, not rewritten: a new run is a new inode
+        stat = os.stat(os.path.join(self.store_dir, CURRENT_FILE))
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _open_run(self):
+        with open(os.path.join(self.store_dir, CURRENT_FILE), "r") as f:
+            run_id = f.read().strip()
+        run_dir = os.path.join(self.store_dir, "runs", run_id)
+        with open(os.path.join(run_dir, INDEX_FILE), "r") as f:
+            entries = json.load(f)["entries"]
+        with open(os.path.join(run_dir, DATA_FILE), "rb") as f:
+            # The mapping stays valid after the file is closed (or deleted)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        return run_id, entries, data
+
+    def load(self):
+        """Maps the current run; returns False if nothing was materialized yet."""
+        try:
+            version = self.current_version()
+            self._run = self._open_run()
+        except OSError:
+            print(f"No forecast store at {self.store_dir}")
+            return False
+        self.version = version
+        print(f"Loaded forecast run {self.run_id} ({len(self._run[1])} documents)")
+        return True
+
+    def reload_if_changed(self):
+        """Swaps in a newly published run. Returns True when a new run was mapped."""
+        try:
+            version = self.current_version()
+        except OSError:
+            return False
+        if version == self.version:
+            return False
+        with self._reload_lock:
+            if version == self.version:
+                return False
+            try:
+                run = self._open_run()
+            except (OSError, ValueError) as e:
+                # Keep serving the previous run
+                print(f"Error reloading forecasts: {e}")
+                return False
+            self._run = run
+            self.version = version
+        print(f"Reloaded forecast run {self.run_id}")
+        return True
+
+    def get(self, state, commodity, market=None):
+        """
+        Returns (JSON bytes, run id) of the segment's report, or of one of its
+        markets; the bytes are None for unknown keys (or an empty store).
+        """
+        run = self._run
+        if run is None:
+            return None, None
+        run_id, entries, data = run
+        entry = entries.get(store_key(state, commodity, market))
+        if entry is None:
+            return None, run_id
+        offset, length = entry
+        return data[offset:offset + length], run_id
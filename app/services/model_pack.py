@@ -0,0 +1,85 @@
+import fcntl
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+import numpy as np
+
+# Layout of a model pack directory (e.g. under /dev/shm):
+#   CURRENT                    id of the pack to attach to, replaced atomically
+#   <pack id>/manifest.json    segments, market lists and array file names
+#   <pack id>/<i>.<name>.npy   arrays of segment i, memory-mapped by readers
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+
+
+@contextmanager
+def exclusive(pack_dir):
+    """Holds an exclusive lock on pack_dir, shared by every process on the host."""
+    os.makedirs(pack_dir, exist_ok=True)
+    with open(os.path.join(pack_dir, LOCK_FILE), "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def current_manifest(pack_dir):
+    """Manifest of the current pack (with its "path"), or None if none was written."""
+    try:
+        with open(os.path.join(pack_dir, CURRENT_FILE), "r") as f:
+            pack_id = f.read().strip()
+        path = os.path.join(pack_dir, pack_id)
+        with open(os.path.join(path, MANIFEST_FILE), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    manifest["path"] = path
+    return manifest
+
+
+def write_pack(segments, pack_dir, source, keep=2):
+    """
+    Writes segments (dicts of crop, state, markets, index_markets, artifact,
+    flat meta and a name -> array dict) as a new pack and points CURRENT to
+    it. source identifies the artifacts the pack was built from. Only the
+    keep most recent packs are kept; processes attached to an older one keep
+    their mappings.
+    """
+    pack_id = f"{time.time_ns()}-{os.getpid()}"
+    path = os.path.join(pack_dir, pack_id)
+    tmp_path = path + ".tmp"
+    os.makedirs(tmp_path)
+
+    entries = []
+    for i, segment in enumerate(segments):
+        files = {}
+        for name, array in segment["arrays"].items():
+            files[name] = f"{i}.{name}.npy"
+            np.save(os.path.join(tmp_path, files[name]), np.ascontiguousarray(array))
+        entries.append({**{k: v for k, v in segment.items() if k != "arrays"}, "arrays": files})
+
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+        json.dump({"pack_id": pack_id, "source": source, "segments": entries}, f)
+    os.rename(tmp_path, path)
+
+    current_tmp = os.path.join(pack_dir, CURRENT_FILE + ".tmp")
+    with open(current_tmp, "w") as f:
+        f.write(pack_id)
+    os.replace(current_tmp, os.path.join(pack_dir, CURRENT_FILE))
+
+    packs = sorted(name for name in os.listdir(pack_dir)
+                   if os.path.isdir(os.path.join(pack_dir, name)) and name != pack_id)
+    for name in packs[:max(len(packs) - (keep - 1), 0)]:
+        shutil.rmtree(os.path.join(pack_dir, name), ignore_errors=True)
+    return current_manifest(pack_dir)
+
+
+def read_arrays(manifest, entry):
+    """The arrays of a manifest segment, memory-mapped read-only (no copy)."""
+    # Plain ndarray views of the np.memmap objects (no subclass overhead per operation)
+    return {name: np.asarray(np.load(os.path.join(manifest["path"], file), mmap_mode="r"))
+            for name, file in entry["arrays"].items()}
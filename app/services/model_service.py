@@ -0,0 +1,333 @@
+import json
+import os
+import sys
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+
+# Paths relative to this file: app/services -> ML/
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_DIR = os.path.normpath(os.path.join(APP_DIR, "../ML"))
+MODEL_PATH = os.path.join(ML_DIR, "Model/wheat_price_model.pkl")
+MAIN_CSV_PATH = os.path.join(ML_DIR, "DataSet/main.csv")
+REGISTRY_PATH = os.path.join(ML_DIR, "Model/registry.json")
+VERSIONS_DIR = os.path.join(ML_DIR, "Model/versions")
+
+# Next-month features are built by the same code as in training/forecasting
+sys.path.insert(0, os.path.join(ML_DIR, "Scripts"))
+from FeatureEngine import CARRIED_COLUMNS, next_month_features  # noqa: E402
+from FlatEnsemble import ARRAY_NAMES, FlatEnsemble  # noqa: E402
+from Storage import read_dataset  # noqa: E402
+from ModelRegistry import CURRENT_FILE as CURRENT_VERSION_FILE, current_manifest, current_model_path  # noqa: E402
+
+from services import model_pack  # noqa: E402
+
+# Must match FEATURES in ML/Scripts/ForecastPrices.py (same order as training)
+FEATURES = [
+    'Year', 'Month_Num', 'Market_Encoded',
+    'Prev_Month price', 'Prev_2_Month price', 'Price_Velocity',
+    'Current_Month arrivals', 'Prev_Month arrivals',
+    'Rainfall_mm', 'Rainfall_Lag', 'Diesel_Price_Rs_per_Litre',
+    'Irrigation_Water_Usage_MCM', 'msp', 'Temperature'
+]
+
+MONTH_MAP = {
+    'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'June': 6,
+    'July': 7, 'August': 8, 'September': 9, 'October': 10, 'November': 11, 'December': 12
+}
+
+COL = {name: i for i, name in enumerate(FEATURES)}
+
+
+class SegmentModel:
+    """
+    Trained model and per-market feature state for one State/Commodity segment.
+
+    build_market_state() builds, for every market, the feature vector for the
+    month after its latest known month with FeatureEngine.next_month_features
+    (as recursive_forecast in ForecastPrices.py does). A prediction then only fills
+    in the request's temperature/rainfall and runs the model.
+
+    GradientBoostingRegressor models are evaluated from their flattened
+    arrays (FlatEnsemble, same predictions without sklearn's per-call and
+    per-tree overhead); other models through model.predict.
+    """
+
+    def __init__(self, crop, state, model, markets, flat=None):
+        self.crop = crop
+        self.state = state
+        self.model = model
+        if flat is None:
+            try:
+                flat = FlatEnsemble.from_model(model)
+            except ValueError:
+                pass
+        self.flat = flat
+        # Pickle the model was loaded from (models that cannot be flattened are
+        # loaded from it when attaching to a shared pack)
+        self.artifact_path = None
+        # ModelService.model_version of the artifacts this segment belongs to
+        self.version = None
+        # Market names in LabelEncoder order: Market_Encoded is the index
+        self.market_codes = {market: code for code, market in enumerate(markets)}
+        self.market_index = {}
+        self.base_features = None
+
+    def pack_entry(self):
+        """This segment's arrays and metadata for a shared model pack (see model_pack.write_pack)."""
+        arrays = {"base_features": self.base_features}
+        if self.flat is not None:
+            arrays.update(self.flat.arrays())
+        return {
+            "crop": self.crop,
+            "state": self.state,
+            "markets": list(self.market_codes),
+            "index_markets": list(self.market_index),
+            "artifact": None if self.flat is not None else self.artifact_path,
+            "flat": self.flat.meta() if self.flat is not None else None,
+            "arrays": arrays
+        }
+
+    @classmethod
+    def from_pack(cls, manifest, entry):
+        """A segment on the memory-mapped arrays of a pack: no unpickling, no copies."""
+        arrays = model_pack.read_arrays(manifest, entry)
+        flat = None
+        model = None
+        if entry["flat"] is not None:
+            flat = FlatEnsemble(**{name: arrays[name] for name in ARRAY_NAMES}, **entry["flat"])
+        else:
+            model = joblib.load(entry["artifact"])
+        segment = cls(entry["crop"], entry["state"], model, entry["markets"], flat=flat)
+        segment.base_features = arrays["base_features"]
+        segment.market_index = {market: i for i, market in enumerate(entry["index_markets"])}
+        return segment
+
+    def build_market_state(self, df):
+        df = df[(df['Commodity'] == self.crop) & (df['State'] == self.state)].copy()
+        df['Month_Num'] = df['Month'].map(MONTH_MAP)
+        df = df.dropna(subset=[
+            'Month_Num', 'Current_Month price', 'Prev_Month price', 'Current_Month arrivals',
+            'Rainfall_mm', 'Diesel_Price_Rs_per_Litre', 'Irrigation_Water_Usage_MCM',
+            'msp', 'Temperature'
+        ])
+        df = df[df['Market'].isin(self.market_codes.keys())]
+        df['Market_Encoded'] = df['Market'].map(self.market_codes)
+
+        # Next month after each market's latest record
+        rows = next_month_features(df, carry=CARRIED_COLUMNS + ['Market_Encoded'])
+        X = rows[FEATURES].to_numpy(dtype=float)
+
+        self.base_features = X
+        self.market_index = {market: i for i, market in enumerate(rows['Market'])}
+
+    def feature_vector(self, market, temperature, rainfall):
+        """Returns the 14-feature vector for market, or None if the market is unknown."""
+        row = self.market_index.get(market)
+        if row is None:
+            return None
+        x = self.base_features[row].copy()
+        x[COL['Temperature']] = temperature
+        x[COL['Rainfall_mm']] = rainfall
+        return x
+
+    def feature_matrix(self, markets, temperatures, rainfalls):
+        """
+        Builds the feature matrix for many requests at once.
+
+        Returns (X, unknown) where unknown lists the positions of markets
+        without feature state; X is None in that case.
+        """
+        rows = [self.market_index.get(market) for market in markets]
+        unknown = [i for i, row in enumerate(rows) if row is None]
+        if unknown:
+            return None, unknown
+        X = self.base_features[np.array(rows, dtype=np.intp)]
+        X[:, COL['Temperature']] = temperatures
+        X[:, COL['Rainfall_mm']] = rainfalls
+        return X, []
+
+    def predict(self, X):
+        """Predicts prices for a 2-D array of feature vectors."""
+        if self.flat is not None:
+            return self.flat.predict(X)
+        return self.model.predict(pd.DataFrame(X, columns=FEATURES))
+
+
+class ModelService:
+    """
+    Holds one SegmentModel per State/Commodity in memory and routes requests
+    to them by crop/state.
+
+    The segments come from ML/Model/registry.json (written by
+    ML/Scripts/TrainSegments.py). Without a registry the current model
+    version published by ForecastPrices.py (ML/Model/versions, see
+    ModelRegistry.py), else wheat_price_model.pkl, is served as the
+    Maharashtra/Wheat segment. Everything is loaded once at startup; watch()
+    polls for a new registry or version and swaps the models in between
+    requests, after a warm-up prediction.
+
+    With share_dir (e.g. /dev/shm/ace-models), worker processes share one
+    copy of the models: the first process to need a version loads it and
+    publishes the flattened trees and feature state as a model pack
+    (model_pack.py); every process then memory-maps that pack, which takes
+    milliseconds and shares the same pages between workers.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, main_csv_path=MAIN_CSV_PATH, registry_path=REGISTRY_PATH,
+                 share_dir=None, versions_dir=VERSIONS_DIR):
+        self.model_path = model_path
+        self.main_csv_path = main_csv_path
+        self.registry_path = registry_path
+        self.versions_dir = versions_dir
+        self.share_dir = share_dir
+        self.segments = {}
+        self.model_version = None
+        self._reload_lock = threading.Lock()
+
+    def load(self):
+        self.model_version = self.artifact_version()
+        self.segments = self.obtain_segments(self.model_version)
+        self.warm_up(self.segments)
+        summary = ", ".join(f"{s.state}/{s.crop} ({len(s.market_index)} markets)" for s in self.segments.values())
+        print(f"Loaded {len(self.segments)} segment models: {summary}")
+
+    def load_segments(self):
+        # The Parquet dataset next to main.csv (Storage.write_dataset), else main.csv
+        df = read_dataset(parquet_dir=os.path.join(os.path.dirname(self.main_csv_path), "main_parquet"),
+                          csv_path=self.main_csv_path)
+        segments = {}
+        if os.path.exists(self.registry_path):
+            with open(self.registry_path, "r") as f:
+                registry = json.load(f)
+            model_dir = os.path.dirname(self.registry_path)
+            for entry in registry["segments"].values():
+                artifact_path = os.path.join(model_dir, entry["artifact"])
+                segment = SegmentModel(entry["commodity"], entry["state"], joblib.load(artifact_path), entry["markets"])
+                segment.artifact_path = artifact_path
+                segment.build_market_state(df)
+                segments[(segment.crop.lower(), segment.state.lower())] = segment
+        else:
+            # The published version's manifest names its segment and the
+            # LabelEncoder order of its markets. wheat_price_model.pkl predates
+            # manifests: it is Maharashtra/Wheat, with the encoder of
+            # ForecastPrices.prepare_data (sorted unique markets of the segment).
+            model_path = current_model_path(self.versions_dir, default=self.model_path)
+            manifest = current_manifest(self.versions_dir) or {}
+            state, crop = manifest.get("state", "Maharashtra"), manifest.get("commodity", "Wheat")
+            markets = manifest.get("markets")
+            if markets is None:
+                markets = np.unique(df.loc[(df['State'] == state) & (df['Commodity'] == crop), 'Market'])
+            segment = SegmentModel(crop, state, joblib.load(model_path), markets)
+            segment.artifact_path = model_path
+            segment.build_market_state(df)
+            segments[(crop.lower(), state.lower())] = segment
+        return segments
+
+    def attach_segments(self, version):
+        """
+        Segments of artifact version from the shared pack in share_dir. If the
+        pack is missing or older, the first process to get the lock loads the
+        models and publishes a new pack; the others wait for it and attach.
+        """
+        source = list(version)
+        manifest = model_pack.current_manifest(self.share_dir)
+        if manifest is None or manifest["source"] != source:
+            with model_pack.exclusive(self.share_dir):
+                manifest = model_pack.current_manifest(self.share_dir)
+                if manifest is None or manifest["source"] != source:
+                    entries = [segment.pack_entry() for segment in self.load_segments().values()]
+                    manifest = model_pack.write_pack(entries, self.share_dir, source)
+                    print(f"Published {len(entries)} segment models to {manifest['path']}")
+        segments = {}
+        for entry in manifest["segments"]:
+            segment = SegmentModel.from_pack(manifest, entry)
+            segments[(segment.crop.lower(), segment.state.lower())] = segment
+        return segments
+
+    def obtain_segments(self, version):
+        """Segments of artifact version: loaded in this process, or attached from share_dir."""
+        segments = self.load_segments() if self.share_dir is None else self.attach_segments(version)
+        for segment in segments.values():
+            segment.version = version
+        return segments
+
+    def artifact_version(self):
+        """
+        Identifies the artifacts to serve: the registry, else the published
+        versions' CURRENT pointer, else wheat_price_model.pkl. Both files are
+        replaced by rename, so a new one has a new inode.
+        """
+        current_version = os.path.join(self.versions_dir, CURRENT_VERSION_FILE)
+        if os.path.exists(self.registry_path):
+            path = self.registry_path
+        elif os.path.exists(current_version):
+            path = current_version
+        else:
+            path = self.model_path
+        stat = os.stat(path)
+        return (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def warm_up(segments, rows=64):
+        """
+        Predicts a single row and a batch of every segment, so the first
+        requests after a (re)load don't pay for cold pages and caches.
+        """
+        for segment in segments.values():
+            if segment.base_features is None or not len(segment.base_features):
+                continue
+            X = np.array(segment.base_features[:rows], dtype=float)
+            segment.predict(X[:1])
+            segment.predict(X)
+
+    def reload_if_changed(self):
+        """
+        Reloads every segment if the served artifacts (see artifact_version)
+        changed on disk since they were loaded. The new segments are warmed up
+        and then swapped in with a single assignment: requests in flight finish
+        on the models they started with. model_version changes before the
+        segments do, so a response of the old models is never tagged with the
+        new version. Returns True when new models were swapped in.
+        """
+        try:
+            version = self.artifact_version()
+        except OSError:
+            return False
+        if version == self.model_version:
+            return False
+        with self._reload_lock:
+            if version == self.model_version:
+                return False
+            try:
+                segments = self.obtain_segments(version)
+                self.warm_up(segments)
+            except Exception as e:
+                # Likely a half-written file; keep serving the old models
+                print(f"Error reloading models: {e}")
+                return False
+            self.model_version = version
+            self.segments = segments
+        print(f"Reloaded {len(segments)} segment models")
+        return True
+
+    def watch(self, interval=2.0, on_reload=None):
+        """
+        Polls for new artifacts every interval seconds in a background thread
+        (see reload_if_changed), calling on_reload() after each swap. Returns
+        an Event; set it to stop watching.
+        """
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                if self.reload_if_changed() and on_reload is not None:
+                    on_reload()
+
+        threading.Thread(target=run, name="model-watcher", daemon=True).start()
+        return stop
+
+    def segment(self, crop, state):
+        """Returns the SegmentModel serving crop in state (case-insensitive), or None."""
+        return self.segments.get((crop.lower(), state.lower()))
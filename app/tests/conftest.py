@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The app imports its services as top-level packages (run from app/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+MARKETS = ["Nagpur", "Pune", "Solapur"]
+
+
+def write_main_csv(path, seed=0):
+    """A small main.csv of Maharashtra/Wheat: 3 markets over 2021-2022."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for market in MARKETS:
+        for year in (2021, 2022):
+            for month in MONTHS:
+                price = rng.uniform(1800, 2600)
+                rows.append({
+                    "State": "Maharashtra", "Commodity": "Wheat", "Year": year, "Month": month, "Market": market,
+                    "Current_Month price": price, "Prev_Month price": price - rng.uniform(-50, 50),
+                    "Prev_2_Month price": price - rng.uniform(-80, 80), "Price_Velocity": rng.normal(),
+                    "Current_Month arrivals": rng.uniform(100, 900), "Prev_Month arrivals": rng.uniform(100, 900),
+                    "Prev_2_Month arrivals": rng.uniform(100, 900),
+                    "Rainfall_mm": rng.uniform(0, 300), "Rainfall_Lag": rng.uniform(0, 300),
+                    "Diesel_Price_Rs_per_Litre": 95.0, "Irrigation_Water_Usage_MCM": 225.0,
+                    "Area": 300.0, "Production": 1000.0, "Yield": 3500.0, "msp": 2015.0, "Temperature": 27.0,
+                })
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def served_model(tmp_path):
+    """wheat_price_model.pkl (a small GBR on the 14 features) and main.csv in tmp_path."""
+    import joblib
+    from sklearn.ensemble import GradientBoostingRegressor
+    from services.model_service import FEATURES
+
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.uniform(0, 3000, size=(200, len(FEATURES))), columns=FEATURES)
+    y = X["Prev_Month price"] + X["Rainfall_mm"]
+    model = GradientBoostingRegressor(n_estimators=20, max_depth=3, random_state=0).fit(X, y)
+    model_path = str(tmp_path / "wheat_price_model.pkl")
+    joblib.dump(model, model_path)
+    return {
+        "model": model,
+        "model_path": model_path,
+        "main_csv_path": write_main_csv(tmp_path / "main.csv"),
+        "registry_path": str(tmp_path / "registry.json"),
+        "versions_dir": str(tmp_path / "versions"),
+    }
+
+
+@pytest.fixture
+def model_service(served_model):
+    from services.model_service import ModelService
+    service = ModelService(served_model["model_path"], served_model["main_csv_path"],
+                           served_model["registry_path"], versions_dir=served_model["versions_dir"])
+    service.load()
+    return service
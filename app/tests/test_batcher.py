@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.batcher import MicroBatcher
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class Recorder:
+    """run_batch that doubles its items and records the batches it was called with."""
+
+    def __init__(self, fail_on=None, delay=None):
+        self.batches = []
+        self.fail_on = fail_on
+        self.delay = delay
+
+    def __call__(self, items):
+        if self.delay is not None:
+            self.delay.wait(1)
+        self.batches.append(list(items))
+        if self.fail_on is not None and self.fail_on in items:
+            raise RuntimeError(f"bad item {self.fail_on}")
+        return [item * 2 for item in items]
+
+
+def test_results_follow_submission_order():
+    recorder = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(recorder, max_batch_size=8, max_wait_seconds=0.05)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+        await batcher.stop()
+        return results
+
+    assert run(main()) == [i * 2 for i in range(20)]
+    assert [item for batch in recorder.batches for item in batch] == list(range(20))
+    assert max(len(batch) for batch in recorder.batches) == 8
+
+
+def test_concurrent_callers_share_a_batch():
+    recorder = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_seconds=0.05)
+        await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        await batcher.stop()
+
+    run(main())
+    assert len(recorder.batches) == 1
+
+
+def test_sequential_callers_are_not_delayed():
+    recorder = Recorder()
+
+    async def main():
+        # A wait this long would time the test out if lone requests paid it
+        batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_seconds=30)
+        results = [await asyncio.wait_for(batcher.submit(i), 5) for i in range(3)]
+        await batcher.stop()
+        return results
+
+    assert run(main()) == [0, 2, 4]
+    assert recorder.batches == [[0], [1], [2]]
+
+
+def test_full_batch_runs_without_waiting():
+    recorder = Recorder()
+
+    async def main():
+        # A wait this long would time the test out if a full batch paid it
+        batcher = MicroBatcher(recorder, max_batch_size=4, max_wait_seconds=30)
+        waiting = [asyncio.ensure_future(batcher.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.05)
+        results = await asyncio.wait_for(asyncio.gather(*waiting, batcher.submit(2), batcher.submit(3)), 5)
+        await batcher.stop()
+        return results
+
+    assert run(main()) == [0, 2, 4, 6]
+    assert recorder.batches == [[0, 1, 2, 3]]
+
+
+def test_error_is_raised_to_every_caller_of_the_batch():
+    recorder = Recorder(fail_on=3)
+
+    async def main():
+        batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_seconds=0.05)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)), return_exceptions=True)
+        # The collector keeps serving after a failed batch
+        after = await batcher.submit(7)
+        await batcher.stop()
+        return results, after
+
+    results, after = run(main())
+    assert all(isinstance(r, RuntimeError) and str(r) == "bad item 3" for r in results)
+    assert after == 14
+
+
+def test_cancelled_caller_does_not_break_the_batch():
+    release = threading.Event()
+    recorder = Recorder(delay=release)
+
+    async def main():
+        batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_seconds=0.01)
+        first = asyncio.ensure_future(batcher.submit(1))
+        second = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        release.set()
+        result = await second
+        await batcher.stop()
+        return first, result
+
+    first, result = run(main())
+    assert first.cancelled() and result == 4
+
+
+class Histogram:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value):
+        self.values.append(value)
+
+
+def test_records_queue_depth_and_batch_size():
+    depth, size = Histogram(), Histogram()
+
+    async def main():
+        batcher = MicroBatcher(Recorder(), max_batch_size=4, max_wait_seconds=0.05,
+                               queue_depth=depth, batch_size=size)
+        await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+        await batcher.stop()
+
+    run(main())
+    assert depth.values == [0, 1, 2, 3]
+    assert size.values == [4]
+
+
+@pytest.mark.parametrize("max_batch_size", [0, 1])
+def test_batch_size_of_one_runs_every_request_alone(max_batch_size):
+    recorder = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(recorder, max_batch_size=max_batch_size, max_wait_seconds=0.05)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+        await batcher.stop()
+        return results
+
+    assert run(main()) == [0, 2, 4]
+    assert recorder.batches == [[0], [1], [2]]
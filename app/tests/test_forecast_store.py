@@ -0,0 +1,59 @@
+import json
+import os
+
+import services.model_service  # noqa: F401  (puts ML/Scripts on sys.path)
+from MaterializeForecasts import report_documents, write_store
+from services.forecast_store import ForecastStore
+
+
+def report(state="Maharashtra", commodity="Wheat", price=2100.0):
+    markets = [{"market_name": market, "forecast": [price + i]} for i, market in enumerate(["Pune", "Nagpur"])]
+    return {
+        "report_metadata": {"state": state, "commodity": commodity, "base_month": "December 2022"},
+        "state_summary": {"markets": len(markets)},
+        "market_details": markets,
+    }
+
+
+def test_get_returns_the_stored_documents(tmp_path):
+    documents = {**report_documents(report()), **report_documents(report("Punjab", "Rice"))}
+    write_store(documents, str(tmp_path), run_id="run-1")
+    store = ForecastStore(str(tmp_path))
+    assert store.load() and store.run_id == "run-1"
+
+    data, run_id = store.get("MAHARASHTRA", "wheat")
+    assert run_id == "run-1" and json.loads(data) == report()
+    data, _ = store.get("Maharashtra", "Wheat", "Nagpur")
+    assert json.loads(data) == {
+        "report_metadata": report()["report_metadata"],
+        "state_summary": {"markets": 2},
+        "market": {"market_name": "Nagpur", "forecast": [2101.0]},
+    }
+    assert json.loads(store.get("Punjab", "Rice")[0])["report_metadata"]["commodity"] == "Rice"
+    assert store.get("Maharashtra", "Onion") == (None, "run-1")
+    assert store.get("Maharashtra", "Wheat", "Mumbai") == (None, "run-1")
+
+
+def test_empty_store(tmp_path):
+    store = ForecastStore(str(tmp_path / "missing"))
+    assert store.load() is False
+    assert store.get("Maharashtra", "Wheat") == (None, None)
+    assert store.reload_if_changed() is False
+
+
+def test_new_run_is_swapped_in_and_old_runs_are_pruned(tmp_path):
+    write_store(report_documents(report(price=1.0)), str(tmp_path), run_id="run-1")
+    store = ForecastStore(str(tmp_path))
+    store.load()
+    old_data, _ = store.get("Maharashtra", "Wheat", "Pune")
+    assert store.reload_if_changed() is False
+
+    for n in (2, 3, 4):
+        write_store(report_documents(report(price=float(n))), str(tmp_path), run_id=f"run-{n}", keep=2)
+    assert sorted(os.listdir(tmp_path / "runs")) == ["run-3", "run-4"]
+    # Slices of the previous mapping stay readable after its run is deleted
+    assert json.loads(old_data)["market"]["forecast"] == [1.0]
+
+    assert store.reload_if_changed() is True and store.run_id == "run-4"
+    data, run_id = store.get("Maharashtra", "Wheat", "Pune")
+    assert run_id == "run-4" and json.loads(data)["market"]["forecast"] == [4.0]
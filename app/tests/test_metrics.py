@@ -0,0 +1,88 @@
+import pytest
+
+from services.metrics import MetricsMiddleware, MetricsRegistry
+
+
+def test_counter_renders_per_label_values():
+    registry = MetricsRegistry()
+    counter = registry.counter("cache_total", "Cache lookups.", ("result",))
+    counter.inc("miss")
+    counter.inc("hit", amount=3)
+    counter.inc("miss")
+    assert registry.render() == (
+        "# HELP cache_total Cache lookups.\n"
+        "# TYPE cache_total counter\n"
+        'cache_total{result="hit"} 3\n'
+        'cache_total{result="miss"} 2\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("batch_size", "Batch sizes.", buckets=(1, 4))
+    for value in (1, 2, 4, 9):
+        histogram.observe(value)
+    assert registry.render().splitlines()[2:] == [
+        'batch_size_bucket{le="1.0"} 1',
+        'batch_size_bucket{le="4.0"} 3',
+        'batch_size_bucket{le="+Inf"} 4',
+        "batch_size_sum 16.0",
+        "batch_size_count 4",
+    ]
+
+
+def test_histogram_time_observes_the_block():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",))
+    with latency.time("/predict"):
+        pass
+    with pytest.raises(ValueError):
+        with latency.time("/predict"):
+            raise ValueError
+    assert 'latency_seconds_count{route="/predict"} 2' in registry.render()
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors.", ("detail",)).inc('bad "x"\\\n')
+    assert 'errors_total{detail="bad \\"x\\"\\\\\\n"} 1' in registry.render()
+
+
+def test_gauge_callback_is_read_at_render_time():
+    registry = MetricsRegistry()
+    depth = [0]
+    registry.gauge_callback("queue_depth", "Queued requests.", lambda: [((), depth[0])])
+    registry.gauge_callback("segments", "Served segments.", lambda: [(("Wheat",), 1.5)], labels=("crop",))
+    depth[0] = 7
+    assert registry.render() == (
+        "# HELP queue_depth Queued requests.\n"
+        "# TYPE queue_depth gauge\n"
+        "queue_depth 7\n"
+        "# HELP segments Served segments.\n"
+        "# TYPE segments gauge\n"
+        'segments{crop="Wheat"} 1.5\n'
+    )
+
+
+def test_middleware_labels_requests_by_route_template():
+    fastapi = pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    registry = MetricsRegistry()
+    app = fastapi.FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.post("/forecast/{market}")
+    def forecast(market: str, body: dict):
+        return {"market": market}
+
+    client = TestClient(app)
+    client.post("/forecast/Pune", json={"x": 1})
+    client.post("/forecast/Nagpur", json={"x": 1})
+    client.get("/missing")
+
+    text = registry.render()
+    assert 'http_requests_total{route="/forecast/{market}",method="POST",status="200"} 2' in text
+    assert 'http_requests_total{route="unmatched",method="GET",status="404"} 1' in text
+    assert 'http_request_size_bytes_sum{route="/forecast/{market}",method="POST"} 14.0' in text
+    assert 'http_request_duration_seconds_count{route="/forecast/{market}",method="POST"} 2' in text
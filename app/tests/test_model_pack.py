@@ -0,0 +1,81 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from services import model_pack
+from services.model_service import FEATURES, ModelService, SegmentModel
+
+
+def test_write_pack_and_read_arrays_round_trip(tmp_path):
+    arrays = {"base_features": np.arange(12.0).reshape(3, 4), "codes": np.array([2, 0, 1], dtype=np.int32)}
+    manifest = model_pack.write_pack([{"crop": "Wheat", "state": "Maharashtra", "arrays": arrays}],
+                                     str(tmp_path), source=["v1"])
+    assert manifest == model_pack.current_manifest(str(tmp_path))
+    assert manifest["source"] == ["v1"] and manifest["segments"][0]["crop"] == "Wheat"
+
+    loaded = model_pack.read_arrays(manifest, manifest["segments"][0])
+    for name, array in arrays.items():
+        np.testing.assert_array_equal(loaded[name], array)
+        assert loaded[name].dtype == array.dtype and not loaded[name].flags.writeable
+
+
+def test_only_recent_packs_are_kept(tmp_path):
+    assert model_pack.current_manifest(str(tmp_path)) is None
+    paths = [model_pack.write_pack([], str(tmp_path), source=[n], keep=2)["path"] for n in range(3)]
+    assert not os.path.exists(paths[0]) and os.path.exists(paths[1])
+    assert model_pack.current_manifest(str(tmp_path))["path"] == paths[2]
+
+
+def pack_round_trip(segment, pack_dir):
+    manifest = model_pack.write_pack([segment.pack_entry()], str(pack_dir), source=["v1"])
+    return SegmentModel.from_pack(manifest, manifest["segments"][0])
+
+
+def test_attached_segment_predicts_like_the_loaded_one(model_service, tmp_path):
+    loaded = model_service.segment("Wheat", "Maharashtra")
+    assert loaded.flat is not None
+    attached = pack_round_trip(loaded, tmp_path / "pack")
+
+    assert (attached.crop, attached.state) == ("Wheat", "Maharashtra")
+    assert attached.market_codes == loaded.market_codes and attached.market_index == loaded.market_index
+    X, _ = loaded.feature_matrix(["Pune", "Solapur", "Nagpur"], [25.0, 30.0, 35.0], [0.0, 50.0, 100.0])
+    np.testing.assert_allclose(attached.predict(X), loaded.predict(X))
+    np.testing.assert_allclose(attached.feature_vector("Pune", 28.0, 4.0), loaded.feature_vector("Pune", 28.0, 4.0))
+
+
+def test_models_without_flat_trees_are_loaded_from_their_artifact(tmp_path):
+    rng = np.random.default_rng(0)
+    model = LinearRegression().fit(pd.DataFrame(rng.uniform(size=(20, len(FEATURES))), columns=FEATURES),
+                                   rng.uniform(size=20))
+    joblib.dump(model, tmp_path / "model.pkl")
+    segment = SegmentModel("Onion", "Karnataka", model, ["Hubli"])
+    assert segment.flat is None
+    segment.artifact_path = str(tmp_path / "model.pkl")
+    segment.base_features = rng.uniform(size=(1, len(FEATURES)))
+    segment.market_index = {"Hubli": 0}
+
+    attached = pack_round_trip(segment, tmp_path / "pack")
+    assert isinstance(attached.model, LinearRegression)
+    np.testing.assert_allclose(attached.predict(segment.base_features), segment.predict(segment.base_features))
+
+
+def test_workers_attach_to_the_pack_of_the_first(served_model, tmp_path, monkeypatch):
+    def service():
+        return ModelService(served_model["model_path"], served_model["main_csv_path"], served_model["registry_path"],
+                            share_dir=str(tmp_path / "shm"), versions_dir=served_model["versions_dir"])
+
+    first = service()
+    first.load()
+    # Later workers map the published pack instead of loading the models
+    monkeypatch.setattr(ModelService, "load_segments", lambda self: pytest.fail("models loaded again"))
+    second = service()
+    second.load()
+
+    X, _ = first.segment("Wheat", "Maharashtra").feature_matrix(["Pune", "Nagpur"], [25.0, 26.0], [1.0, 2.0])
+    np.testing.assert_allclose(second.segment("Wheat", "Maharashtra").predict(X),
+                               served_model["model"].predict(pd.DataFrame(X, columns=FEATURES)))
+    assert second.model_version == first.model_version
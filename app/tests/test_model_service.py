@@ -0,0 +1,121 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+
+from services.model_service import COL, FEATURES, ModelService
+from ModelRegistry import MODEL_FILE, atomic_write_text, publish_model  # on the path set by model_service
+
+
+def latest_rows(main_csv_path):
+    df = pd.read_csv(main_csv_path)
+    return df[df["Year"] == 2022].groupby("Market").tail(1).set_index("Market")
+
+
+def test_fallback_serves_the_model_as_maharashtra_wheat(model_service, served_model):
+    assert list(model_service.segments) == [("wheat", "maharashtra")]
+    segment = model_service.segment("WHEAT", "maharashtra")
+    assert segment is not None and model_service.segment("Rice", "Maharashtra") is None
+    # LabelEncoder order: sorted market names
+    assert segment.market_codes == {"Nagpur": 0, "Pune": 1, "Solapur": 2}
+
+
+def test_feature_vector_is_the_month_after_the_latest(model_service, served_model):
+    segment = model_service.segment("Wheat", "Maharashtra")
+    latest = latest_rows(served_model["main_csv_path"])
+    for market, row in latest.iterrows():
+        x = segment.feature_vector(market, temperature=31.5, rainfall=12.0)
+        assert (x[COL["Year"]], x[COL["Month_Num"]]) == (2023, 1)
+        assert x[COL["Market_Encoded"]] == segment.market_codes[market]
+        assert x[COL["Prev_Month price"]] == row["Current_Month price"]
+        assert x[COL["Prev_2_Month price"]] == row["Prev_Month price"]
+        assert x[COL["Rainfall_Lag"]] == row["Rainfall_mm"]
+        assert (x[COL["Temperature"]], x[COL["Rainfall_mm"]]) == (31.5, 12.0)
+    assert segment.feature_vector("Mumbai", 30.0, 10.0) is None
+
+
+def test_predictions_match_the_model(model_service, served_model):
+    segment = model_service.segment("Wheat", "Maharashtra")
+    X, unknown = segment.feature_matrix(["Pune", "Nagpur", "Pune"], [25.0, 26.0, 27.0], [1.0, 2.0, 3.0])
+    assert unknown == []
+    expected = served_model["model"].predict(pd.DataFrame(X, columns=FEATURES))
+    np.testing.assert_allclose(segment.predict(X), expected)
+    np.testing.assert_allclose(segment.predict(X[:1]), expected[:1])
+    assert segment.feature_matrix(["Pune", "Mumbai"], [1.0, 1.0], [1.0, 1.0]) == (None, [1])
+
+
+
+def test_registry_routes_each_segment(served_model, tmp_path):
+    # An Onion segment on two of the markets, with a model of its own
+    df = pd.read_csv(served_model["main_csv_path"])
+    onion = df[df["Market"] != "Nagpur"].assign(Commodity="Onion")
+    pd.concat([df, onion]).to_csv(served_model["main_csv_path"], index=False)
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame(rng.uniform(0, 3000, size=(200, len(FEATURES))), columns=FEATURES)
+    onion_model = GradientBoostingRegressor(n_estimators=20, max_depth=3, random_state=0).fit(X, 2 * X["Temperature"])
+    (tmp_path / "segments").mkdir()
+    joblib.dump(onion_model, tmp_path / "segments" / "onion.pkl")
+
+    with open(served_model["registry_path"], "w") as f:
+        json.dump({"segments": {
+            "Maharashtra/Wheat": {"state": "Maharashtra", "commodity": "Wheat",
+                                  "artifact": "wheat_price_model.pkl", "markets": ["Nagpur", "Pune", "Solapur"]},
+            "Maharashtra/Onion": {"state": "Maharashtra", "commodity": "Onion",
+                                  "artifact": "segments/onion.pkl", "markets": ["Pune", "Solapur"]},
+        }}, f)
+    service = ModelService(served_model["model_path"], served_model["main_csv_path"],
+                           served_model["registry_path"], versions_dir=served_model["versions_dir"])
+    service.load()
+
+    assert sorted(service.segments) == [("onion", "maharashtra"), ("wheat", "maharashtra")]
+    wheat, onion = service.segment("Wheat", "Maharashtra"), service.segment("onion", "MAHARASHTRA")
+    assert onion.market_codes == {"Pune": 0, "Solapur": 1}
+    assert onion.feature_vector("Nagpur", 30.0, 10.0) is None
+    x = onion.feature_vector("Pune", 30.0, 10.0)
+    assert x[COL["Market_Encoded"]] == 0 and wheat.feature_vector("Pune", 30.0, 10.0)[COL["Market_Encoded"]] == 1
+    np.testing.assert_allclose(onion.predict(x[None]), onion_model.predict(pd.DataFrame([x], columns=FEATURES)))
+    np.testing.assert_allclose(wheat.predict(x[None]),
+                               served_model["model"].predict(pd.DataFrame([x], columns=FEATURES)))
+
+
+def test_reload_only_when_the_artifact_changes(model_service, served_model):
+    assert model_service.reload_if_changed() is False
+    old = model_service.segment("Wheat", "Maharashtra")
+    joblib.dump(served_model["model"], served_model["model_path"] + ".new")
+    os.replace(served_model["model_path"] + ".new", served_model["model_path"])
+    assert model_service.reload_if_changed() is True
+    assert model_service.segment("Wheat", "Maharashtra") is not old
+
+
+def test_reload_follows_the_registry_to_a_new_segment_version(served_model, tmp_path):
+    versions_dir = tmp_path / "segments" / "Maharashtra_Wheat"
+    markets = ["Nagpur", "Pune", "Solapur"]
+
+    def publish(model):
+        version_dir = publish_model(model, {"name": "Maharashtra/Wheat", "markets": markets}, str(versions_dir))
+        artifact = os.path.relpath(os.path.join(version_dir, MODEL_FILE), str(tmp_path))
+        atomic_write_text(served_model["registry_path"], json.dumps({"segments": {"Maharashtra/Wheat": {
+            "state": "Maharashtra", "commodity": "Wheat", "artifact": artifact, "markets": markets}}}))
+        return version_dir
+
+    first_dir = publish(served_model["model"])
+    service = ModelService(served_model["model_path"], served_model["main_csv_path"],
+                           served_model["registry_path"], versions_dir=served_model["versions_dir"])
+    service.load()
+    X, _ = service.segment("Wheat", "Maharashtra").feature_matrix(["Pune"], [25.0], [1.0])
+    np.testing.assert_allclose(service.segment("Wheat", "Maharashtra").predict(X),
+                               served_model["model"].predict(pd.DataFrame(X, columns=FEATURES)))
+
+    rng = np.random.default_rng(3)
+    Xr = pd.DataFrame(rng.uniform(0, 3000, size=(200, len(FEATURES))), columns=FEATURES)
+    retrained = GradientBoostingRegressor(n_estimators=10, max_depth=2, random_state=0).fit(Xr, Xr["Temperature"])
+    second_dir = publish(retrained)
+    assert service.reload_if_changed() is True
+    segment = service.segment("Wheat", "Maharashtra")
+    assert os.path.samefile(segment.artifact_path, os.path.join(second_dir, MODEL_FILE))
+    np.testing.assert_allclose(segment.predict(X), retrained.predict(pd.DataFrame(X, columns=FEATURES)))
+    # The version the registry referenced before is a separate directory, left in place
+    assert os.path.exists(os.path.join(first_dir, MODEL_FILE))
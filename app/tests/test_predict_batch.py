@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main as api  # noqa: E402
+from services.model_service import ModelService  # noqa: E402
+
+
+@pytest.fixture
+def client(served_model, monkeypatch):
+    service = ModelService(served_model["model_path"], served_model["main_csv_path"],
+                           served_model["registry_path"], versions_dir=served_model["versions_dir"])
+    monkeypatch.setattr(api, "model_service", service)
+    api.prediction_cache.clear()
+    with TestClient(api.app) as client:
+        yield client
+    api.prediction_cache.clear()
+
+
+def record(market, temperature=28.0, rainfall=40.0, crop="Wheat"):
+    return {"crop": crop, "state": "Maharashtra", "market": market, "temperature": temperature, "rainfall": rainfall}
+
+
+def test_batch_matches_single_predictions(client):
+    records = [record("Pune"), record("Nagpur", 30.0, 5.0), record("Solapur"), record("Pune", 20.0, 200.0)]
+    response = client.post("/predict/batch", json=records)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["prediction"]["market"] for r in results] == ["Pune", "Nagpur", "Solapur", "Pune"]
+
+    api.prediction_cache.clear()
+    for r, payload in zip(results, records):
+        assert client.post("/predict", json=payload).json() == r
+
+
+def test_batch_reuses_cached_predictions(client):
+    first = client.post("/predict", json=record("Pune")).json()
+    stats = api.prediction_cache.stats()
+    results = client.post("/predict/batch", json=[record("Pune"), record("Nagpur")]).json()["results"]
+    assert results[0] == first
+    assert api.prediction_cache.stats()["hits"] == stats["hits"] + 1
+
+
+def test_batch_reports_the_failing_record(client):
+    response = client.post("/predict/batch", json=[record("Pune"), record("Mumbai")])
+    assert response.status_code == 404 and response.json()["detail"] == "Record 1: Unknown market: Mumbai"
+    response = client.post("/predict/batch", json=[record("Pune"), record("Pune", crop="Rice")])
+    assert response.status_code == 404 and response.json()["detail"] == "Record 1: No model for Rice in Maharashtra"
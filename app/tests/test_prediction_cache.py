@@ -0,0 +1,83 @@
+from services.prediction_cache import PredictionCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_and_miss():
+    cache = PredictionCache(max_size=2)
+    assert cache.get("a") is None
+    cache.put("a", {"price": 1})
+    assert cache.get("a") == {"price": 1}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_evicts_least_recently_used():
+    cache = PredictionCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # b is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+
+
+def test_put_refreshes_an_existing_key():
+    cache = PredictionCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+    assert cache.get("a") == 10 and cache.get("b") is None
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = PredictionCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.put("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["expirations"], stats["size"]) == (1, 0)
+
+
+def test_hits_do_not_extend_the_ttl():
+    clock = Clock()
+    cache = PredictionCache(ttl_seconds=5, clock=clock)
+    cache.put("a", 1)
+    clock.now = 4
+    cache.get("a")
+    clock.now = 6
+    assert cache.get("a") is None
+
+
+def test_entries_of_another_model_version_are_missing():
+    cache = PredictionCache()
+    cache.put("a", "old model", version=1)
+    assert cache.get("a", version=2) is None
+    # Dropped, not just hidden
+    assert cache.stats()["size"] == 0
+    cache.put("a", "new model", version=2)
+    assert cache.get("a", version=2) == "new model"
+
+
+def test_zero_size_disables_caching():
+    cache = PredictionCache(max_size=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None and cache.stats()["size"] == 0
+
+
+def test_clear():
+    cache = PredictionCache()
+    cache.put("a", 1)
+    cache.clear()
+    assert cache.get("a") is None